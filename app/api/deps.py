@@ -3,7 +3,7 @@ Dependencias inyectables de FastAPI.
 Incluye get_current_user para proteger rutas.
 """
 
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict, Iterable, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,13 +11,17 @@ from sqlalchemy import select
 
 from app.db.session import get_db
 from app.models.user import User
-from app.models.document import Permission
-from app.core.security import decode_token
+from app.models.document import Document, Permission
+from app.core.security import decode_token_payload
+from app.services import permission_cache, user_cache
 from app.schemas.token import TokenData
 
 # Esquema de seguridad HTTP Bearer
 security = HTTPBearer()
 
+# Niveles de permiso ordenados de menor a mayor
+PERMISSION_LEVELS = ["viewer", "editor", "owner"]
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -25,7 +29,7 @@ async def get_current_user(
 ) -> User:
     """
     Dependencia para obtener el usuario actual a partir del JWT token.
-    Valida el token y consulta el usuario en la base de datos.
+    Valida el token y obtiene el usuario de la caché o de la base de datos.
     
     Args:
         credentials: Credenciales HTTP Bearer (token JWT)
@@ -40,20 +44,24 @@ async def get_current_user(
     token = credentials.credentials
     
     # Decodificar el token
-    email = decode_token(token)
-    if email is None:
+    payload = decode_token_payload(token)
+    # Los tokens con 'purpose' (p.ej. enlaces de descarga) no son de sesión
+    if payload is None or payload.get("purpose"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    token_data = TokenData(email=email)
+    # 'sub' es el id del usuario; los tokens antiguos llevan el email
+    subject = str(payload["sub"])
+    if subject.isdigit():
+        token_data = TokenData(user_id=int(subject), email=payload.get("email"))
+    else:
+        token_data = TokenData(email=subject)
     
-    # Buscar el usuario en la base de datos
-    stmt = select(User).where(User.email == token_data.email)
-    result = await db.execute(stmt)
-    user = result.scalar_one_or_none()
+    # Buscar el usuario (caché de usuarios activos o base de datos)
+    user = await user_cache.get_active_user(db, token_data)
     
     if user is None:
         raise HTTPException(
@@ -105,47 +113,112 @@ async def verify_document_access(
     """
     Verifica si el usuario tiene permiso sobre un documento específico.
     Los niveles son: 'owner' > 'editor' > 'viewer'.
+    El resultado se cachea (ver app.services.permission_cache).
     """
-    stmt = select(Permission).where(
-        Permission.document_id == document_id,
-        Permission.user_id == current_user.id
-    )
-    result = await db.execute(stmt)
-    permissions = result.scalars().all()
+    levels = await _resolve_level_indexes(db, current_user.id, [document_id])
+    best_level_idx = levels[document_id]
 
-    if not permissions:
+    if best_level_idx is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tienes permiso para acceder a este documento."
         )
 
-    # Lógica de niveles de permiso
-    levels = ["viewer", "editor", "owner"]
-    
+    if best_level_idx == -1:
+         raise HTTPException(status_code=403, detail="Error en configuración de permisos.")
+
+    current_level = PERMISSION_LEVELS[best_level_idx]
+
+    if best_level_idx < _required_level_index(required_level):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Se requiere permiso de {required_level} para esta acción."
+        )
+
+    return current_level
+
+
+async def verify_documents_access(
+    document_ids: Iterable[int],
+    db: AsyncSession,
+    current_user: User,
+    required_level: str = "viewer"
+) -> Dict[int, str]:
+    """
+    Variante por lotes de verify_document_access.
+    Resuelve los permisos de muchos documentos en una sola consulta
+    (solo para los que no estén ya en caché).
+
+    Returns:
+        Diccionario {document_id: nivel} solo con los documentos sobre los que
+        el usuario alcanza el nivel requerido. Los demás se omiten.
+    """
+    required_idx = _required_level_index(required_level)
+    ids = set(document_ids)
+    if not ids:
+        return {}
+
+    levels = await _resolve_level_indexes(db, current_user.id, ids)
+
+    granted = {}
+    for document_id, best_level_idx in levels.items():
+        if best_level_idx is not None and best_level_idx >= required_idx:
+            granted[document_id] = PERMISSION_LEVELS[best_level_idx]
+    return granted
+
+
+async def _resolve_level_indexes(
+    db: AsyncSession, user_id: int, document_ids: Iterable[int]
+) -> Dict[int, Optional[int]]:
+    """
+    Índice del mejor nivel del usuario sobre cada documento (None = sin permiso).
+    Consulta en una sola query los documentos que no están en caché.
+    """
+    known, missing = permission_cache.lookup(db, user_id, document_ids)
+    if not missing:
+        return known
+
+    # Los documentos con borrado lógico no son accesibles
+    stmt = (
+        select(Permission.document_id, Permission.permission_level)
+        .join(Document, Document.id == Permission.document_id)
+        .where(
+            Permission.document_id.in_(missing),
+            Permission.user_id == user_id,
+            Document.deleted_at.is_(None)
+        )
+    )
+    result = await db.execute(stmt)
+
+    levels_by_doc: Dict[int, list] = {document_id: [] for document_id in missing}
+    for document_id, level in result.all():
+        levels_by_doc[document_id].append(level)
+
     # Encontrar el nivel más alto que tenga el usuario (en caso de duplicados)
+    fetched = {
+        document_id: (_best_level_index(levels) if levels else None)
+        for document_id, levels in levels_by_doc.items()
+    }
+    permission_cache.remember(db, user_id, fetched)
+    known.update(fetched)
+    return known
+
+
+def _best_level_index(levels: Iterable[str]) -> int:
+    """Índice del nivel más alto de la lista (-1 si ninguno es válido)."""
     best_level_idx = -1
-    
-    for perm in permissions:
+    for level in levels:
         try:
-            idx = levels.index(perm.permission_level)
-            if idx > best_level_idx:
-                best_level_idx = idx
+            idx = PERMISSION_LEVELS.index(level)
         except ValueError:
             continue
-            
-    if best_level_idx == -1:
-         raise HTTPException(status_code=403, detail="Error en configuración de permisos.")
+        if idx > best_level_idx:
+            best_level_idx = idx
+    return best_level_idx
 
-    current_level = levels[best_level_idx]
 
+def _required_level_index(required_level: str) -> int:
     try:
-        required_idx = levels.index(required_level)
-        if best_level_idx < required_idx:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Se requiere permiso de {required_level} para esta acción."
-            )
+        return PERMISSION_LEVELS.index(required_level)
     except ValueError:
         raise HTTPException(status_code=500, detail="Nivel de permiso requerido inválido.")
-
-    return current_level
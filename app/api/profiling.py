@@ -0,0 +1,100 @@
+"""
+Middleware ASGI de perfilado bajo demanda.
+
+Un administrador puede enviar la cabecera `X-Profile: 1` para ejecutar esa
+solicitud bajo el perfilador por muestreo. El perfil (pilas en formato
+folded para generar un flame graph) se guarda en settings.profile_dir y su
+identificador se devuelve en la cabecera X-Profile-Id; se descarga desde
+GET /api/v1/admin/profiles/{profile_id}.
+
+Sin la cabecera, el único coste es buscarla en la lista de cabeceras. Si
+quien la envía no es administrador, se ignora y la solicitud sigue igual.
+"""
+
+import logging
+import time
+from typing import Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api import deps
+from app.core.config import get_settings
+from app.core.profiling import SamplingProfiler, new_profile_id, save_profile
+from app.db.session import get_db
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+PROFILE_HEADER = b"x-profile"
+
+
+def _header(scope: Scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value
+    return None
+
+
+async def _resolve_admin(app, scope: Scope) -> Optional[User]:
+    """Administrador autenticado con el token Bearer de la solicitud, o None."""
+    authorization = (_header(scope, b"authorization") or b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    # Misma sesión que usarían los endpoints (respeta dependency_overrides en tests)
+    db_dependency = getattr(app, "dependency_overrides", {}).get(get_db, get_db)
+    sessions = db_dependency()
+    db = await sessions.__anext__()
+    try:
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        user = await deps.get_current_user(credentials, db)
+        return await deps.get_current_admin(user)
+    except HTTPException:
+        return None
+    finally:
+        await sessions.aclose()
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.profiling_enabled
+            or _header(scope, PROFILE_HEADER) in (None, b"", b"0")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        admin = await _resolve_admin(scope.get("app"), scope)
+        if admin is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_profile_id()
+        profiler = SamplingProfiler(interval=settings.profile_interval_ms / 1000)
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            with profiler:
+                await self.app(scope, receive, send_with_id)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            header = f"{scope['method']} {scope['path']} {elapsed_ms:.1f} ms user={admin.id}"
+            # Escribir el archivo fuera del loop
+            await run_in_threadpool(save_profile, profiler, profile_id, header)
+            logger.info("Perfil %s guardado (%s)", profile_id, header)
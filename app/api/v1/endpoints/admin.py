@@ -0,0 +1,53 @@
+"""
+Endpoints de administración y diagnóstico (solo administradores).
+"""
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from app.api import deps
+from app.core.memory_profiling import memory_report, reset_memory_report
+from app.core.profiling import list_profiles, profile_path
+from app.models import User
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["admin"]
+)
+
+
+@router.get("/profiles", response_model=List[str])
+async def get_profiles(admin: User = Depends(deps.get_current_admin)):
+    """
+    Lista los perfiles guardados con la cabecera X-Profile, del más reciente
+    al más antiguo.
+    """
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, admin: User = Depends(deps.get_current_admin)):
+    """
+    Descarga un perfil en formato folded (entrada de flamegraph.pl o speedscope).
+    """
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return FileResponse(path, media_type="text/plain", filename=path.name)
+
+
+@router.get("/memory")
+async def get_memory_report(admin: User = Depends(deps.get_current_admin)):
+    """
+    Picos de memoria y principales sitios de asignación por endpoint y por
+    etapa (requiere memory_profiling=true).
+    """
+    return memory_report()
+
+
+@router.delete("/memory", status_code=204)
+async def clear_memory_report(admin: User = Depends(deps.get_current_admin)):
+    """Reinicia los resultados del perfilado de memoria."""
+    reset_memory_report()
@@ -4,10 +4,10 @@ Endpoints para anotaciones en PDFs y envío de correos electrónicos.
 
 import os
 import uuid
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
-from fastapi_mail import FastMail, MessageSchema, MessageType
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -17,13 +17,20 @@ from app.models import User, Document, Version
 from app.schemas.annotation import (
     AnnotateRequest,
     AnnotateResponse,
+    BulkAnnotateRequest,
+    BulkAnnotateItemResult,
+    BulkAnnotateResponse,
     SendEmailRequest,
     SendEmailResponse
 )
 from app.schemas.document import VersionResponse
 from app.services.pdf_annotation import PDFAnnotationService
+from app.services.versioning import add_version
 from app.core.config import get_settings
-from app.core.mail_config import get_mail_config
+from app.core.concurrency import gather_in_threadpool
+from app.core.memory_profiling import memory_stage
+from app.core.security import create_download_token
+from app.services.mail_service import enqueue_email, notify_outbox
 
 router = APIRouter(
     prefix="/api/v1/annotations",
@@ -92,11 +99,12 @@ async def annotate_pdf(
         # 6. Procesar anotaciones
         annotations_list = [annot.model_dump() for annot in request.annotations]
         
-        success = PDFAnnotationService.add_annotations(
-            input_pdf_path=source_path,
-            output_pdf_path=output_path,
-            annotations=annotations_list
-        )
+        with memory_stage("annotate"):
+            success = PDFAnnotationService.add_annotations(
+                input_pdf_path=source_path,
+                output_pdf_path=output_path,
+                annotations=annotations_list
+            )
         
         if not success:
             raise HTTPException(
@@ -105,56 +113,18 @@ async def annotate_pdf(
             )
         
         # 7. Crear nueva versión en la base de datos
-        # Obtener número de versión actual
-        stmt_doc = select(Document).where(Document.id == version.document_id)
-        result_doc = await db.execute(stmt_doc)
+        # El número de versión se calcula dentro de add_version, con la fila bloqueada
+        result_doc = await db.execute(select(Document).where(Document.id == version.document_id))
         document = result_doc.scalar_one()
         
-        # Calcular nuevo número de versión
-        stmt_last = (
-            select(Version)
-            .where(Version.document_id == version.document_id)
-            .order_by(Version.created_at.desc())
-            .limit(1)
-        )
-        result_last = await db.execute(stmt_last)
-        last_version = result_last.scalar_one_or_none()
-        
-        new_version_number = "v1.0"
-        if last_version:
-            try:
-                v_num = last_version.version_number.replace('v', '').split('-')[0]
-                parts = v_num.split('.')
-                major = int(parts[0])
-                minor = int(parts[1]) if len(parts) > 1 else 0
-                new_version_number = f"v{major}.{minor + 1}-annotated"
-            except:
-                new_version_number = "v1.1-annotated"
-        
-        # Obtener tamaño del archivo
-        file_size = output_path.stat().st_size
-        
-        # Crear nueva versión
-        new_version = Version(
-            document_id=version.document_id,
-            version_number=new_version_number,
+        new_version = await add_version(
+            db,
+            document,
+            suffix="-annotated",
             file_path=str(output_path),
-            file_size=file_size,
-            mime_type="application/pdf",
-            is_latest=True
-        )
-        
-        # Marcar versiones anteriores como no actuales
-        from sqlalchemy import update
-        await db.execute(
-            update(Version)
-            .where(Version.document_id == version.document_id)
-            .values(is_latest=False)
+            file_size=output_path.stat().st_size
         )
-        
-        db.add(new_version)
         await db.commit()
-        await db.refresh(new_version)
         
         return AnnotateResponse(
             success=True,
@@ -178,57 +148,223 @@ async def annotate_pdf(
         )
 
 
-async def send_email_background(
-    recipient: str,
-    subject: str,
-    body: str,
-    attachment_path: Optional[Path] = None,
-    attachment_name: Optional[str] = None
+def _annotate_job(job: tuple) -> int:
+    """
+    Procesa un trabajo de anotación de forma síncrona (ejecutado en threadpool).
+    
+    Args:
+        job: Tupla (source_path, output_path, annotations)
+    
+    Returns:
+        Tamaño en bytes del PDF anotado
+    """
+    source_path, output_path, annotations = job
+    
+    is_valid, message = PDFAnnotationService.validate_pdf(source_path)
+    if not is_valid:
+        raise ValueError(f"PDF inválido: {message}")
+    
+    PDFAnnotationService.add_annotations(
+        input_pdf_path=source_path,
+        output_pdf_path=output_path,
+        annotations=annotations
+    )
+    return output_path.stat().st_size
+
+
+def _annotate_chain(steps: List[tuple]) -> List[Union[int, Exception]]:
+    """
+    Procesa en orden los trabajos de un mismo documento (en threadpool):
+    cada uno parte del PDF que generó el anterior, así ninguno pierde las
+    anotaciones de los demás. Si un paso falla, los siguientes también.
+    
+    Args:
+        steps: Tuplas (source_path, output_path, annotations); solo se usa
+            el source_path del primero
+    
+    Returns:
+        Tamaño del PDF anotado o la excepción, por paso
+    """
+    outcomes: List[Union[int, Exception]] = []
+    source_path = steps[0][0]
+    for _, output_path, annotations in steps:
+        if outcomes and isinstance(outcomes[-1], Exception):
+            outcomes.append(RuntimeError("Falló un trabajo anterior sobre el mismo documento"))
+            continue
+        try:
+            outcomes.append(_annotate_job((source_path, output_path, annotations)))
+        except Exception as e:
+            outcomes.append(e)
+        source_path = output_path
+    return outcomes
+
+
+@router.post("/annotate/bulk", response_model=BulkAnnotateResponse)
+async def annotate_pdf_bulk(
+    request: BulkAnnotateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
 ):
     """
-    Tarea en background para enviar correo.
-    No debe lanzar excepciones ya que se ejecuta en background.
+    Agrega anotaciones a muchas versiones en una sola solicitud.
+    
+    - **jobs**: Lista de trabajos, cada uno con `file_id` (ID de versión) y `annotations`
+    
+    Los permisos se verifican en una sola consulta, los PDFs se procesan en
+    paralelo y todas las versiones nuevas se crean en una única transacción.
+    Devuelve el resultado de cada trabajo por separado.
+    
+    Los trabajos sobre la misma versión se encadenan en el orden recibido:
+    cada uno crea su versión a partir de la del anterior, y la última reúne
+    todas las anotaciones. Los trabajos sobre otra versión de un documento
+    que ya anota un trabajo anterior de la solicitud se rechazan.
+    
+    Permisos requeridos: Editor o Owner sobre cada documento
     """
-    try:
-        mail_config = get_mail_config()
-        
-        # Preparar mensaje
-        message = MessageSchema(
-            subject=subject,
-            recipients=[recipient],
-            body=body,
-            subtype=MessageType.html if "<" in body else MessageType.plain,
-            # NOTA: En FastAPI-Mail >= 1.4.0, los adjuntos deben ir en el MessageSchema.
-            # Se convierten a str porque Pydantic espera cadenas de texto para las rutas.
-            attachments=[str(attachment_path)] if attachment_path and attachment_path.exists() else []
+    if len(request.jobs) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.bulk_max_items} trabajos por solicitud"
+        )
+    
+    results: List[Optional[BulkAnnotateItemResult]] = [None] * len(request.jobs)
+    
+    def _fail(index: int, message: str):
+        results[index] = BulkAnnotateItemResult(
+            file_id=request.jobs[index].file_id,
+            success=False,
+            message=message
         )
+    
+    # 1. Cargar todas las versiones solicitadas en una consulta
+    version_ids = {job.file_id for job in request.jobs}
+    stmt = select(Version).where(Version.id.in_(version_ids))
+    result = await db.execute(stmt)
+    versions = {v.id: v for v in result.scalars().all()}
+    
+    # 2. Verificar permisos (editor o owner) de todos los documentos a la vez
+    granted = await deps.verify_documents_access(
+        {v.document_id for v in versions.values()},
+        db,
+        current_user,
+        "editor"
+    )
+    
+    # 3. Preparar los trabajos válidos, agrupados por documento
+    chains = {}  # document_id -> [(index, version, output_path)]
+    for index, job in enumerate(request.jobs):
+        version = versions.get(job.file_id)
+        if not version:
+            _fail(index, "Versión del documento no encontrada")
+            continue
+        if version.document_id not in granted:
+            _fail(index, "Se requiere permiso de editor para esta acción.")
+            continue
+        if not Path(version.file_path).exists():
+            _fail(index, "El archivo físico no existe en el servidor")
+            continue
+        chain = chains.setdefault(version.document_id, [])
+        if chain and chain[0][1].id != version.id:
+            _fail(index, "Otro trabajo de la solicitud anota otra versión de este documento")
+            continue
+        chain.append((index, version, UPLOAD_DIR / f"{uuid.uuid4()}.pdf"))
+    
+    # 4. Procesar los PDFs en paralelo (un documento por worker, en cadena)
+    chain_list = list(chains.values())
+    chain_outcomes = await gather_in_threadpool(
+        _annotate_chain,
+        [
+            [
+                (
+                    Path(version.file_path),
+                    output_path,
+                    [annot.model_dump() for annot in request.jobs[index].annotations]
+                )
+                for index, version, output_path in chain
+            ]
+            for chain in chain_list
+        ],
+        settings.pdf_max_workers
+    )
+    
+    processed = []  # (index, version, output_path, file_size), en orden de cadena
+    for chain, outcomes in zip(chain_list, chain_outcomes):
+        if isinstance(outcomes, Exception):
+            outcomes = [outcomes] * len(chain)
+        for (index, version, output_path), outcome in zip(chain, outcomes):
+            if isinstance(outcome, Exception):
+                if output_path.exists():
+                    output_path.unlink()
+                _fail(index, f"Error al procesar anotaciones: {str(outcome)}")
+            else:
+                processed.append((index, version, output_path, outcome))
+    
+    # 5. Crear todas las versiones nuevas en una sola transacción
+    if processed:
+        document_ids = {version.document_id for _, version, _, _ in processed}
         
-        # Enviar correo
-        fm = FastMail(mail_config)
-        await fm.send_message(message)
+        result_docs = await db.execute(select(Document).where(Document.id.in_(document_ids)))
+        documents = {document.id: document for document in result_docs.scalars().all()}
         
-        print(f"✅ Correo enviado exitosamente a {recipient}")
+        new_versions = []
+        try:
+            for index, version, output_path, file_size in processed:
+                new_version = await add_version(
+                    db,
+                    documents[version.document_id],
+                    suffix="-annotated",
+                    file_path=str(output_path),
+                    file_size=file_size
+                )
+                new_versions.append((index, new_version))
+            
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            for _, _, output_path, _ in processed:
+                if output_path.exists():
+                    output_path.unlink()
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error al registrar las versiones anotadas: {str(e)}"
+            )
         
-    except Exception as e:
-        print(f"❌ Error al enviar correo: {str(e)}")
+        for index, new_version in new_versions:
+            job = request.jobs[index]
+            results[index] = BulkAnnotateItemResult(
+                file_id=job.file_id,
+                success=True,
+                message=f"{len(job.annotations)} anotación(es) agregada(s).",
+                annotated_version_id=new_version.id,
+                filename=documents[new_version.document_id].name
+            )
+    
+    succeeded = sum(1 for r in results if r.success)
+    return BulkAnnotateResponse(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results
+    )
 
 
 @router.post("/send-email", response_model=SendEmailResponse)
 async def send_email_with_pdf(
     request: SendEmailRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """
-    Envía un correo electrónico con un PDF adjunto.
+    Envía por correo una versión de un documento a uno o varios destinatarios.
     
-    - **recipient**: Correo electrónico del destinatario
+    - **recipient** / **recipients**: Destinatarios (el mensaje se genera una sola vez)
     - **subject**: Asunto del correo
     - **body**: Cuerpo del mensaje (puede incluir HTML)
-    - **file_version_id**: ID de la versión del archivo a adjuntar
+    - **file_version_id**: ID de la versión del archivo a enviar
+    - **delivery**: 'attachment', 'link' o 'auto' (enlace si el PDF supera MAIL_ATTACHMENT_MAX_MB)
     
-    El envío se realiza en background para no bloquear la respuesta.
+    El correo queda en la bandeja de salida y lo envía el worker de correo,
+    con reintentos si el servidor SMTP falla.
     """
     # 1. Validar configuración de correo
     if not settings.mail_username or not settings.mail_password:
@@ -237,6 +373,13 @@ async def send_email_with_pdf(
             detail="Configuración de correo no disponible. Configure las variables MAIL_USERNAME y MAIL_PASSWORD."
         )
     
+    recipients = request.all_recipients()
+    if len(recipients) > settings.mail_max_recipients:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.mail_max_recipients} destinatarios por solicitud"
+        )
+    
     # 2. Buscar la versión del documento
     stmt = select(Version).where(Version.id == request.file_version_id)
     result = await db.execute(stmt)
@@ -269,35 +412,61 @@ async def send_email_with_pdf(
     result_doc = await db.execute(stmt_doc)
     document = result_doc.scalar_one()
     
-    # 6. Preparar cuerpo del correo si no se proporciona
+    # 6. Adjunto o enlace de descarga con caducidad
+    delivery = request.delivery
+    if delivery == "auto":
+        too_big = version.file_size > settings.mail_attachment_max_mb * 1024 * 1024
+        delivery = "link" if too_big else "attachment"
+    
+    link_expires_at = None
+    if delivery == "link":
+        expires_delta = timedelta(hours=settings.download_link_expire_hours)
+        link_expires_at = datetime.utcnow() + expires_delta
+        token = create_download_token(version.id, expires_delta)
+        download_link = f"{settings.frontend_base_url.rstrip('/')}/api/v1/files/shared/{token}"
+        content_line = (
+            f'Puedes descargar el documento <strong>{document.name}</strong> '
+            f'<a href="{download_link}">desde este enlace</a> '
+            f'(válido hasta el {link_expires_at:%d/%m/%Y %H:%M} UTC).'
+        )
+    else:
+        content_line = f"Adjunto encontrarás el documento <strong>{document.name}</strong>."
+    
+    # 7. Preparar cuerpo del correo si no se proporciona
     if not request.body:
         request.body = f"""
         <html>
             <body>
                 <p>Hola,</p>
-                <p>Adjunto encontrarás el documento <strong>{document.name}</strong>.</p>
+                <p>{content_line}</p>
                 <p>Saludos,<br>
                 {settings.mail_from_name}</p>
             </body>
         </html>
         """
+    elif delivery == "link":
+        request.body = f"{request.body}<p>{content_line}</p>"
     
-    # 7. Actualizar flag de compartido externamente
+    # 8. Actualizar flag de compartido externamente
     document.shared_externally = True
     db.add(document)
-    await db.commit()
     
-    # 8. Agregar tarea en background
-    background_tasks.add_task(
-        send_email_background,
-        recipient=request.recipient,
+    # 9. Encolar un solo correo para todos los destinatarios (misma transacción)
+    await enqueue_email(
+        db,
+        recipients,
         subject=request.subject,
         body=request.body,
-        attachment_path=file_path,
+        attachment_path=file_path if delivery == "attachment" else None,
         attachment_name=document.name
     )
+    await db.commit()
+    notify_outbox()
     
     return SendEmailResponse(
         success=True,
-        message=f"El correo será enviado a {request.recipient} en breve."
+        message=f"El correo será enviado a {', '.join(recipients)} en breve.",
+        recipients=len(recipients),
+        delivery=delivery,
+        link_expires_at=link_expires_at
     )
@@ -3,6 +3,7 @@ Endpoints de autenticación (login y registro).
 """
 
 from datetime import timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,10 +12,17 @@ from sqlalchemy import select
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, UserLogin
-from app.schemas.token import Token
-from app.core.security import hash_password, verify_password, create_access_token
+from app.schemas.token import Token, RefreshTokenRequest
+from app.core.security import hash_password_async, verify_and_update_password, create_access_token
 from app.core.config import get_settings
 from app.api import deps
+from app.services.refresh_tokens import (
+    RefreshTokenError,
+    issue_refresh_token,
+    revoke_token,
+    revoke_user_tokens,
+    rotate_refresh_token,
+)
 
 router = APIRouter(
     prefix="/api/v1/auth",
@@ -25,6 +33,50 @@ router = APIRouter(
 settings = get_settings()
 
 
+def _token_claims(user: User) -> dict:
+    """
+    Claims adicionales del access token. Solo datos inmutables: el rol o el
+    estado pueden cambiar y se comprueban siempre contra el usuario.
+    """
+    if not settings.jwt_embed_claims:
+        return {}
+    return {"email": user.email}
+
+
+async def _check_password(db: AsyncSession, user: User, password: str) -> bool:
+    """
+    Verifica la contraseña y, si el hash usa parámetros de Argon2 distintos
+    a los configurados, guarda uno nuevo (rehash transparente en el login).
+    """
+    password_ok, new_hash = await verify_and_update_password(password, user.password_hash)
+    if password_ok and new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    return password_ok
+
+
+async def _issue_tokens(
+    db: AsyncSession,
+    user: User,
+    refresh_token: Optional[str] = None
+) -> Token:
+    """
+    Crea el access token y, si no se pasa uno ya rotado, un refresh token
+    de una sesión nueva. Hace commit.
+    """
+    if refresh_token is None:
+        refresh_token = await issue_refresh_token(db, user)
+    await db.commit()
+    
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+    access_token = create_access_token(
+        subject=user.id,
+        expires_delta=access_token_expires,
+        claims=_token_claims(user)
+    )
+    return Token(access_token=access_token, token_type="bearer", refresh_token=refresh_token)
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
@@ -57,7 +109,7 @@ async def register(
         )
     
     # Crear nuevo usuario con password hasheado
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     
     new_user = User(
         email=user_data.email,
@@ -98,8 +150,9 @@ async def login_access_token(
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
     
-    # Validar usuario y contraseña
-    if not user or not verify_password(form_data.password, user.password_hash):
+    # Validar usuario y contraseña (en el executor de contraseñas)
+    password_ok = user is not None and await _check_password(db, user, form_data.password)
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
@@ -112,14 +165,8 @@ async def login_access_token(
             detail="Usuario inactivo"
         )
     
-    # Crear access token
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        subject=user.email,
-        expires_delta=access_token_expires
-    )
-    
-    return Token(access_token=access_token, token_type="bearer")
+    # Crear access token y refresh token
+    return await _issue_tokens(db, user)
 
 
 @router.post("/login", response_model=Token)
@@ -147,8 +194,9 @@ async def login(
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
     
-    # Validar usuario y contraseña
-    if not user or not verify_password(user_data.password, user.password_hash):
+    # Validar usuario y contraseña (en el executor de contraseñas)
+    password_ok = user is not None and await _check_password(db, user, user_data.password)
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos"
@@ -160,14 +208,47 @@ async def login(
             detail="Usuario inactivo"
         )
     
-    # Crear access token
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        subject=user.email,
-        expires_delta=access_token_expires
-    )
+    # Crear access token y refresh token
+    return await _issue_tokens(db, user)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    request: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db)
+) -> Token:
+    """
+    Emite un nuevo access token a partir de un refresh token, sin contraseña.
+    
+    El refresh token se rota: la respuesta trae uno nuevo y el enviado deja
+    de ser válido. Reutilizar un token ya rotado revoca la sesión completa.
+    
+    Excepciones:
+    - 401: Refresh token inválido, expirado o revocado
+    """
+    try:
+        user, new_refresh_token = await rotate_refresh_token(db, request.refresh_token)
+    except RefreshTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
     
-    return Token(access_token=access_token, token_type="bearer")
+    return await _issue_tokens(db, user, new_refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    request: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Cierra la sesión: revoca el refresh token y todos los de su familia.
+    """
+    await revoke_token(db, request.refresh_token)
+    await db.commit()
+    return None
 
 
 @router.get("/me", response_model=UserResponse)
@@ -179,7 +260,6 @@ async def get_me(current_user: User = Depends(deps.get_current_user)):
 
 
 from datetime import datetime, timedelta
-from fastapi import BackgroundTasks
 
 from app.schemas.password_reset import (
     PasswordRecoveryRequest,
@@ -191,15 +271,13 @@ from app.schemas.password_reset import (
 from app.core.security import (
     generate_reset_token,
     hash_reset_token,
-    hash_password,
 )
 
-from app.services.mail_service import send_email_background
+from app.services.mail_service import enqueue_email, notify_outbox
 
 @router.post("/password-recovery", response_model=PasswordRecoveryResponse)
 async def password_recovery(
     request: PasswordRecoveryRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
 ) -> PasswordRecoveryResponse:
     """
@@ -240,7 +318,6 @@ async def password_recovery(
     user.password_reset_token_used_at = None
 
     db.add(user)
-    await db.commit()
 
     # Link al frontend
     reset_link = f"{settings.frontend_base_url.rstrip('/')}/reset-password.html?token={token}"
@@ -264,12 +341,10 @@ async def password_recovery(
     </html>
     """
 
-    background_tasks.add_task(
-        send_email_background,
-        recipient=user.email,
-        subject=subject,
-        body=body,
-    )
+    # Encolar el correo en la misma transacción que el token
+    await enqueue_email(db, user.email, subject, body)
+    await db.commit()
+    notify_outbox()
 
     return generic_response
 
@@ -305,13 +380,16 @@ async def reset_password(
         raise HTTPException(status_code=403, detail="Usuario inactivo")
 
     # Actualizar password
-    user.password_hash = hash_password(request.new_password)
+    user.password_hash = await hash_password_async(request.new_password)
 
     # Invalidar token (un solo uso)
     user.password_reset_token_used_at = now
     user.password_reset_token_hash = None
     user.password_reset_token_expires_at = None
 
+    # Cerrar las sesiones abiertas con la contraseña anterior
+    await revoke_user_tokens(db, user.id)
+
     db.add(user)
     await db.commit()
 
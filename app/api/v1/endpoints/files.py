@@ -5,9 +5,10 @@ Endpoints para la gestión de archivos y versiones.
 import os
 import uuid
 import shutil
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
 from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Query, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
@@ -21,10 +22,23 @@ from app.schemas.document import (
     VersionResponse, 
     DocumentWithVersions, 
     ShareDocumentRequest, 
-    PermissionResponse
+    PermissionResponse,
+    BulkShareRequest,
+    BulkShareItemResult,
+    BulkShareResponse,
+    BulkDeleteRequest,
+    BulkDeleteItemResult,
+    BulkDeleteResponse
 )
 from app.core.config import get_settings
+from app.core.security import decode_download_token
 from app.core.converters import ConverterFactory
+from app.core.memory_profiling import memory_stage
+from app.services.versioning import add_version
+from app.services import permission_cache
+from app.services.sharing import upsert_permissions
+from app.services.document_purge import notify_purge
+from app.services.document_listing import DEFAULT_PAGE_SIZE, my_documents_query, encode_cursor, decode_cursor
 
 router = APIRouter(
     prefix="/api/v1/files",
@@ -55,11 +69,12 @@ async def upload_file(
     source_path = UPLOAD_DIR / unique_filename
     
     # Leer contenido y guardar en disco
-    content = await file.read()
-    
-    print(f"DEBUG: upload_file hit. File: {file.filename}, User ID: {current_user.id}")
-    with open(source_path, "wb") as buffer:
-        buffer.write(content)
+    with memory_stage("upload.receive"):
+        content = await file.read()
+        
+        print(f"DEBUG: upload_file hit. File: {file.filename}, User ID: {current_user.id}")
+        with open(source_path, "wb") as buffer:
+            buffer.write(content)
     print(f"DEBUG: Saved source to {source_path}")
         
     pdf_path = None
@@ -68,19 +83,21 @@ async def upload_file(
         # Esto asegura que en el historial solo queden los productos finales (.pdf)
         converter = ConverterFactory.get_converter()
         temp_dir = source_path.parent
-        pdf_path = await converter.convert(source_path, temp_dir)
-        
-        # Leer el contenido del PDF generado para persistirlo
-        with open(pdf_path, "rb") as f:
-            pdf_content = f.read()
-            file_size = len(pdf_content)
+        with memory_stage("upload.convert"):
+            pdf_path = await converter.convert(source_path, temp_dir)
         
-        # Generar nombre único final para el PDF en el repositorio permanente (uploads)
-        final_pdf_name = f"{uuid.uuid4()}.pdf"
-        final_pdf_path = UPLOAD_DIR / final_pdf_name
-        
-        with open(final_pdf_path, "wb") as buffer:
-            buffer.write(pdf_content)
+        with memory_stage("upload.persist"):
+            # Leer el contenido del PDF generado para persistirlo
+            with open(pdf_path, "rb") as f:
+                pdf_content = f.read()
+                file_size = len(pdf_content)
+            
+            # Generar nombre único final para el PDF en el repositorio permanente (uploads)
+            final_pdf_name = f"{uuid.uuid4()}.pdf"
+            final_pdf_path = UPLOAD_DIR / final_pdf_name
+            
+            with open(final_pdf_path, "wb") as buffer:
+                buffer.write(pdf_content)
         print(f"DEBUG: Saved PDF to {final_pdf_path}")
 
         # Nombre amigable que verá el usuario (siempre con .pdf)
@@ -91,46 +108,20 @@ async def upload_file(
             # ADICIÓN SEMANA 4: Verificar que tiene permiso de EDITOR para subir versión
             await deps.verify_document_access(parent_id, db, current_user, "editor")
             
-            stmt = select(Document).where(Document.id == parent_id)
-            result = await db.execute(stmt)
+            result = await db.execute(select(Document).where(Document.id == parent_id))
             document = result.scalar_one_or_none()
             
             if not document:
                 raise HTTPException(status_code=404, detail="Documento no encontrado")
             
-            # Obtener última versión para incrementar el número
-            stmt_v = select(Version).where(Version.document_id == parent_id).order_by(Version.created_at.desc()).limit(1)
-            result_v = await db.execute(stmt_v)
-            last_version = result_v.scalar_one_or_none()
-            
-            # Marcar versiones anteriores como no actuales
-            await db.execute(
-                update(Version).where(Version.document_id == parent_id).values(is_latest=False)
-            )
-            
-            # Calcular nuevo número de versión
-            new_v_num = "v1.0"
-            if last_version:
-                try:
-                    v_num_str = last_version.version_number.replace('v', '').split('-')[0]
-                    v_parts = v_num_str.split('.')
-                    major = int(v_parts[0])
-                    minor = int(v_parts[1]) if len(v_parts) > 1 else 0
-                    new_v_num = f"v{major}.{minor + 1}"
-                except:
-                    new_v_num = "v1.1" # Fallback
-            
-            version = Version(
-                document_id=parent_id,
-                version_number=new_v_num,
+            # El número de versión se calcula dentro de add_version, con la fila bloqueada
+            version = await add_version(
+                db,
+                document,
                 file_path=str(final_pdf_path),
-                file_size=file_size,
-                mime_type="application/pdf",
-                is_latest=True
+                file_size=file_size
             )
-            db.add(version)
             await db.commit()
-            await db.refresh(document)
             
         else:
             # Nuevo documento
@@ -141,15 +132,12 @@ async def upload_file(
             db.add(document)
             await db.flush() # Para obtener el ID
             
-            version = Version(
-                document_id=document.id,
-                version_number="v1.0",
+            version = await add_version(
+                db,
+                document,
                 file_path=str(final_pdf_path),
-                file_size=file_size,
-                mime_type="application/pdf",
-                is_latest=True
+                file_size=file_size
             )
-            db.add(version)
             
             # ADICIÓN SEMANA 4: Registrar al creador como OWNER
             permission = Permission(
@@ -160,6 +148,7 @@ async def upload_file(
             db.add(permission)
             
             await db.commit()
+            permission_cache.invalidate_document(document.id, db)
             await db.refresh(document)
             print(f"DEBUG: Registered document ID {document.id}")
 
@@ -188,38 +177,54 @@ async def upload_file(
 
 @router.get("/my-documents", response_model=List[DocumentResponse])
 async def get_my_documents(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    name_prefix: Optional[str] = Query(None, max_length=255),
+    scope: str = Query("all", pattern="^(all|owned|shared)$"),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    signed: Optional[bool] = Query(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """
     Lista los documentos a los que el usuario tiene acceso (propios o compartidos).
-    Utiliza selectinload para optimizar la carga de versiones.
+
+    Del más reciente al más antiguo. Sin `limit` ni `cursor` devuelve todos
+    los documentos, como antes de la paginación. Con `limit` (o con `cursor`,
+    que usa páginas de DEFAULT_PAGE_SIZE) se pagina por cursor: si hay
+    más resultados, la cabecera X-Next-Cursor trae el de la página siguiente.
     """
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if limit is None and position is not None:
+        limit = DEFAULT_PAGE_SIZE
+
     # ADICIÓN SEMANA 4: Consultar documentos a través de la tabla de permisos
-    # Seleccionamos tanto el Documento como el Permiso correspondiente
-    stmt = (
-        select(Document, Permission)
-        .join(Permission)
-        .where(Permission.user_id == current_user.id)
-        .options(
-            selectinload(Document.versions),
-            selectinload(Document.permissions)
-        )
-        .order_by(Document.created_at.desc())
+    # Se pide una fila más de las necesarias para saber si hay página siguiente
+    stmt = my_documents_query(
+        current_user.id,
+        limit=limit + 1 if limit is not None else None,
+        cursor=position,
+        name_prefix=name_prefix,
+        scope=scope,
+        created_from=created_from,
+        created_to=created_to,
+        signed=signed,
     )
     result = await db.execute(stmt)
-    # result.all() devolverá una lista de tuplas (Document, Permission)
+    # (Document, Permission, Version | None, número de permisos del documento)
     rows = result.all()
+
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1][0].id)
     
-    response = []
-    for doc, perm in rows:
-        # Obtener la versión que tiene is_latest=True
-        latest_v = next((v for v in doc.versions if v.is_latest), None)
-        
-        # Fallback por si acaso ninguna está marcada
-        if not latest_v and doc.versions:
-            latest_v = sorted(doc.versions, key=lambda x: x.created_at, reverse=True)[0]
-        
+    documents = []
+    for doc, perm, latest_v, share_count in rows:
         doc_res = DocumentResponse.model_validate(doc)
         
         # Llenar campos extra de permisos
@@ -229,15 +234,15 @@ async def get_my_documents(
         # Verificar si el documento ha sido compartido con otros
         # (Si tiene más de un permiso en total)
         if doc_res.is_owner:
-            doc_res.shared_with_others = len(doc.permissions) > 1
+            doc_res.shared_with_others = share_count > 1
         else:
             doc_res.shared_with_others = True # Si no soy el dueño, es porque alguien me lo compartió
         
         if latest_v:
             doc_res.latest_version = VersionResponse.model_validate(latest_v)
-        response.append(doc_res)
+        documents.append(doc_res)
         
-    return response
+    return documents
 
 
 @router.get("/download/{version_id}")
@@ -273,6 +278,104 @@ async def download_file(
     )
 
 
+@router.get("/shared/{token}")
+async def download_shared_file(
+    token: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Descarga una versión mediante un enlace con caducidad enviado por correo.
+    No requiere sesión: el token firmado identifica la versión.
+    """
+    version_id = decode_download_token(token)
+    if version_id is None:
+        raise HTTPException(status_code=404, detail="Enlace inválido o caducado")
+    
+    stmt = (
+        select(Version, Document.name)
+        .join(Document, Document.id == Version.document_id)
+        .where(Version.id == version_id, Document.deleted_at.is_(None))
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Enlace inválido o caducado")
+    version, document_name = row
+    
+    file_path = Path(version.file_path)
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="El archivo físico no existe en el servidor")
+    
+    return FileResponse(
+        path=file_path,
+        filename=document_name,
+        media_type=version.mime_type or "application/octet-stream"
+    )
+
+
+@router.post("/share/bulk", response_model=BulkShareResponse)
+async def share_documents_bulk(
+    request: BulkShareRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Comparte varios documentos con varios usuarios en una sola operación.
+    
+    Se comparte cada documento con cada email. Los usuarios se resuelven con
+    una consulta, los permisos se crean o actualizan con una sola sentencia
+    y se hace un único commit. El resultado se da por par (documento, email).
+    Solo el 'owner' puede compartir, y los permisos 'owner' nunca se rebajan.
+    """
+    document_ids = list(dict.fromkeys(request.document_ids))
+    emails = list(dict.fromkeys(request.emails))
+    if len(document_ids) * len(emails) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.bulk_max_items} pares documento-usuario por solicitud"
+        )
+    
+    # 1. Documentos de los que el usuario actual es OWNER (una consulta)
+    owned = await deps.verify_documents_access(document_ids, db, current_user, "owner")
+    
+    # 2. Resolver todos los usuarios con una consulta IN
+    result = await db.execute(select(User.email, User.id).where(User.email.in_(emails)))
+    user_ids = dict(result.all())
+    
+    # 3. Upsert de todos los permisos en una sentencia y un commit
+    pairs = [
+        (document_id, user_ids[email])
+        for document_id in document_ids if document_id in owned
+        for email in emails if email in user_ids
+    ]
+    applied = await upsert_permissions(db, pairs, request.permission_level)
+    await db.commit()
+    for document_id in owned:
+        permission_cache.invalidate_document(document_id, db)
+    
+    results = []
+    for document_id in document_ids:
+        for email in emails:
+            if document_id not in owned:
+                success, message = False, "Se requiere permiso de owner para compartir este documento."
+            elif email not in user_ids:
+                success, message = False, f"El usuario con email {email} no existe."
+            elif (document_id, user_ids[email]) not in applied:
+                success, message = False, "El usuario ya es propietario del documento."
+            else:
+                success, message = True, f"Compartido como {request.permission_level}."
+            results.append(BulkShareItemResult(
+                document_id=document_id, email=email, success=success, message=message
+            ))
+    
+    succeeded = sum(1 for r in results if r.success)
+    return BulkShareResponse(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results
+    )
+
+
 @router.post("/{document_id}/share", response_model=PermissionResponse)
 async def share_document(
     document_id: int,
@@ -323,10 +426,49 @@ async def share_document(
         db.add(perm)
         
     await db.commit()
+    permission_cache.invalidate_document(document_id, db)
     await db.refresh(perm)
     return perm
 
 
+@router.post("/delete/bulk", response_model=BulkDeleteResponse)
+async def delete_documents_bulk(
+    request: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Elimina varios documentos en una sola operación (borrado lógico).
+    Solo se eliminan aquellos de los que el usuario es dueño (owner).
+    """
+    document_ids = list(dict.fromkeys(request.document_ids))
+    if len(document_ids) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.bulk_max_items} documentos por solicitud"
+        )
+    
+    owned = await deps.verify_documents_access(document_ids, db, current_user, "owner")
+    deleted = await _soft_delete(db, owned)
+    
+    results = [
+        BulkDeleteItemResult(
+            document_id=document_id,
+            success=document_id in deleted,
+            message="Documento eliminado" if document_id in deleted
+            else "Se requiere permiso de owner para eliminar este documento."
+        )
+        for document_id in document_ids
+    ]
+    succeeded = sum(1 for r in results if r.success)
+    return BulkDeleteResponse(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results
+    )
+
+
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(
     document_id: int,
@@ -336,30 +478,37 @@ async def delete_document(
     """
     Elimina un documento y todas sus versiones y archivos físicos.
     Solo el dueño (owner) puede eliminar.
+    
+    El documento deja de ser visible de inmediato; los archivos se borran
+    después en segundo plano (app.services.document_purge).
     """
     # 1. Verificar que es OWNER
     await deps.verify_document_access(document_id, db, current_user, "owner")
     
-    stmt = select(Document).where(Document.id == document_id)
-    result = await db.execute(stmt)
-    document = result.scalar_one_or_none()
-    
-    if not document:
+    if not await _soft_delete(db, [document_id]):
         raise HTTPException(status_code=404, detail="Documento no encontrado")
+    return None
+
+
+async def _soft_delete(db: AsyncSession, document_ids: Iterable[int]) -> Set[int]:
+    """
+    Marca documentos como borrados con un UPDATE, hace commit y avisa a la purga.
     
-    # Obtener todas las versiones para borrar archivos físicos
-    stmt_v = select(Version).where(Version.document_id == document_id)
-    result_v = await db.execute(stmt_v)
-    versions = result_v.scalars().all()
-    
-    for v in versions:
-        file_path = Path(v.file_path)
-        if file_path.exists():
-            try:
-                file_path.unlink()
-            except Exception as e:
-                print(f"Error borrando archivo {file_path}: {e}")
-                
-    await db.delete(document)
+    Returns:
+        Ids marcados (los ya borrados o inexistentes se omiten)
+    """
+    if not document_ids:
+        return set()
+    result = await db.execute(
+        update(Document)
+        .where(Document.id.in_(document_ids), Document.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow())
+        .returning(Document.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = set(result.scalars().all())
     await db.commit()
-    return None
+    for document_id in deleted:
+        permission_cache.invalidate_document(document_id, db)
+    notify_purge()
+    return deleted
@@ -2,40 +2,60 @@
 Endpoints para firma electrónica y validación de PDFs con pyHanko.
 """
 
+import asyncio
+import logging
 import os
-import shutil
 import uuid
-import tempfile
+from io import BytesIO
 from pathlib import Path
-from typing import Optional, List
+from typing import TYPE_CHECKING, Optional, List
 from datetime import datetime
 
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select
 
 # --- IMPORTACIONES PYHANKO ---
-from pyhanko.sign import signers
-from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
-from pyhanko.pdf_utils.reader import PdfFileReader
-
-# Importaciones específicas para validación y manejo de errores
-from pyhanko.sign.validation import validate_pdf_signature, ValidationContext
-from pyhanko_certvalidator.errors import InvalidCertificateError, PathBuildingError
+# pyHanko se importa en las funciones que lo usan: cargarlo cuesta tiempo de
+# arranque y la mayoría de procesos (workers recién creados, tests, manage.py)
+# no firman ni validan nada
+if TYPE_CHECKING:
+    from pyhanko.pdf_utils.reader import PdfFileReader
+    from pyhanko.sign import signers
+    from pyhanko.sign.validation import EmbeddedPdfSignature
 
 from app.db.session import get_db
 from app.api import deps
 from app.models import User, Document, Version
-from app.schemas.document import VersionResponse, SignatureValidationResponse
+from app.schemas.document import (
+    VersionResponse,
+    SignatureValidationResponse,
+    BatchSignItemResult,
+    BatchSignResponse
+)
 from app.core.config import get_settings
+from app.core.concurrency import gather_in_threadpool
+from app.core.memory_profiling import memory_stage
+from app.services.mmap_reader import MmapReader
+from app.services.signer_cache import get_signer
+from app.services.versioning import add_version
+from app.services.signature_validation import (
+    build_dss_validation_context,
+    build_ltv_signing_context,
+    build_validation_context,
+    content_digest,
+    get_cached_validation,
+    store_validation,
+)
 
 router = APIRouter(
     prefix="/documents",
     tags=["signatures"]
 )
 
+logger = logging.getLogger(__name__)
+
 settings = get_settings()
 # Asegurar que el directorio de subidas existe
 UPLOAD_DIR = Path(settings.upload_dir)
@@ -46,39 +66,57 @@ def _sign_pdf_task(
     input_pdf_path: str,
     output_pdf_path: str,
     p12_bytes: bytes,
-    password: str
+    password: str,
+    ltv: bool = False
 ):
     """
     Función síncrona para firmar el PDF que será ejecutada en un threadpool.
     Utiliza pyhanko para realizar la firma.
     """
-    # Crear archivo temporal para el certificado
+    # Cargar firmante desde memoria (cacheado por certificado + contraseña)
+    signer = get_signer(p12_bytes, password)
+    _write_signed_pdf(input_pdf_path, output_pdf_path, signer, ltv)
+
+
+def _signature_metadata(ltv: bool = False) -> "signers.PdfSignatureMetadata":
+    """
+    Metadatos de la firma. En modo LTV se incrustan la cadena de certificados
+    y los datos de revocación (DSS) para poder validar después sin red.
+    """
+    from pyhanko.sign import signers
+    from pyhanko.sign.fields import SigSeedSubFilter
+
+    if not ltv:
+        return signers.PdfSignatureMetadata(field_name='Signature1')
+    return signers.PdfSignatureMetadata(
+        field_name='Signature1',
+        subfilter=SigSeedSubFilter.PADES,
+        embed_validation_info=True,
+        validation_context=build_ltv_signing_context(),
+    )
+
+
+def _write_signed_pdf(
+    input_pdf_path: str,
+    output_pdf_path: str,
+    signer: "signers.Signer",
+    ltv: bool = False,
+    large_file: Optional[bool] = None
+):
+    """
+    Firma input_pdf_path con un firmante ya cargado y escribe el resultado.
     
-    # Usar un archivo temporal seguro que se cierra automáticamente
-    # pero persistente (delete=False) para que pyHanko pueda abrirlo por path
-    tmp_p12_path = None # Initialize to None
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".p12") as tmp_p12:
-            tmp_p12.write(p12_bytes)
-            tmp_p12_path = tmp_p12.name
+    Por encima de large_pdf_threshold_mb (o con large_file=True) se usa la ruta
+    para archivos grandes: ver _write_signed_large_pdf.
+    """
+    if large_file is None:
+        large_file = os.path.getsize(input_pdf_path) >= settings.large_pdf_threshold_mb * 1024 * 1024
+    if large_file:
+        _write_signed_large_pdf(input_pdf_path, output_pdf_path, signer, ltv)
+        return
 
-        # DEBUG: Inspeccionar qué es SigSeedSubFilter eliminados para limpieza
-        
-        # Cargar firmante usando el PATH del archivo temporal
-        signer = signers.SimpleSigner.load_pkcs12(
-            pfx_file=tmp_p12_path,
-            passphrase=password.encode() if password else None
-        )
-    except Exception as e:
-        # Manejo de error específico si la contraseña es incorrecta o el archivo está dañado
-        raise ValueError(f"Error al cargar certificado (posible contraseña incorrecta): {e}")
-    finally:
-        # Asegurar limpieza del archivo temporal
-        if tmp_p12_path and os.path.exists(tmp_p12_path):
-            try:
-                os.unlink(tmp_p12_path)
-            except Exception as e:
-                print(f"WARNING: No se pudo eliminar el archivo temporal {tmp_p12_path}: {e}")
+    from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
+    from pyhanko.sign import signers
 
     with open(input_pdf_path, 'rb') as inf:
         # strict=False es necesario para soportar PDFs generados por herramientas comunes (LibreOffice, etc)
@@ -91,49 +129,73 @@ def _sign_pdf_task(
         # Realizar la firma en un nuevo documento
         with open(output_pdf_path, 'wb') as outf:
             signers.sign_pdf(
-                w, signers.PdfSignatureMetadata(field_name='Signature1'),
+                w, _signature_metadata(ltv),
                 signer=signer,
                 output=outf,
             )
 
 
+def _write_signed_large_pdf(
+    input_pdf_path: str,
+    output_pdf_path: str,
+    signer: "signers.Signer",
+    ltv: bool = False
+):
+    """
+    Firma de PDFs muy grandes sin cargarlos en memoria.
+    
+    - El origen se lee mediante mmap (páginas bajo demanda del SO).
+    - La salida se abre en modo lectura/escritura ('w+b'): así pyHanko escribe
+      la actualización incremental directamente en el archivo en lugar de
+      acumular todo el documento en un BytesIO intermedio.
+    - El digest del ByteRange se calcula leyendo la salida en bloques de
+      signing_chunk_size bytes.
+    """
+    from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
+    from pyhanko.sign import signers
+
+    with open(input_pdf_path, 'rb') as inf, MmapReader(inf) as stream:
+        w = IncrementalPdfFileWriter(stream, strict=False)
+        with open(output_pdf_path, 'w+b') as outf:
+            pdf_signer = signers.PdfSigner(_signature_metadata(ltv), signer=signer)
+            pdf_signer.sign_pdf(w, output=outf, chunk_size=settings.signing_chunk_size)
+
+
 @router.post("/sign", response_model=VersionResponse)
 async def sign_document(
     document_id: int = Form(...),
     p12_file: UploadFile = File(...),
     password: str = Form(...),
+    ltv: bool = Form(False),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """
     Firma un documento existente usando un certificado P12/PFX.
     Crea una nueva versión del documento.
+    
+    Con ltv=true se incrustan la cadena y los datos de revocación (firma
+    PAdES con DSS) para que la validación posterior no necesite red.
     """
     # 1. Verificar Permisos (Mínimo Editor para crear nueva versión)
     # Se usa la dependencia verify_document_access implementada anteriormente
     await deps.verify_document_access(document_id, db, current_user, "editor")
 
-    # 2. Obtener la última versión del documento
+    # 2. Obtener el documento y su versión actual
     stmt = (
-        select(Document)
+        select(Document, Version)
+        .outerjoin(Version, Version.id == Document.latest_version_id)
         .where(Document.id == document_id)
-        .options(selectinload(Document.versions))
     )
     result = await db.execute(stmt)
-    document = result.scalar_one_or_none()
+    row = result.one_or_none()
 
-    if not document:
+    if not row:
         raise HTTPException(status_code=404, detail="Documento no encontrado")
 
-    # Buscar la versión marcada como latest
-    latest_version = next((v for v in document.versions if v.is_latest), None)
+    document, latest_version = row
     if not latest_version:
-        # Fallback: tomar la más reciente por fecha
-        versions_sorted = sorted(document.versions, key=lambda x: x.created_at, reverse=True)
-        if versions_sorted:
-            latest_version = versions_sorted[0]
-        else:
-             raise HTTPException(status_code=404, detail="El documento no tiene versiones para firmar")
+        raise HTTPException(status_code=404, detail="El documento no tiene versiones para firmar")
 
     source_path = Path(latest_version.file_path)
     if not source_path.exists():
@@ -149,13 +211,15 @@ async def sign_document(
 
     # 4. Ejecutar firma (CPU bound) en threadpool para no bloquear el loop
     try:
-        await run_in_threadpool(
-            _sign_pdf_task,
-            str(source_path),
-            str(output_path),
-            p12_bytes,
-            password
-        )
+        with memory_stage("sign"):
+            await run_in_threadpool(
+                _sign_pdf_task,
+                str(source_path),
+                str(output_path),
+                p12_bytes,
+                password,
+                ltv
+            )
     except ValueError as e:
         print(f"ERROR ValueError en pyHanko: {e}")
         # Capturar error de contraseña y devolver 400 Bad Request
@@ -168,39 +232,148 @@ async def sign_document(
         raise HTTPException(status_code=500, detail=f"Error al firmar PDF: {str(e)}")
 
     # 5. Crear nueva versión en DB
-    # Desmarcar anteriores como latest
-    await db.execute(
-        update(Version).where(Version.document_id == document_id).values(is_latest=False)
-    )
-
-    # Calcular nuevo número de versión
-    new_v_num = "v1.0-signed"
-    try:
-        v_parts = latest_version.version_number.replace('v', '').split('.')
-        major = int(v_parts[0])
-        minor = int(v_parts[1]) if len(v_parts) > 1 else 0
-        new_v_num = f"v{major}.{minor + 1}-signed"
-    except:
-        pass
-
-    file_size = output_path.stat().st_size
-
-    new_version = Version(
-        document_id=document_id,
-        version_number=new_v_num,
+    new_version = await add_version(
+        db,
+        document,
+        suffix="-signed",
         file_path=str(output_path),
-        file_size=file_size,
-        mime_type="application/pdf",
-        is_latest=True
+        file_size=output_path.stat().st_size
     )
-    
-    db.add(new_version)
     await db.commit()
-    await db.refresh(new_version)
 
     return new_version
 
 
+@router.post("/sign/batch", response_model=BatchSignResponse)
+async def sign_documents_batch(
+    document_ids: List[int] = Form(...),
+    p12_file: UploadFile = File(...),
+    password: str = Form(...),
+    ltv: bool = Form(False),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Firma muchos documentos con un mismo certificado P12/PFX.
+    
+    El certificado se carga una sola vez, los permisos de editor se verifican
+    en una consulta y las nuevas versiones firmadas se crean en una única
+    transacción. Devuelve el estado de cada documento por separado.
+    """
+    # Eliminar duplicados conservando el orden
+    document_ids = list(dict.fromkeys(document_ids))
+    if len(document_ids) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.bulk_max_items} documentos por solicitud"
+        )
+
+    # 1. Cargar el firmante una sola vez
+    p12_bytes = await p12_file.read()
+    try:
+        signer = await run_in_threadpool(get_signer, p12_bytes, password)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error validando certificado o contraseña: {str(e)}")
+
+    results = {}
+
+    def _fail(document_id: int, message: str):
+        results[document_id] = BatchSignItemResult(
+            document_id=document_id,
+            success=False,
+            message=message
+        )
+
+    # 2. Verificar permisos de editor de todos los documentos en una consulta
+    granted = await deps.verify_documents_access(document_ids, db, current_user, "editor")
+
+    # 3. Obtener cada documento con su versión actual
+    stmt = (
+        select(Document, Version)
+        .outerjoin(Version, Version.id == Document.latest_version_id)
+        .where(Document.id.in_(list(granted)))
+    )
+    result = await db.execute(stmt)
+    documents = {}
+    latest_by_doc = {}
+    for document, latest_version in result.all():
+        documents[document.id] = document
+        if latest_version:
+            latest_by_doc[document.id] = latest_version
+
+    pending = []  # (document_id, latest_version, output_path)
+    for document_id in document_ids:
+        if document_id not in granted:
+            _fail(document_id, "Se requiere permiso de editor para esta acción.")
+            continue
+        latest_version = latest_by_doc.get(document_id)
+        if not latest_version:
+            _fail(document_id, "El documento no tiene versiones para firmar")
+            continue
+        source_path = Path(latest_version.file_path)
+        if not source_path.exists():
+            _fail(document_id, "Archivo físico no encontrado")
+            continue
+        output_path = UPLOAD_DIR / f"{uuid.uuid4()}_signed{source_path.suffix}"
+        pending.append((document_id, latest_version, output_path))
+
+    # 4. Firmar en paralelo
+    outcomes = await gather_in_threadpool(
+        lambda job: _write_signed_pdf(job[0], job[1], signer, ltv),
+        [(latest_version.file_path, str(output_path)) for _, latest_version, output_path in pending],
+        settings.pdf_max_workers
+    )
+
+    signed = []
+    for (document_id, latest_version, output_path), outcome in zip(pending, outcomes):
+        if isinstance(outcome, Exception):
+            logger.exception("Error firmando el documento %s", document_id, exc_info=outcome)
+            if output_path.exists():
+                output_path.unlink()
+            _fail(document_id, f"Error al firmar PDF: {str(outcome)}")
+        else:
+            signed.append((document_id, latest_version, output_path))
+
+    # 5. Crear todas las versiones firmadas en una sola transacción
+    if signed:
+        new_versions = []
+        try:
+            for document_id, latest_version, output_path in signed:
+                new_version = await add_version(
+                    db,
+                    documents[document_id],
+                    suffix="-signed",
+                    file_path=str(output_path),
+                    file_size=output_path.stat().st_size
+                )
+                new_versions.append(new_version)
+
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            for _, _, output_path in signed:
+                if output_path.exists():
+                    output_path.unlink()
+            raise HTTPException(status_code=500, detail=f"Error al registrar versiones firmadas: {str(e)}")
+
+        for new_version in new_versions:
+            results[new_version.document_id] = BatchSignItemResult(
+                document_id=new_version.document_id,
+                success=True,
+                message="Documento firmado correctamente.",
+                version=VersionResponse.model_validate(new_version)
+            )
+
+    ordered = [results[document_id] for document_id in document_ids]
+    succeeded = sum(1 for r in ordered if r.success)
+    return BatchSignResponse(
+        total=len(ordered),
+        succeeded=succeeded,
+        failed=len(ordered) - succeeded,
+        results=ordered
+    )
+
+
 # def _validate_pdf_task(file_path: str) -> dict:
 #     """
 #     Valida las firmas de un PDF de forma síncrona.
@@ -292,113 +465,272 @@ async def sign_document(
 #         if temp_path.exists():
 #             temp_path.unlink()
 
-def _validate_pdf_task(file_path: str) -> dict:
+def _validate_signature(reader: "PdfFileReader", sig: "EmbeddedPdfSignature", index: int) -> dict:
     """
-    Valida las firmas de un PDF de forma síncrona.
+    Valida una firma concreta de un PDF ya leído, de forma síncrona.
     Maneja certificados autofirmados sin romper la ejecución.
+    
+    Cada firma se valida con su propio contexto de validación.
     """
+    from pyhanko.sign.validation import validate_pdf_signature
+    from pyhanko_certvalidator.errors import InvalidCertificateError, PathBuildingError
+
     result_data = {
+        "index": index,
+        "field_name": sig.field_name,
         "is_valid": False,
         "trusted": False,
         "signer_name": "Desconocido",
         "timestamp": None,
-        "details": ""
+        "coverage": None,
+        "ltv": False,
+        "details": "",
+        "cert_not_after": None
     }
+
+    # --- PASO A: Intentar extraer información visual (metadatos) ANTES de validar ---
+    # Esto asegura que si la validación falla (certificado malo), 
+    # al menos sabemos quién dice ser el firmante.
+    try:
+        # El certificado está dentro del objeto cms_signed_data
+        cert = sig.signer_cert
+        if cert:
+            # Intentamos sacar el Common Name (CN)
+            result_data["signer_name"] = cert.subject.human_friendly
+            result_data["cert_not_after"] = cert["tbs_certificate"]["validity"]["not_after"].native
+        
+        # Intentamos sacar la fecha de la firma (no la del timestamp server, sino la del PDF)
+        if sig.signer_reporting_time:
+            result_data["timestamp"] = sig.signer_reporting_time
+    except Exception as e:
+        print(f"Warning: No se pudieron leer metadatos previos a validación: {e}")
+
+    # --- PASO B: Contexto de Validación ---
+    # Si el documento trae DSS (firma LTV) se valida con sus propios datos, sin red;
+    # si no, con un contexto nuevo sobre las raíces de confianza precargadas
+    vc = build_dss_validation_context(reader)
+    if vc is not None:
+        result_data["ltv"] = True
+    else:
+        vc = build_validation_context()
     
+    # --- PASO C: Validar Criptográficamente ---
     try:
-        with open(file_path, 'rb') as f:
-            # Leer el PDF
-            r = PdfFileReader(f, strict=False)
-            
-            # 1. Verificar si hay firmas
-            if not r.embedded_signatures:
-                result_data["details"] = "No se encontraron firmas en el documento."
-                return result_data
-
-            # Tomamos la última firma
-            sig = r.embedded_signatures[-1]
-
-            # --- PASO A: Intentar extraer información visual (metadatos) ANTES de validar ---
-            # Esto asegura que si la validación falla (certificado malo), 
-            # al menos sabemos quién dice ser el firmante.
-            try:
-                # El certificado está dentro del objeto cms_signed_data
-                cert = sig.signer_cert
-                if cert:
-                    # Intentamos sacar el Common Name (CN)
-                    result_data["signer_name"] = cert.subject.human_friendly
-                
-                # Intentamos sacar la fecha de la firma (no la del timestamp server, sino la del PDF)
-                if sig.signer_reporting_time:
-                    result_data["timestamp"] = sig.signer_reporting_time
-            except Exception as e:
-                print(f"Warning: No se pudieron leer metadatos previos a validación: {e}")
-
-            # --- PASO B: Configurar el Contexto de Validación ---
-            # allow_fetching=True permite descargar CRLs/OCSP si es necesario (lento pero seguro)
-            # Para desarrollo, puedes poner trust_roots=[] para confiar en todo (PELIGROSO en prod)
-            vc = ValidationContext(
-                allow_fetching=False,          # False para velocidad, True para seguridad real
-                trust_roots=None,              # None = Usar tienda del sistema operativo
-                revocation_mode='soft-fail'    # No fallar si no hay internet para chequear revocación
-            )
-            
-            # --- PASO C: Validar Criptográficamente ---
-            try:
-                # Esto es lo que lanzaba el error antes
-                status = validate_pdf_signature(sig, vc)
-                
-                # Si llegamos aquí, la cadena de confianza se construyó (aunque puede tener warnings)
-                result_data["is_valid"] = status.intact and status.valid
-                result_data["trusted"] = status.trusted
-                
-                # Sobrescribir timestamp si hay uno verificado criptográficamente
-                if status.signing_time:
-                    result_data["timestamp"] = status.signing_time
-                
-                result_data["details"] = "Firma válida y verificada."
+        # Esto es lo que lanzaba el error antes
+        status = validate_pdf_signature(sig, vc)
+        
+        # Si llegamos aquí, la cadena de confianza se construyó (aunque puede tener warnings)
+        result_data["is_valid"] = status.intact and status.valid
+        result_data["trusted"] = status.trusted
+        if status.coverage is not None:
+            result_data["coverage"] = status.coverage.name
+        
+        # Sobrescribir timestamp si hay uno verificado criptográficamente
+        if status.signing_time:
+            result_data["timestamp"] = status.signing_time
+        
+        result_data["details"] = "Firma válida y verificada."
+
+    except (InvalidCertificateError, PathBuildingError) as e:
+        # AQUÍ CAPTURAMOS EL ERROR DE "SELF-SIGNED"
+        result_data["is_valid"] = False
+        result_data["trusted"] = False
+        result_data["details"] = f"Certificado no confiable o autofirmado: {str(e)}"
+        print(f"Validación fallida controlada: {e}")
+        
+    return result_data
+
+
+def _validate_signature_task(job: tuple) -> Optional[dict]:
+    """
+    Valida una firma concreta de un PDF de forma síncrona.
+    
+    Cada ejecución abre su propio lector sobre los bytes del PDF (el lector
+    de pyHanko no puede compartirse entre hilos), por lo que varias firmas
+    del mismo documento pueden validarse en paralelo.
+    
+    Args:
+        job: Tupla (pdf_bytes, índice de la firma, on_count). Si on_count no
+            es None, se le pasa el número de firmas nada más leer el PDF,
+            antes de validar.
+    
+    Returns:
+        El resultado de la firma, o None si el PDF no tiene esa firma
+    """
+    from pyhanko.pdf_utils.reader import PdfFileReader
 
-            except (InvalidCertificateError, PathBuildingError) as e:
-                # AQUÍ CAPTURAMOS EL ERROR DE "SELF-SIGNED"
-                result_data["is_valid"] = False
-                result_data["trusted"] = False
-                result_data["details"] = f"Certificado no confiable o autofirmado: {str(e)}"
-                print(f"Validación fallida controlada: {e}")
+    pdf_bytes, index, on_count = job
 
+    # Leer el PDF directamente desde memoria
+    r = PdfFileReader(BytesIO(pdf_bytes), strict=False)
+    embedded = r.embedded_signatures
+    if on_count is not None:
+        on_count(len(embedded))
+    if index >= len(embedded):
+        return None
+    return _validate_signature(r, embedded[index], index)
+
+
+async def _validate_pdf(pdf_bytes: bytes) -> dict:
+    """
+    Valida todas las firmas de un PDF, repartiéndolas entre workers en paralelo.
+    
+    Los campos de primer nivel (firmante, fecha) corresponden a la última
+    firma; is_valid y trusted solo son True si lo son todas las firmas.
+    
+    Además del resultado, devuelve en la clave "_cache" la información que
+    necesita la caché de validaciones (si es cacheable y hasta cuándo).
+    """
+    result_data = {
+        "is_valid": False,
+        "trusted": False,
+        "signer_name": "Desconocido",
+        "timestamp": None,
+        "details": "",
+        "signature_count": 0,
+        "signatures": [],
+        "_cache": {"cacheable": True, "cert_not_after": None}
+    }
+    
+    loop = asyncio.get_running_loop()
+    count_ready = loop.create_future()
+
+    def on_count(count: int) -> None:
+        loop.call_soon_threadsafe(count_ready.set_result, count)
+
+    try:
+        # 1. La primera firma empieza a validarse en cuanto se lee el PDF, y su
+        #    lector da el número de firmas (sin una pasada aparte para contarlas)
+        first = asyncio.ensure_future(
+            run_in_threadpool(_validate_signature_task, (pdf_bytes, 0, on_count))
+        )
+        await asyncio.wait({first, count_ready}, return_when=asyncio.FIRST_COMPLETED)
+        if first.done() and first.exception() is not None and not count_ready.done():
+            # El PDF no pudo leerse
+            raise first.exception()
+        count = await count_ready
+        
+        # 2. Validar el resto de firmas en paralelo, mientras sigue la primera
+        rest = await gather_in_threadpool(
+            _validate_signature_task,
+            [(pdf_bytes, index, None) for index in range(1, count)],
+            max(1, settings.pdf_max_workers - 1)
+        )
     except Exception as e:
         print(f"Error crítico leyendo el PDF o validando: {e}")
         result_data["details"] = f"Error procesando archivo: {str(e)}"
+        # Un error inesperado puede ser transitorio: no se cachea
+        result_data["_cache"]["cacheable"] = False
+        return result_data
+    
+    try:
+        first_outcome = await first
+    except Exception as e:
+        first_outcome = e
+    
+    if not count:
+        result_data["details"] = "No se encontraron firmas en el documento."
+        return result_data
+    outcomes = [first_outcome, *rest]
+    
+    signatures = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Error crítico validando la firma {index}: {outcome}")
+            result_data["_cache"]["cacheable"] = False
+            outcome = {
+                "index": index,
+                "is_valid": False,
+                "trusted": False,
+                "details": f"Error procesando firma: {str(outcome)}"
+            }
         
+        # La caché no debe sobrevivir al primer certificado que expire
+        not_after = outcome.pop("cert_not_after", None)
+        current = result_data["_cache"]["cert_not_after"]
+        if not_after and (current is None or not_after < current):
+            result_data["_cache"]["cert_not_after"] = not_after
+        signatures.append(outcome)
+    
+    last = signatures[-1]
+    result_data.update(
+        is_valid=all(sig["is_valid"] for sig in signatures),
+        trusted=all(sig["trusted"] for sig in signatures),
+        signer_name=last.get("signer_name") or "Desconocido",
+        timestamp=last.get("timestamp"),
+        signature_count=count,
+        signatures=signatures,
+    )
+    valid_count = sum(1 for sig in signatures if sig["is_valid"])
+    result_data["details"] = f"{valid_count} de {count} firma(s) válida(s)."
     return result_data
 
+
+async def _validate_pdf_cached(pdf_bytes: bytes) -> dict:
+    """
+    Valida un PDF consultando antes la caché por hash de contenido.
+    """
+    digest = await run_in_threadpool(content_digest, pdf_bytes)
+    cached = get_cached_validation(digest)
+    if cached is not None:
+        return cached
+
+    with memory_stage("validate"):
+        result = await _validate_pdf(pdf_bytes)
+    cache_info = result.pop("_cache")
+    if cache_info["cacheable"]:
+        store_validation(digest, result, cache_info["cert_not_after"])
+    return result
+
+
 @router.post("/validate", response_model=SignatureValidationResponse)
 async def validate_signature(
     file: UploadFile = File(...)
 ):
     """
     Valida las firmas electrónicas de un archivo PDF subido.
-    Retorna información sobre la validez, firmante y fecha.
-    """
-    temp_filename = f"validate_{uuid.uuid4()}.pdf"
-    temp_path = UPLOAD_DIR / temp_filename
+    Retorna información sobre la validez, firmante y fecha de cada firma.
     
+    Los resultados se cachean por el SHA-256 del archivo, por lo que validar
+    de nuevo un documento ya visto no vuelve a procesar la firma.
+    """
     try:
-        # Guardado asíncrono eficiente (chunks) en lugar de shutil directo si el archivo es grande,
-        # pero shutil está bien para archivos normales.
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Ejecutar validación en threadpool (evita bloquear el servidor)
-        result = await run_in_threadpool(_validate_pdf_task, str(temp_path))
-        
+        pdf_bytes = await file.read()
+        result = await _validate_pdf_cached(pdf_bytes)
         return SignatureValidationResponse(**result)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error validando PDF: {str(e)}")
-    finally:
-        # Limpieza robusta: usar unlink(missing_ok=True) en Python 3.8+
-        try:
-            if temp_path.exists():
-                temp_path.unlink()
-        except Exception:
-            pass
\ No newline at end of file
+
+
+@router.get("/versions/{version_id}/validate", response_model=SignatureValidationResponse)
+async def validate_version_signature(
+    version_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Valida las firmas de una versión ya almacenada, sin necesidad de subirla.
+    
+    Permisos requeridos: Viewer o superior
+    """
+    stmt = select(Version).where(Version.id == version_id)
+    result = await db.execute(stmt)
+    version = result.scalar_one_or_none()
+
+    if not version:
+        raise HTTPException(status_code=404, detail="Versión no encontrada")
+
+    await deps.verify_document_access(version.document_id, db, current_user, "viewer")
+
+    file_path = Path(version.file_path)
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail="El archivo físico no existe en el servidor")
+
+    try:
+        pdf_bytes = await run_in_threadpool(file_path.read_bytes)
+        result = await _validate_pdf_cached(pdf_bytes)
+        return SignatureValidationResponse(**result)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error validando PDF: {str(e)}")
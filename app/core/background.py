@@ -0,0 +1,64 @@
+"""
+Base para workers en segundo plano que procesan lotes periódicamente
+(bandeja de salida de correos, purga de documentos borrados).
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWorker:
+    """
+    Ejecuta run_once() en bucle: si procesó un lote completo repite enseguida;
+    si no, espera poll_interval segundos o hasta que alguien llame a wake().
+
+    Args:
+        batch_size: Tamaño de lote que indica que probablemente queda trabajo
+        poll_interval: Segundos entre sondeos cuando no hay trabajo
+    """
+
+    name = "worker"
+
+    def __init__(self, batch_size: int, poll_interval: float):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def run_once(self) -> int:
+        """Procesa un lote. Devuelve el número de elementos procesados."""
+        raise NotImplementedError
+
+    def wake(self) -> None:
+        """Despierta al worker sin esperar al siguiente sondeo."""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                processed = await self.run_once()
+            except Exception:
+                logger.exception("Error en el %s", self.name)
+                processed = 0
+            if processed >= self.batch_size:
+                continue # Probablemente queda más trabajo
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        if self._task:
+            await self._task
+            self._task = None
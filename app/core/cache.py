@@ -0,0 +1,89 @@
+"""
+Caché en memoria con expiración (TTL) y tamaño máximo.
+Segura para usarse desde el event loop y desde el threadpool.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Caché LRU con expiración por entrada.
+    
+    Args:
+        maxsize: Número máximo de entradas; al superarlo se expulsa la menos usada
+        ttl: Tiempo de vida por defecto de cada entrada, en segundos
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Devuelve el valor si existe y no ha expirado."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Guarda un valor; ttl sobrescribe el tiempo de vida por defecto."""
+        lifetime = self.ttl if ttl is None else ttl
+        if lifetime <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + lifetime, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> None:
+        """Invalida una entrada (no falla si no existe)."""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Invalida todas las entradas cuya clave cumpla el predicado.
+        
+        Returns:
+            Número de entradas eliminadas
+        """
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    def purge_expired(self) -> int:
+        """
+        Elimina de memoria las entradas expiradas sin esperar a que se consulten.
+        
+        Returns:
+            Número de entradas eliminadas
+        """
+        now = time.monotonic()
+        with self._lock:
+            keys = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    def clear(self) -> None:
+        """Vacía la caché."""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,39 @@
+"""
+Utilidades de concurrencia para ejecutar trabajo bloqueante (PDFs, criptografía)
+fuera del event loop con un número acotado de workers.
+"""
+
+import asyncio
+from typing import Any, Callable, Iterable, List, TypeVar, Union
+
+from fastapi.concurrency import run_in_threadpool
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def gather_in_threadpool(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int
+) -> List[Union[R, Exception]]:
+    """
+    Ejecuta func(item) para cada elemento en el threadpool, con como mucho
+    max_workers ejecuciones simultáneas.
+
+    Las excepciones no se propagan: se devuelven en la posición del elemento
+    que falló, para que el llamador pueda construir resultados por elemento.
+
+    Returns:
+        Lista de resultados (o excepciones) en el mismo orden que items
+    """
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def _run(item: T) -> Any:
+        async with semaphore:
+            try:
+                return await run_in_threadpool(func, item)
+            except Exception as e:
+                return e
+
+    return await asyncio.gather(*(_run(item) for item in items))
@@ -22,11 +22,26 @@ class Settings(BaseSettings):
     # Base de datos
     database_url: str = "sqlite+aiosqlite:///./gestion_documental.db"
     db_echo: bool = False  # Log de sentencias SQL (útil en debug)
+    # Crear las tablas con create_all al arrancar (solo desarrollo y pruebas;
+    # el esquema se gestiona con `python manage.py migrate`)
+    db_create_all: bool = False
+    
+    # SQLite (PRAGMAs por conexión)
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size_mb: int = 256
+    
+    # PostgreSQL (asyncpg): pool y caché de sentencias
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30  # Segundos esperando una conexión libre
+    db_pool_recycle: int = 1800  # Segundos antes de reciclar una conexión
+    db_statement_cache_size: int = 100
     
     # Seguridad - JWT
     secret_key: str = "tu-clave-secreta-super-segura-cambiar-en-produccion-32-caracteres-minimo"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30 # 30 minutos
+    refresh_token_expire_days: int = 14 # Rota en cada uso; se revoca al cerrar sesión
     
     frontend_base_url: str = "http://localhost:8000"
     password_reset_token_expire_minutes: int = 30
@@ -40,6 +55,51 @@ class Settings(BaseSettings):
     # Directorio de subidas
     upload_dir: str = "uploads"
     
+    # Procesamiento por lotes de PDFs (anotaciones, firmas)
+    pdf_max_workers: int = 4  # Workers en paralelo para trabajo CPU-bound
+    bulk_max_items: int = 500  # Máximo de elementos por solicitud masiva
+    
+    # Caché de firmantes PKCS#12 ya descifrados
+    signer_cache_ttl_seconds: int = 300
+    signer_cache_max_entries: int = 32
+    
+    # Validación de firmas
+    signature_trust_roots_dir: Optional[str] = None  # None = almacén del sistema
+    signature_allow_fetching: bool = False  # True descarga CRLs/OCSP (lento)
+    signature_revocation_mode: str = "soft-fail"
+    validation_cache_ttl_seconds: int = 3600
+    validation_cache_max_entries: int = 1024
+    
+    # Caché de permisos (usuario, documento). TTL corto: con varios procesos
+    # la invalidación solo es inmediata en el proceso que hace el cambio.
+    permission_cache_ttl_seconds: int = 30
+    permission_cache_max_entries: int = 10000
+    
+    # Caché de usuarios autenticados (se invalida al cambiar estado, rol o contraseña)
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_entries: int = 10000
+    # Incluir en el JWT datos inmutables del usuario (email) además del id en 'sub'
+    jwt_embed_claims: bool = True
+    
+    # Argon2: parámetros (None = valores por defecto de passlib); se pueden
+    # calibrar con `python manage.py calibrate-argon2 <ms>`
+    argon2_time_cost: Optional[int] = None
+    argon2_memory_cost: Optional[int] = None  # KiB
+    argon2_parallelism: Optional[int] = None
+    # Executor dedicado para hash/verificación de contraseñas
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64  # Operaciones en curso o en cola como máximo
+    
+    # Firma LTV (validación a largo plazo): datos de revocación locales
+    # Directorio con certificados intermedios (.pem/.crt/.cer/.der),
+    # CRLs (.crl) y respuestas OCSP (.ocsp) en DER
+    revocation_data_dir: Optional[str] = None
+    ltv_allow_fetching: bool = False  # True consulta los OCSP/CRL del certificado (p.ej. un responder local)
+    
+    # Firma de archivos grandes (mmap + escritura directa a disco)
+    large_pdf_threshold_mb: int = 50
+    signing_chunk_size: int = 1024 * 1024  # Bloque para calcular el digest del ByteRange
+    
     # Configuración de correo electrónico (FastAPI-Mail)
     mail_username: str = ""
     mail_password: str = ""
@@ -51,6 +111,42 @@ class Settings(BaseSettings):
     mail_ssl_tls: bool = False
     mail_use_credentials: bool = True
     mail_validate_certs: bool = True
+    mail_timeout_seconds: int = 30
+    
+    # Bandeja de salida (outbox) y worker de envío
+    mail_outbox_enabled: bool = True  # Arrancar el worker con la aplicación
+    mail_pool_size: int = 2  # Conexiones SMTP reutilizadas por el worker
+    mail_batch_size: int = 50  # Correos reclamados por ciclo
+    mail_poll_interval_seconds: float = 5.0
+    mail_max_attempts: int = 5
+    mail_retry_base_seconds: int = 30  # Backoff: base * 2^(intento-1)
+    mail_retry_max_seconds: int = 3600
+    
+    # Purga en segundo plano de documentos borrados
+    purge_enabled: bool = True
+    purge_batch_size: int = 20  # Documentos por ciclo
+    purge_interval_seconds: float = 30.0
+    purge_files_per_second: float = 50.0  # Límite de borrados de archivo (0 = sin límite)
+    purge_retry_base_seconds: int = 60  # Backoff de documentos que no se pudieron purgar
+    purge_retry_max_seconds: int = 6 * 3600
+    
+    # Envío de documentos por correo
+    mail_max_recipients: int = 100  # Destinatarios por solicitud
+    mail_attachment_max_mb: int = 10  # Por encima se envía un enlace en lugar del adjunto
+    download_link_expire_hours: int = 72
+    
+    # Observabilidad
+    metrics_enabled: bool = True  # Expone GET /metrics (formato Prometheus)
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_seconds: float = 0.5
+    loop_block_threshold_ms: int = 100  # En debug se registra la pila del código que bloquea
+    profiling_enabled: bool = True  # Cabecera X-Profile (solo administradores)
+    profile_interval_ms: float = 5.0  # Intervalo de muestreo del perfilador
+    profile_dir: str = "profiles"
+    memory_profiling: bool = False  # tracemalloc por solicitud y etapa (ralentiza; solo para diagnóstico)
+    memory_profile_frames: int = 10  # Profundidad de pila guardada por asignación
+    memory_profile_top_sites: int = 10  # Sitios de asignación por etapa (0 = sin snapshots)
+    memory_profile_endpoint_top_sites: int = 0  # Ídem por solicitud: un snapshot por solicitud es caro
     
     model_config = {
         "env_file": ".env",
@@ -0,0 +1,123 @@
+"""
+Monitor del retraso (lag) del event loop.
+
+Una tarea duerme `interval` segundos en bucle y mide cuánto tarda de más en
+despertar: ese retraso es el tiempo que el loop estuvo ocupado con código
+que no cedía el control (E/S síncrona, PyMuPDF, Argon2...). Se exporta en
+app.core.metrics.
+
+En modo debug, un hilo vigilante comprueba además si la tarea lleva más de
+`block_threshold` segundos sin despertar y, en ese caso, registra la pila
+actual del hilo del loop: la del paso de corrutina que lo está bloqueando.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+metrics.describe("app_event_loop_lag_seconds", "Último retraso medido del event loop")
+metrics.describe("app_event_loop_lag", "Retraso del event loop por muestra")
+metrics.describe("app_event_loop_stalls_total", "Muestras con el loop bloqueado más del umbral")
+
+
+class LoopLagMonitor:
+    """
+    Args:
+        interval: Segundos entre muestras
+        block_threshold: Retraso a partir del cual se considera el loop bloqueado
+        capture_stacks: Registrar la pila del código que bloquea (hilo vigilante)
+    """
+
+    def __init__(self, interval: float, block_threshold: float, capture_stacks: bool = False):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.capture_stacks = capture_stacks
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        # Momento (perf_counter) en que la tarea debería despertar
+        self._expected_wake = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            self._expected_wake = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - self._expected_wake)
+            metrics.set_gauge("app_event_loop_lag_seconds", lag)
+            metrics.observe("app_event_loop_lag", lag)
+            if lag >= self.block_threshold:
+                metrics.inc("app_event_loop_stalls_total")
+                logger.warning("Event loop bloqueado %.0f ms", lag * 1000)
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stopped.wait(self.block_threshold / 2):
+            expected = self._expected_wake
+            blocked = time.perf_counter() - expected
+            if blocked < self.block_threshold or reported == expected:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            reported = expected  # Una sola traza por bloqueo
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(
+                "Event loop bloqueado más de %.0f ms; pila actual:\n%s",
+                blocked * 1000, stack,
+            )
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._expected_wake = time.perf_counter() + self.interval
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._run())
+        if self.capture_stacks:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog:
+            self._watchdog.join()
+            self._watchdog = None
+
+
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def start_loop_monitor() -> LoopLagMonitor:
+    """Arranca el monitor del proceso (desde el lifespan de la aplicación)."""
+    global _monitor
+    _monitor = LoopLagMonitor(
+        interval=settings.loop_monitor_interval_seconds,
+        block_threshold=settings.loop_block_threshold_ms / 1000,
+        capture_stacks=settings.debug,
+    )
+    _monitor.start()
+    return _monitor
+
+
+async def stop_loop_monitor() -> None:
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
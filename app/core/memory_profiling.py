@@ -0,0 +1,194 @@
+"""
+Perfilado de memoria con tracemalloc (opcional, settings.memory_profiling).
+
+Con el modo activo se mide cada solicitud (por plantilla de ruta) y cada
+etapa de los pipelines marcada con memory_stage(): subida, conversión,
+anotación, firma y validación. Por cada una se guarda:
+- el pico de memoria asignada por Python durante la ventana, por encima de
+  la memoria en uso al empezar (incluye lo que otras solicitudes asignaran a
+  la vez: con concurrencia baja el valor es representativo),
+- los sitios (archivo:línea) que más memoria retenían al terminar, de la
+  ventana con mayor pico (solo etapas por defecto; ver más abajo).
+
+Los sitios salen de comparar dos snapshots de tracemalloc, que son caros:
+se toman en un hilo aparte y no en el event loop, solo para las etapas
+(memory_profile_top_sites; las solicitudes tienen su propio límite,
+memory_profile_endpoint_top_sites, 0 por defecto) y la comparación final
+solo se hace cuando la ventana marca un nuevo máximo. El snapshot inicial
+se toma mientras la etapa avanza y lo que ocupa puede sumarse al pico de
+las ventanas abiertas: con memory_profile_top_sites=0 los picos son más
+limpios.
+
+Se exporta en app.core.metrics (app_memory_peak_bytes) y en
+GET /api/v1/admin/memory. tracemalloc ralentiza la asignación de memoria de
+forma notable: no dejarlo activo en producción más que para diagnosticar.
+La memoria nativa de PyMuPDF (MuPDF en C) no pasa por tracemalloc; para esa
+parte está benchmarks/bench_memory.py, que mide el RSS.
+"""
+
+import threading
+import tracemalloc
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import metrics
+
+settings = get_settings()
+
+metrics.describe("app_memory_peak_bytes", "Pico de memoria Python por solicitud o etapa (tracemalloc)")
+
+_lock = threading.Lock()
+_windows: List["MemoryWindow"] = []
+_results: Dict[str, dict] = {}
+_snapshot_executor: Optional[ThreadPoolExecutor] = None
+
+
+class MemoryWindow:
+    """Ventana de medición abierta; `name` puede fijarse antes de cerrarla."""
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.start = 0
+        self.peak = 0
+        self.snapshot: Optional["Future[tracemalloc.Snapshot]"] = None
+
+
+def is_active() -> bool:
+    return tracemalloc.is_tracing()
+
+
+def start_memory_profiling() -> None:
+    """Activa tracemalloc (desde el lifespan de la aplicación)."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(settings.memory_profile_frames)
+
+
+def stop_memory_profiling() -> None:
+    global _snapshot_executor
+    with _lock:
+        executor, _snapshot_executor = _snapshot_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def _executor() -> ThreadPoolExecutor:
+    """Hilo de los snapshots (se crea al primer uso, también tras parar)."""
+    global _snapshot_executor
+    with _lock:
+        if _snapshot_executor is None:
+            _snapshot_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tracemalloc")
+        return _snapshot_executor
+
+
+def _top_sites_limit(kind: str) -> int:
+    if kind == "stage":
+        return settings.memory_profile_top_sites
+    return settings.memory_profile_endpoint_top_sites
+
+
+def _fold_peak() -> None:
+    """
+    Lleva el pico global a las ventanas abiertas y lo reinicia. Se llama con
+    _lock tomado, así que ninguna ventana pierde el pico de otra al reiniciarlo.
+    """
+    _, peak = tracemalloc.get_traced_memory()
+    for window in _windows:
+        window.peak = max(window.peak, peak)
+    tracemalloc.reset_peak()
+
+
+def _store_top_sites(key: str, start: "Future[tracemalloc.Snapshot]", peak: int, limit: int) -> None:
+    """
+    Compara el snapshot inicial con uno nuevo y guarda los sitios en la
+    entrada, si su máximo sigue siendo el de esta ventana. Se ejecuta en el
+    hilo de snapshots.
+    """
+    try:
+        end = tracemalloc.take_snapshot()
+        stats = end.compare_to(start.result(), "lineno")
+    except Exception:
+        # tracemalloc se detuvo entretanto
+        return
+    sites = [
+        {"site": str(stat.traceback), "size_bytes": stat.size_diff, "count": stat.count_diff}
+        for stat in stats[:limit]
+        if stat.size_diff > 0
+    ]
+    with _lock:
+        entry = _results.get(key)
+        if entry is not None and entry["max_peak_bytes"] == peak:
+            entry["top_sites"] = sites
+
+
+@contextmanager
+def track_memory(kind: str, name: str) -> Iterator[Optional[MemoryWindow]]:
+    """
+    Mide el pico de memoria del bloque. No hace nada si el modo no está activo.
+
+    Args:
+        kind: "endpoint" o "stage"
+        name: Ruta o nombre de la etapa
+    """
+    if not tracemalloc.is_tracing():
+        yield None
+        return
+
+    window = MemoryWindow(kind, name)
+    limit = _top_sites_limit(kind)
+    if limit:
+        window.snapshot = _executor().submit(tracemalloc.take_snapshot)
+    with _lock:
+        _fold_peak()
+        window.start = tracemalloc.get_traced_memory()[0]
+        _windows.append(window)
+    try:
+        yield window
+    finally:
+        with _lock:
+            _fold_peak()
+            _windows.remove(window)
+        peak = max(0, window.peak - window.start)
+        if _record(window, peak) and window.snapshot is not None:
+            _executor().submit(_store_top_sites, f"{window.kind}:{window.name}", window.snapshot, peak, limit)
+
+
+def memory_stage(name: str):
+    """Marca una etapa de un pipeline (subida, conversión, firma...)."""
+    return track_memory("stage", name)
+
+
+def _record(window: MemoryWindow, peak: int) -> bool:
+    """Acumula el resultado; True si es un nuevo máximo de su entrada."""
+    metrics.observe("app_memory_peak_bytes", peak, {"kind": window.kind, "name": window.name})
+    key = f"{window.kind}:{window.name}"
+    with _lock:
+        entry = _results.setdefault(
+            key, {"kind": window.kind, "name": window.name, "count": 0, "max_peak_bytes": 0, "last_peak_bytes": 0}
+        )
+        entry["count"] += 1
+        entry["last_peak_bytes"] = peak
+        if peak < entry["max_peak_bytes"]:
+            return False
+        entry["max_peak_bytes"] = peak
+        # Se rellenan en el hilo de snapshots
+        entry["top_sites"] = []
+        return True
+
+
+def memory_report() -> dict:
+    """Estado actual y resultados por solicitud y etapa, de mayor a menor pico."""
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    with _lock:
+        entries = sorted((dict(e) for e in _results.values()), key=lambda e: e["max_peak_bytes"], reverse=True)
+    return {"enabled": tracing, "traced_bytes": current, "traced_peak_bytes": peak, "entries": entries}
+
+
+def reset_memory_report() -> None:
+    with _lock:
+        _results.clear()
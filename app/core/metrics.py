@@ -0,0 +1,111 @@
+"""
+Métricas de la aplicación en memoria, expuestas en formato de texto de
+Prometheus en GET /metrics (sin dependencias externas).
+
+Cada proceso (worker de uvicorn) tiene su propio registro.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+class MetricsRegistry:
+    """
+    Registro de contadores, gauges y resúmenes (count/sum/max).
+    Seguro para usarse desde el event loop y desde el threadpool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._summaries: Dict[str, Dict[Labels, list]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Registra el texto de ayuda (# HELP) de una métrica."""
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, value: float = 1.0) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _labels(labels)
+            series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        """Añade una observación a un resumen (número, suma y máximo)."""
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            entry = series.setdefault(_labels(labels), [0, 0.0, value])
+            entry[0] += 1
+            entry[1] += value
+            entry[2] = max(entry[2], value)
+
+    def snapshot(self) -> Dict[str, Dict[Labels, object]]:
+        """Copia de todos los valores (para tests y endpoints de administración)."""
+        with self._lock:
+            data: Dict[str, Dict[Labels, object]] = {}
+            for store in (self._counters, self._gauges):
+                for name, series in store.items():
+                    data[name] = dict(series)
+            for name, series in self._summaries.items():
+                data[name] = {key: {"count": c, "sum": s, "max": m} for key, (c, s, m) in series.items()}
+            return data
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+
+    def render_prometheus(self) -> str:
+        """Serializa el registro en el formato de texto de Prometheus."""
+        lines = []
+
+        def header(name: str, kind: str, help_text: Optional[str] = None) -> None:
+            help_text = help_text or self._help.get(name)
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def fmt(labels: Labels) -> str:
+            if not labels:
+                return ""
+            inner = ",".join(
+                f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                for k, v in labels
+            )
+            return "{" + inner + "}"
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                header(name, "counter")
+                lines += [f"{name}{fmt(k)} {v}" for k, v in series.items()]
+            for name, series in sorted(self._gauges.items()):
+                header(name, "gauge")
+                lines += [f"{name}{fmt(k)} {v}" for k, v in series.items()]
+            for name, series in sorted(self._summaries.items()):
+                header(name, "summary")
+                for key, (count, total, _) in series.items():
+                    lines.append(f"{name}_count{fmt(key)} {count}")
+                    lines.append(f"{name}_sum{fmt(key)} {total}")
+                # Un resumen solo admite _count, _sum y cuantiles: el máximo
+                # se publica como un gauge aparte
+                max_name = f"{name}_max_value"
+                help_text = f"{self._help[name]} (máximo observado)" if name in self._help else None
+                header(max_name, "gauge", help_text)
+                lines += [f"{max_name}{fmt(k)} {maximum}" for k, (_, _, maximum) in series.items()]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
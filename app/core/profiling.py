@@ -0,0 +1,116 @@
+"""
+Perfilador por muestreo para perfilar solicitudes concretas bajo demanda.
+
+Un hilo toma muestras periódicas de la pila de todos los hilos del proceso
+(el del event loop y los del threadpool, donde corren PyMuPDF, pyHanko o
+LibreOffice) y acumula las pilas en formato "folded":
+
+    hilo;modulo:funcion:linea;... <muestras>
+
+que es la entrada de flamegraph.pl, speedscope o inferno. Al muestrear todo
+el proceso, el perfil incluye también lo que otras solicitudes ejecutaran a
+la vez; en un servidor poco cargado es despreciable.
+"""
+
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+PROFILE_SUFFIX = ".folded"
+_PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+
+class SamplingProfiler:
+    """
+    Uso:
+        with SamplingProfiler(interval=0.005) as profiler:
+            ...
+        profiler.folded()
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def folded(self) -> str:
+        """Pilas en formato folded, de más a menos muestras."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _profile_dir() -> Path:
+    path = Path(settings.profile_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def new_profile_id() -> str:
+    return f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def save_profile(profiler: SamplingProfiler, profile_id: str, header: str = "") -> None:
+    """
+    Guarda el perfil en settings.profile_dir.
+    `header` se escribe como comentario al principio (método, ruta, duración).
+    """
+    content = (f"# {header}\n" if header else "") + profiler.folded()
+    (_profile_dir() / f"{profile_id}{PROFILE_SUFFIX}").write_text(content, encoding="utf-8")
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    """Ruta del perfil, o None si el identificador no es válido o no existe."""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    path = _profile_dir() / f"{profile_id}{PROFILE_SUFFIX}"
+    return path if path.exists() else None
+
+
+def list_profiles() -> List[str]:
+    """Identificadores de los perfiles guardados, del más reciente al más antiguo."""
+    return sorted((p.stem for p in _profile_dir().glob(f"*{PROFILE_SUFFIX}")), reverse=True)
@@ -0,0 +1,60 @@
+"""
+Middleware de métricas por solicitud.
+
+Para cada solicitud HTTP registra en app.core.metrics la duración y el
+número y tiempo de las consultas SQL, etiquetados por la plantilla de la
+ruta (p.ej. /api/v1/files/{document_id}) para no crear una serie por id.
+Con settings.debug, además, devuelve las cabeceras X-DB-Query-Count y
+X-DB-Query-Time-Ms. Con el perfilado de memoria activo
+(app.core.memory_profiling) mide también el pico de memoria de la solicitud.
+"""
+
+import time
+
+from fastapi import Request
+from starlette.routing import Match
+
+from app.core.config import get_settings
+from app.core.memory_profiling import track_memory
+from app.core.metrics import metrics
+from app.db.instrumentation import count_queries
+
+settings = get_settings()
+
+metrics.describe("app_requests_total", "Solicitudes HTTP atendidas")
+metrics.describe("app_request_seconds", "Duración de las solicitudes HTTP")
+metrics.describe("app_db_queries_per_request", "Consultas SQL por solicitud")
+metrics.describe("app_db_query_seconds_per_request", "Tiempo en consultas SQL por solicitud")
+
+
+def route_label(request: Request) -> str:
+    """Plantilla de la ruta que atendió la solicitud ('unmatched' si ninguna)."""
+    route = request.scope.get("route")
+    if route is None:
+        for candidate in request.app.router.routes:
+            match, _ = candidate.matches(request.scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def request_metrics_middleware(request: Request, call_next):
+    start = time.perf_counter()
+    with count_queries() as queries, track_memory("endpoint", request.method) as memory:
+        response = await call_next(request)
+        route = route_label(request)
+        if memory is not None:
+            memory.name = f"{request.method} {route}"
+    elapsed = time.perf_counter() - start
+
+    labels = {"method": request.method, "route": route}
+    metrics.inc("app_requests_total", {**labels, "status": str(response.status_code)})
+    metrics.observe("app_request_seconds", elapsed, labels)
+    metrics.observe("app_db_queries_per_request", queries.count, labels)
+    metrics.observe("app_db_query_seconds_per_request", queries.seconds, labels)
+
+    if settings.debug:
+        response.headers["X-DB-Query-Count"] = str(queries.count)
+        response.headers["X-DB-Query-Time-Ms"] = f"{queries.seconds * 1000:.1f}"
+    return response
@@ -3,18 +3,82 @@ Funciones de seguridad: hash de contraseñas y manejo de JWT.
 Actualizado para compatibilidad con Argon2 y Python 3.13.
 """
 
+import asyncio
+import statistics
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from passlib.context import CryptContext
+from passlib.hash import argon2
 from jose import JWTError, jwt
 
 from app.core.config import get_settings
 
+settings = get_settings()
+
+
+def _argon2_options() -> Dict[str, int]:
+    """Parámetros de Argon2 configurados (solo los definidos)."""
+    options = {
+        "time_cost": settings.argon2_time_cost,
+        "memory_cost": settings.argon2_memory_cost,
+        "parallelism": settings.argon2_parallelism,
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def _build_pwd_context() -> CryptContext:
+    """
+    Contexto de passlib con los parámetros de Argon2 configurados.
+    
+    passlib marca para rehash los hashes con otro memory_cost o parallelism,
+    pero no los de menor time_cost salvo que se fije min_rounds; por eso el
+    time_cost configurado también es el mínimo aceptado.
+    """
+    options = {f"argon2__{key}": value for key, value in _argon2_options().items()}
+    if settings.argon2_time_cost is not None:
+        options["argon2__min_rounds"] = settings.argon2_time_cost
+    return CryptContext(schemes=["argon2"], deprecated="auto", **options)
+
+
 # --- CORRECCIÓN AQUÍ ---
 # Cambiamos "bcrypt" por "argon2" para evitar el ValueError en Python 3.13
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Los hashes con parámetros distintos a los configurados se marcan para
+# rehash (ver verify_and_update_password).
+pwd_context = _build_pwd_context()
+
+# Executor dedicado: Argon2 consume CPU y memoria a propósito; con sus
+# propios workers, una ráfaga de logins no ocupa el threadpool que usan
+# el resto de endpoints. Se crea al primer uso (y de nuevo si se cerró con
+# shutdown_password_executor); el semáforo que limita las tareas
+# pendientes es uno por event loop, porque un asyncio.Semaphore queda
+# ligado al loop en el que se usa por primera vez.
+_password_executor: Optional[ThreadPoolExecutor] = None
+_password_executor_lock = threading.Lock()
+_password_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
 
-settings = get_settings()
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    with _password_executor_lock:
+        if _password_executor is None:
+            _password_executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.password_hash_workers),
+                thread_name_prefix="argon2"
+            )
+        return _password_executor
+
+
+def _get_password_slots(loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+    slots = _password_slots.get(loop)
+    if slots is None:
+        slots = _password_slots[loop] = asyncio.Semaphore(max(1, settings.password_hash_max_pending))
+    return slots
 
 
 def hash_password(password: str) -> str:
@@ -44,12 +108,106 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def _run_password_task(func, *args):
+    loop = asyncio.get_running_loop()
+    async with _get_password_slots(loop):
+        return await loop.run_in_executor(_get_password_executor(), func, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Versión asíncrona de hash_password: se ejecuta en el executor dedicado.
+    """
+    return await _run_password_task(hash_password, password)
+
+
+async def verify_and_update_password(
+    plain_password: str,
+    hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica una contraseña en el executor dedicado.
+    
+    Returns:
+        (es_correcta, nuevo_hash). nuevo_hash no es None cuando la contraseña
+        es correcta pero el hash usa parámetros distintos a los configurados;
+        el llamador debe guardarlo.
+    """
+    return await _run_password_task(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def shutdown_password_executor() -> None:
+    """
+    Detiene el executor de contraseñas (al cerrar la aplicación). El
+    siguiente hash crea uno nuevo, así que la aplicación puede volver a
+    arrancar en el mismo proceso (p.ej. varios TestClient seguidos).
+    """
+    global _password_executor
+    with _password_executor_lock:
+        executor, _password_executor = _password_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def calibrate_argon2(
+    target_ms: float,
+    memory_cost: int = 65536,
+    parallelism: int = 2,
+    max_time_cost: int = 20,
+    samples: int = 3
+) -> Dict[str, Any]:
+    """
+    Busca parámetros de Argon2 cuyo hash tarde aproximadamente target_ms en
+    esta máquina: sube time_cost con la memoria fija y, si ya con
+    time_cost=1 se pasa del objetivo, reduce la memoria a la mitad.
+    
+    Returns:
+        {"time_cost", "memory_cost", "parallelism", "measured_ms"}
+    """
+    def measure(time_cost: int, memory: int) -> float:
+        hasher = argon2.using(time_cost=time_cost, memory_cost=memory, parallelism=parallelism)
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            hasher.hash("calibration-password")
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    min_memory = 8 * parallelism
+    time_cost = 1
+    measured = measure(time_cost, memory_cost)
+    while measured > target_ms and memory_cost // 2 >= min_memory:
+        memory_cost //= 2
+        measured = measure(time_cost, memory_cost)
+
+    while measured < target_ms and time_cost < max_time_cost:
+        candidate = measure(time_cost + 1, memory_cost)
+        # Quedarse con el valor más cercano al objetivo
+        if candidate - target_ms > target_ms - measured:
+            break
+        time_cost += 1
+        measured = candidate
+
+    return {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+        "measured_ms": round(measured, 1),
+    }
+
+
 def create_access_token(
     subject: str,
-    expires_delta: Optional[timedelta] = None
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None
 ) -> str:
     """
     Crea un JWT access token.
+    
+    Args:
+        subject: Valor de 'sub' (el id del usuario)
+        expires_delta: Duración del token (por defecto access_token_expire_minutes)
+        claims: Claims adicionales; solo datos que no cambian durante la vida del token
     """
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -58,7 +216,8 @@ def create_access_token(
             minutes=settings.access_token_expire_minutes
         )
     
-    to_encode = {"exp": expire, "sub": str(subject)} # Aseguramos que sea string
+    to_encode = dict(claims or {})
+    to_encode.update({"exp": expire, "sub": str(subject)}) # Aseguramos que sea string
     encoded_jwt = jwt.encode(
         to_encode,
         settings.secret_key,
@@ -67,9 +226,9 @@ def create_access_token(
     return encoded_jwt
 
 
-def decode_token(token: str) -> Optional[str]:
+def decode_token_payload(token: str) -> Optional[Dict[str, Any]]:
     """
-    Decodifica y valida un JWT token.
+    Decodifica y valida un JWT token, devolviendo todos sus claims.
     """
     try:
         payload = jwt.decode(
@@ -77,12 +236,47 @@ def decode_token(token: str) -> Optional[str]:
             settings.secret_key,
             algorithms=[settings.algorithm]
         )
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
     except JWTError:
         return None
+    if payload.get("sub") is None:
+        return None
+    return payload
+
+
+def decode_token(token: str) -> Optional[str]:
+    """
+    Decodifica y valida un JWT token. Devuelve el 'sub'.
+    """
+    payload = decode_token_payload(token)
+    return payload["sub"] if payload else None
+
+
+DOWNLOAD_TOKEN_PURPOSE = "download"
+
+
+def create_download_token(version_id: int, expires_delta: timedelta) -> str:
+    """
+    Crea un token firmado que permite descargar una versión sin iniciar sesión
+    (enlaces enviados por correo). No sirve como access token.
+    """
+    return create_access_token(
+        subject=f"version:{version_id}",
+        expires_delta=expires_delta,
+        claims={"purpose": DOWNLOAD_TOKEN_PURPOSE}
+    )
+
+
+def decode_download_token(token: str) -> Optional[int]:
+    """
+    Devuelve el id de la versión de un token de descarga válido, o None.
+    """
+    payload = decode_token_payload(token)
+    if not payload or payload.get("purpose") != DOWNLOAD_TOKEN_PURPOSE:
+        return None
+    kind, _, version_id = str(payload["sub"]).partition(":")
+    if kind != "version" or not version_id.isdigit():
+        return None
+    return int(version_id)
     
 import hashlib
 import secrets
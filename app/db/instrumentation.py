@@ -0,0 +1,74 @@
+"""
+Contador de consultas SQL por solicitud.
+
+Escucha before/after_cursor_execute en todos los Engine (incluidos los de
+los tests) y suma número y tiempo de las consultas en los colectores
+activos del contexto actual. SQLAlchemy asyncio propaga el contexto
+(contextvars) al greenlet que ejecuta la consulta, así que los colectores
+abiertos en un middleware o en un test ven las consultas del endpoint.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+_collectors: ContextVar[Tuple[QueryStats, ...]] = ContextVar("query_collectors", default=())
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Cuenta las consultas ejecutadas dentro del bloque (y en las tareas que
+    se creen desde él). Los bloques pueden anidarse.
+    """
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """
+    Helper de tests: falla si el bloque ejecuta más de `limit` consultas.
+
+        with assert_max_queries(3):
+            await client.get("/api/v1/files/my-documents", headers=auth)
+    """
+    with count_queries() as stats:
+        yield stats
+    assert stats.count <= limit, (
+        f"Se ejecutaron {stats.count} consultas SQL; el presupuesto es {limit}"
+    )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors.get()
+    if not collectors:
+        return
+    starts = conn.info.get("query_start")
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    for stats in collectors:
+        stats.count += 1
+        stats.seconds += elapsed
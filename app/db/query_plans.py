@@ -0,0 +1,102 @@
+"""
+Comprobación con EXPLAIN de que las consultas frecuentes usan índices.
+
+Se usa desde `python manage.py check-indexes` y desde los tests. En SQLite el
+planificador siempre usa un índice aplicable, por lo que la comprobación es
+determinista; en PostgreSQL, con tablas pequeñas, el planificador puede
+preferir un Seq Scan (o un Sort) aunque el índice exista.
+"""
+
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import Select
+
+from app.models import Document, Permission, Version
+from app.services.document_listing import my_documents_query
+
+# nombre -> (tabla que no debe recorrerse completa, constructor de la consulta)
+HOT_QUERIES: Dict[str, Tuple[str, Callable[[], Select]]] = {
+    "verify_document_access": (
+        "permissions",
+        lambda: select(Permission.document_id, Permission.permission_level)
+        .join(Document, Document.id == Permission.document_id)
+        .where(
+            Permission.document_id.in_([1]),
+            Permission.user_id == 1,
+            Document.deleted_at.is_(None)
+        ),
+    ),
+    "verify_documents_access": (
+        "permissions",
+        lambda: select(Permission.document_id, Permission.permission_level)
+        .join(Document, Document.id == Permission.document_id)
+        .where(
+            Permission.document_id.in_([1, 2, 3]),
+            Permission.user_id == 1,
+            Document.deleted_at.is_(None)
+        ),
+    ),
+    "my_documents": (
+        "permissions",
+        lambda: my_documents_query(1, limit=51),
+    ),
+    "my_documents_page": (
+        "permissions",
+        lambda: my_documents_query(
+            1, limit=51, cursor=100, name_prefix="informe", scope="owned"
+        ),
+    ),
+    "latest_version": (
+        "versions",
+        lambda: select(Version)
+        .where(Version.document_id == 1)
+        .order_by(Version.created_at.desc())
+        .limit(1),
+    ),
+}
+
+
+def _explain_prefix(dialect_name: str) -> str:
+    return "EXPLAIN QUERY PLAN " if dialect_name == "sqlite" else "EXPLAIN "
+
+
+def plan_uses_index(dialect_name: str, plan: str, table: str) -> bool:
+    """
+    True si el plan no recorre la tabla completa.
+    """
+    if dialect_name == "sqlite":
+        return f"SCAN {table}" not in plan and f"SEARCH {table}" in plan
+    return f"Seq Scan on {table}" not in plan
+
+
+def plan_sorts(dialect_name: str, plan: str) -> bool:
+    """
+    True si el plan ordena las filas en memoria en lugar de leerlas ya
+    ordenadas de un índice.
+    """
+    if dialect_name == "sqlite":
+        return "USE TEMP B-TREE FOR ORDER BY" in plan
+    return "Sort Key" in plan
+
+
+async def explain_hot_queries(conn: AsyncConnection) -> Dict[str, dict]:
+    """
+    Ejecuta EXPLAIN sobre cada consulta frecuente.
+    
+    Returns:
+        {nombre: {"plan": texto del plan, "uses_index": bool, "sorts": bool}}
+    """
+    dialect_name = conn.dialect.name
+    report = {}
+    for name, (table, build) in HOT_QUERIES.items():
+        sql = str(build().compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+        result = await conn.exec_driver_sql(_explain_prefix(dialect_name) + sql)
+        plan = "\n".join(" ".join(str(col) for col in row) for row in result.all())
+        report[name] = {
+            "plan": plan,
+            "uses_index": plan_uses_index(dialect_name, plan, table),
+            "sorts": plan_sorts(dialect_name, plan),
+        }
+    return report
@@ -1,19 +1,102 @@
 """
-Configuración de la sesión asíncrona con SQLAlchemy y SQLite.
+Configuración de la sesión asíncrona con SQLAlchemy.
+
+El motor se elige solo a partir de database_url:
+- SQLite (aiosqlite): WAL, synchronous=NORMAL, busy_timeout y mmap mediante
+  PRAGMAs al abrir cada conexión, para que los lectores no se bloqueen
+  durante los commits.
+- PostgreSQL (asyncpg): pool de conexiones configurable y caché de
+  sentencias preparadas.
 """
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from app.core.config import get_settings
 
 settings = get_settings()
 
-# Crear el engine asíncrono para SQLite
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.db_echo,
-    future=True,
-    connect_args={"check_same_thread": False}
-)
+
+def _normalize_url(database_url: str) -> URL:
+    """
+    Normaliza la URL: las URLs de PostgreSQL sin driver usan asyncpg.
+    """
+    url = make_url(database_url)
+    if url.drivername in ("postgres", "postgresql"):
+        url = url.set(drivername="postgresql+asyncpg")
+    return url
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.database in (None, "", ":memory:")
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Ajustes de SQLite aplicados a cada conexión nueva.
+    """
+    cursor = dbapi_connection.cursor()
+    # WAL: los lectores no se bloquean mientras otra conexión escribe
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # Seguro con WAL y evita un fsync por cada commit
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # Esperar al lock de escritura en lugar de fallar con "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}")
+    cursor.close()
+
+
+def _engine_kwargs(url: URL) -> dict:
+    """
+    Argumentos de create_async_engine según el backend de la URL.
+    """
+    kwargs = {
+        "echo": settings.db_echo,
+        "future": True,
+    }
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000,
+        }
+    elif backend == "postgresql":
+        kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=True,
+            connect_args={
+                # Caché de sentencias preparadas de asyncpg (por conexión)
+                "statement_cache_size": settings.db_statement_cache_size,
+            },
+        )
+    return kwargs
+
+
+def create_engine_from_url(database_url: str) -> AsyncEngine:
+    """
+    Crea el engine asíncrono con los ajustes de rendimiento del backend.
+    """
+    url = _normalize_url(database_url)
+    if url.get_backend_name() == "postgresql":
+        # Caché de sentencias compiladas del dialecto asyncpg de SQLAlchemy
+        url = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.db_statement_cache_size)}
+        )
+
+    async_engine = create_async_engine(url, **_engine_kwargs(url))
+
+    if url.get_backend_name() == "sqlite" and not _is_memory_sqlite(url):
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+    return async_engine
+
+
+# Crear el engine asíncrono
+engine = create_engine_from_url(settings.database_url)
 
 # Crear el sessionmaker asíncrono
 AsyncSessionLocal = async_sessionmaker(
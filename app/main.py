@@ -8,14 +8,22 @@ from contextlib import asynccontextmanager
 from typing import Optional
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, Query, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.core.config import get_settings
-from app.db.session import engine
+from app.core.security import shutdown_password_executor
+from app.core.metrics import metrics
+from app.core.request_metrics import request_metrics_middleware
+from app.core.loop_monitor import start_loop_monitor, stop_loop_monitor
+from app.core.memory_profiling import start_memory_profiling, stop_memory_profiling
+from app.services.mail_service import start_outbox_worker, stop_outbox_worker
+from app.services.document_purge import start_purge_worker, stop_purge_worker
+from app.db.session import engine, AsyncSessionLocal
 from app.db.base import Base
-from app.api.v1.endpoints import auth_router, files_router, signature_router, annotations_router
+from app.api.v1.endpoints import auth_router, files_router, signature_router, annotations_router, admin_router
+from app.api.profiling import ProfilingMiddleware
 from app.core.converters import ConverterFactory
 
 # Configurar logging
@@ -36,13 +44,33 @@ async def lifespan(app: FastAPI):
     """Gestiona el ciclo de vida de la aplicación."""
     logger.info("🚀 Iniciando aplicación modular de conversión...")
     
-    # Asegurar que las tablas existan
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # El esquema lo crean las migraciones; create_all solo si se pide
+    # explícitamente (desarrollo y pruebas)
+    if settings.db_create_all:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    
+    # Perfilado de memoria (tracemalloc), solo si se activa
+    if settings.memory_profiling:
+        start_memory_profiling()
+    # Retraso del event loop (y pilas de los bloqueos en debug)
+    if settings.loop_monitor_enabled:
+        start_loop_monitor()
+    # Worker de la bandeja de salida de correos
+    if settings.mail_outbox_enabled:
+        start_outbox_worker(AsyncSessionLocal)
+    # Worker de purga de documentos borrados
+    if settings.purge_enabled:
+        start_purge_worker(AsyncSessionLocal)
     
     yield
     
     # Limpieza al cerrar
+    await stop_purge_worker()
+    await stop_outbox_worker()
+    await stop_loop_monitor()
+    stop_memory_profiling()
+    shutdown_password_executor()
     await engine.dispose()
     logger.info("✅ Aplicación cerrada")
 
@@ -60,17 +88,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],
+    expose_headers=["Content-Disposition", "X-Next-Cursor", "X-DB-Query-Count", "X-DB-Query-Time-Ms", "X-Profile-Id"],
 )
 
+# Métricas por solicitud (duración y consultas SQL)
+app.middleware("http")(request_metrics_middleware)
+
+# Perfilado bajo demanda (cabecera X-Profile, solo administradores)
+app.add_middleware(ProfilingMiddleware)
+
 # Rutas estáticas para archivos temporales
 app.mount("/temp", StaticFiles(directory=TEMP_DIR), name="temp")
 
-# Incluir routers existentes (Auth, Files, Signatures, Annotations)
+# Incluir routers existentes (Auth, Files, Signatures, Annotations, Admin)
 app.include_router(auth_router)
 app.include_router(files_router)
 app.include_router(signature_router)
 app.include_router(annotations_router)
+app.include_router(admin_router)
 
 @app.post("/convert")
 async def convert_document(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
@@ -120,6 +155,13 @@ async def convert_document(background_tasks: BackgroundTasks, file: UploadFile =
 async def health_check():
     return {"status": "ok", "service": "conversion-api"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Métricas del proceso en formato de texto de Prometheus."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def read_root():
     return {
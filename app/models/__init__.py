@@ -4,5 +4,7 @@ Modelos ORM de la aplicación.
 
 from app.models.user import User
 from app.models.document import Document, Version, Permission
+from app.models.refresh_token import RefreshToken
+from app.models.outbound_email import OutboundEmail
 
-__all__ = ["User", "Document", "Version", "Permission"]
+__all__ = ["User", "Document", "Version", "Permission", "RefreshToken", "OutboundEmail"]
@@ -3,7 +3,7 @@ Modelos ORM para Documentos y Versiones.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Float, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -21,12 +21,37 @@ class Document(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     shared_externally = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Puntero a la versión actual, mantenido por app.services.versioning.add_version
+    latest_version_id = Column(
+        Integer,
+        ForeignKey("versions.id", use_alter=True, name="fk_documents_latest_version_id", ondelete="SET NULL"),
+        nullable=True
+    )
+    # Contador de versiones del documento (secuencia monótona)
+    version_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    # Borrado lógico: el documento deja de ser visible y la purga en segundo
+    # plano (app.services.document_purge) elimina después archivos y filas
+    deleted_at = Column(DateTime, nullable=True)
+    # Intentos fallidos de purga y cuándo toca el siguiente (backoff exponencial)
+    purge_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    purge_next_attempt_at = Column(DateTime, nullable=True)
     
     # Relaciones
     user = relationship("User", backref="documents")
-    versions = relationship("Version", back_populates="document", cascade="all, delete-orphan")
+    versions = relationship(
+        "Version",
+        back_populates="document",
+        foreign_keys="Version.document_id",
+        cascade="all, delete-orphan"
+    )
+    latest_version = relationship("Version", foreign_keys=[latest_version_id], viewonly=True)
     permissions = relationship("Permission", back_populates="document", cascade="all, delete-orphan")
 
+    # El listado paginado usa el índice único de permissions (user_id, document_id)
+    __table_args__ = (
+        Index("ix_documents_deleted_at", "deleted_at"),
+    )
+
     def __repr__(self):
         return f"<Document(id={self.id}, name='{self.name}', user_id={self.user_id})>"
 
@@ -39,6 +64,7 @@ class Version(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    sequence = Column(Integer, nullable=True) # 1, 2, 3... dentro del documento
     version_number = Column(String(20), nullable=False) # e.g., "v1.0"
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer, nullable=False)
@@ -47,7 +73,13 @@ class Version(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relaciones
-    document = relationship("Document", back_populates="versions")
+    document = relationship("Document", back_populates="versions", foreign_keys=[document_id])
+
+    # Índices: última versión de un documento (filtro por documento, orden por fecha)
+    __table_args__ = (
+        Index("ix_versions_document_created", "document_id", "created_at"),
+        UniqueConstraint("document_id", "sequence", name="uq_versions_document_sequence"),
+    )
 
     def __repr__(self):
         return f"<Version(id={self.id}, doc_id={self.document_id}, version='{self.version_number}')>"
@@ -70,5 +102,12 @@ class Permission(Base):
     user = relationship("User", backref="document_permissions")
     document = relationship("Document", back_populates="permissions")
 
+    # Un único permiso por (usuario, documento). La restricción también sirve
+    # como índice de verify_document_access y del listado por usuario.
+    __table_args__ = (
+        UniqueConstraint("user_id", "document_id", name="uq_permissions_user_document"),
+        Index("ix_permissions_document_user", "document_id", "user_id"),
+    )
+
     def __repr__(self):
         return f"<Permission(id={self.id}, user_id={self.user_id}, doc_id={self.document_id}, level='{self.permission_level}')>"
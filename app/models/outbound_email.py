@@ -0,0 +1,39 @@
+"""
+Modelo ORM para la bandeja de salida de correos.
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+
+from app.db.base import Base
+
+
+class OutboundEmail(Base):
+    """
+    Correo pendiente de envío. El worker de app.services.mail_service lo
+    envía, reintenta con backoff exponencial y registra el estado final.
+    
+    Estados: 'pending' -> 'sending' -> 'sent' | 'failed'
+    """
+    __tablename__ = "outbound_emails"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipients = Column(JSON, nullable=False) # Lista de direcciones
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    attachment_path = Column(String(500), nullable=True)
+    attachment_name = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    # Índices: el worker busca los pendientes cuyo reintento ya toca
+    __table_args__ = (
+        Index("ix_outbound_emails_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<OutboundEmail(id={self.id}, status='{self.status}', attempts={self.attempts})>"
@@ -0,0 +1,34 @@
+"""
+Modelo ORM para los refresh tokens.
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+
+
+class RefreshToken(Base):
+    """
+    Refresh token de un usuario. Solo se guarda el hash SHA-256 del token.
+    
+    Cada uso rota el token: el usado se revoca y se emite otro de la misma
+    familia (family_id). Presentar un token ya rotado indica que fue robado
+    y revoca la familia completa.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)
+    family_id = Column(String(32), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+
+    # Relaciones
+    user = relationship("User")
+
+    def __repr__(self):
+        return f"<RefreshToken(id={self.id}, user_id={self.user_id}, family='{self.family_id}')>"
@@ -2,8 +2,9 @@
 Schemas para anotaciones en PDFs y envío de correos.
 """
 
-from typing import List, Optional
-from pydantic import BaseModel, EmailStr, Field
+from datetime import datetime
+from typing import List, Literal, Optional
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
 
 class AnnotationItem(BaseModel):
@@ -46,19 +47,44 @@ class AnnotateResponse(BaseModel):
 
 
 class SendEmailRequest(BaseModel):
-    """Solicitud para enviar correo con PDF."""
-    recipient: EmailStr = Field(..., description="Correo del destinatario")
+    """Solicitud para enviar por correo una versión de un documento."""
+    recipient: Optional[EmailStr] = Field(None, description="Correo del destinatario")
+    recipients: List[EmailStr] = Field(
+        default_factory=list,
+        description="Destinatarios adicionales; el mensaje se genera una sola vez para todos"
+    )
     subject: str = Field(..., description="Asunto del correo")
     body: Optional[str] = Field(None, description="Cuerpo del mensaje")
     file_version_id: int = Field(..., description="ID de la versión del archivo a adjuntar")
+    delivery: Literal["auto", "attachment", "link"] = Field(
+        "auto",
+        description="'auto' adjunta el PDF si no supera MAIL_ATTACHMENT_MAX_MB y, si lo supera, envía un enlace de descarga con caducidad"
+    )
+    
+    @model_validator(mode="after")
+    def _require_recipient(self):
+        if not self.recipient and not self.recipients:
+            raise ValueError("Indica al menos un destinatario")
+        return self
+    
+    def all_recipients(self) -> List[str]:
+        """Destinatarios sin duplicados, en el orden recibido."""
+        seen = set()
+        result = []
+        for address in ([self.recipient] if self.recipient else []) + list(self.recipients):
+            if address.lower() not in seen:
+                seen.add(address.lower())
+                result.append(address)
+        return result
     
     class Config:
         json_schema_extra = {
             "example": {
-                "recipient": "usuario@itb.edu.ec",
+                "recipients": ["usuario@itb.edu.ec", "revisor@itb.edu.ec"],
                 "subject": "Documento para revisión",
                 "body": "Adjunto el documento solicitado.",
-                "file_version_id": 1
+                "file_version_id": 1,
+                "delivery": "auto"
             }
         }
 
@@ -67,3 +93,48 @@ class SendEmailResponse(BaseModel):
     """Respuesta tras enviar correo."""
     success: bool
     message: str
+    recipients: int = 1
+    delivery: Optional[str] = None # 'attachment' o 'link'
+    link_expires_at: Optional[datetime] = None
+
+
+class BulkAnnotateRequest(BaseModel):
+    """Solicitud para anotar muchas versiones en una sola llamada."""
+    jobs: List[AnnotateRequest] = Field(..., description="Trabajos (versión + anotaciones)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "jobs": [
+                    {
+                        "file_id": 1,
+                        "annotations": [
+                            {"x": 100, "y": 200, "text": "Revisado QA", "type": "note", "page": 0}
+                        ]
+                    },
+                    {
+                        "file_id": 2,
+                        "annotations": [
+                            {"x": 100, "y": 200, "text": "Revisado QA", "type": "note", "page": 0}
+                        ]
+                    }
+                ]
+            }
+        }
+
+
+class BulkAnnotateItemResult(BaseModel):
+    """Resultado de un trabajo individual dentro de una anotación masiva."""
+    file_id: int
+    success: bool
+    message: str
+    annotated_version_id: Optional[int] = None
+    filename: Optional[str] = None
+
+
+class BulkAnnotateResponse(BaseModel):
+    """Respuesta de la anotación masiva con resultados por elemento."""
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BulkAnnotateItemResult]
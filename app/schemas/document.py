@@ -3,8 +3,8 @@ Esquemas Pydantic para Documentos y Versiones.
 """
 
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, ConfigDict
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class VersionBase(BaseModel):
@@ -22,6 +22,7 @@ class VersionCreate(VersionBase):
 class VersionResponse(VersionBase):
     id: int
     document_id: int
+    sequence: Optional[int] = None
     created_at: datetime
     
     model_config = ConfigDict(from_attributes=True)
@@ -42,6 +43,43 @@ class ShareDocumentRequest(BaseModel):
     permission_level: str # 'editor', 'viewer'
 
 
+class BulkShareRequest(BaseModel):
+    document_ids: List[int] = Field(..., min_length=1)
+    emails: List[str] = Field(..., min_length=1)
+    permission_level: Literal["editor", "viewer"]
+
+
+class BulkShareItemResult(BaseModel):
+    document_id: int
+    email: str
+    success: bool
+    message: str
+
+
+class BulkShareResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BulkShareItemResult]
+
+
+class BulkDeleteRequest(BaseModel):
+    document_ids: List[int] = Field(..., min_length=1)
+
+
+class BulkDeleteItemResult(BaseModel):
+    document_id: int
+    success: bool
+    message: str
+
+
+class BulkDeleteResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BulkDeleteItemResult]
+
+
 class DocumentBase(BaseModel):
     name: str
 
@@ -67,8 +105,37 @@ class DocumentWithVersions(DocumentResponse):
     versions: List[VersionResponse] = []
 
 
+class SignatureDetail(BaseModel):
+    index: int
+    field_name: Optional[str] = None
+    is_valid: bool
+    trusted: bool
+    signer_name: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    coverage: Optional[str] = None # 'ENTIRE_FILE', 'ENTIRE_REVISION', ...
+    ltv: bool = False # Validada con datos de revocación incrustados (DSS)
+    details: Optional[str] = None
+
+
 class SignatureValidationResponse(BaseModel):
     is_valid: bool
     signer_name: Optional[str] = None
     timestamp: Optional[datetime] = None
     trusted: bool
+    details: Optional[str] = None
+    signature_count: int = 0
+    signatures: List[SignatureDetail] = []
+
+
+class BatchSignItemResult(BaseModel):
+    document_id: int
+    success: bool
+    message: str
+    version: Optional[VersionResponse] = None
+
+
+class BatchSignResponse(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchSignItemResult]
@@ -16,22 +16,38 @@ class Token(BaseModel):
         default="bearer",
         description="Tipo de token (siempre 'bearer' para JWT)"
     )
+    refresh_token: Optional[str] = Field(
+        default=None,
+        description="Token opaco para obtener nuevos access tokens sin contraseña"
+    )
     
     model_config = {
         "json_schema_extra": {
             "example": {
                 "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
-                "token_type": "bearer"
+                "token_type": "bearer",
+                "refresh_token": "Q2hhbmdlTWUtcmVmcmVzaC10b2tlbi1leGFtcGxl"
             }
         }
     }
 
 
+class RefreshTokenRequest(BaseModel):
+    """
+    Esquema para renovar la sesión o cerrarla.
+    """
+    refresh_token: str = Field(..., min_length=10, description="Refresh token recibido en el login")
+
+
 class TokenData(BaseModel):
     """
     Esquema para los datos extraídos del token JWT.
     Se usa internamente para pasar el usuario autenticado.
     """
+    user_id: Optional[int] = Field(
+        default=None,
+        description="Id del usuario (claim 'sub')"
+    )
     email: Optional[str] = Field(
         default=None,
         description="Correo electrónico del usuario (del token)"
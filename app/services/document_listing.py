@@ -0,0 +1,119 @@
+"""
+Consulta paginada del listado de documentos de un usuario.
+
+Paginación por cursor (keyset) sobre el id del documento en orden
+descendente (los ids crecen con la fecha de creación, así que es del más
+reciente al más antiguo): el cursor codifica la última fila devuelta y la
+página siguiente empieza justo después, sin OFFSET.
+
+La consulta parte de los permisos del usuario: el índice único
+permissions(user_id, document_id) da a la vez el filtro por usuario, el
+orden y el corte del cursor, sin ordenar en memoria (en SQLite, sin
+"USE TEMP B-TREE FOR ORDER BY"). Los filtros por nombre, fecha y firma se
+aplican sobre las filas de documents alcanzadas por clave primaria. El
+número de permisos de cada documento se obtiene con una subconsulta
+agregada en lugar de cargar Document.permissions.
+"""
+
+import base64
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
+
+from app.models import Document, Permission, Version
+
+SIGNED_SUFFIX = "-signed"
+SCOPES = ("all", "owned", "shared")
+DEFAULT_PAGE_SIZE = 50
+
+
+def encode_cursor(document_id: int) -> str:
+    """
+    Codifica la posición (id del último documento) como un token opaco.
+    """
+    raw = f"doc:{document_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Inverso de encode_cursor.
+
+    Raises:
+        ValueError: Si el cursor no es válido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, document_id = base64.urlsafe_b64decode(padded).decode().split(":", 1)
+        if prefix != "doc":
+            raise ValueError(prefix)
+        return int(document_id)
+    except Exception as e:
+        raise ValueError("Cursor inválido") from e
+
+
+def my_documents_query(
+    user_id: int,
+    *,
+    limit: Optional[int],
+    cursor: Optional[int] = None,
+    name_prefix: Optional[str] = None,
+    scope: str = "all",
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    signed: Optional[bool] = None,
+) -> Select:
+    """
+    Construye la consulta del listado.
+
+    Devuelve filas (Document, Permission, Version | None, share_count), donde
+    Version es la versión actual y share_count el número de permisos del
+    documento. Se pide `limit` filas (todas si es None); quien llama pide
+    una más para saber si hay página siguiente.
+    """
+    if scope not in SCOPES:
+        raise ValueError(f"scope debe ser uno de {SCOPES}")
+
+    other = aliased(Permission)
+    share_count = (
+        select(func.count(other.id))
+        .where(other.document_id == Document.id)
+        .correlate(Document)
+        .scalar_subquery()
+        .label("share_count")
+    )
+
+    stmt = (
+        select(Document, Permission, Version, share_count)
+        .join(Permission, Permission.document_id == Document.id)
+        .outerjoin(Version, Version.id == Document.latest_version_id)
+        .where(Permission.user_id == user_id, Document.deleted_at.is_(None))
+    )
+
+    if scope == "owned":
+        stmt = stmt.where(Permission.permission_level == "owner")
+    elif scope == "shared":
+        stmt = stmt.where(Permission.permission_level != "owner")
+
+    if name_prefix:
+        stmt = stmt.where(Document.name.startswith(name_prefix, autoescape=True))
+    if created_from is not None:
+        stmt = stmt.where(Document.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Document.created_at < created_to)
+    if signed is not None:
+        is_signed = Version.version_number.endswith(SIGNED_SUFFIX)
+        stmt = stmt.where(is_signed if signed else or_(Version.id.is_(None), ~is_signed))
+
+    if cursor is not None:
+        # Sobre la columna de permissions, no la de documents: así el corte
+        # forma parte de la búsqueda en el índice (user_id, document_id)
+        stmt = stmt.where(Permission.document_id < cursor)
+
+    stmt = stmt.order_by(Permission.document_id.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
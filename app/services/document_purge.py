@@ -0,0 +1,167 @@
+"""
+Purga en segundo plano de documentos con borrado lógico.
+
+DELETE /files/{id} solo marca documents.deleted_at, así que su latencia no
+depende del número ni del tamaño de las versiones. Este worker elimina
+después, por lotes, los archivos de las versiones (limitando los borrados
+por segundo para no saturar el disco) y las filas del documento.
+
+Si algún archivo de un documento no se puede borrar, el documento se
+reintenta con backoff exponencial (purge_attempts, purge_next_attempt_at):
+mientras tanto no ocupa sitio en los lotes y no bloquea al resto.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.background import BackgroundWorker
+from app.core.config import get_settings
+from app.models import Document, Permission, Version
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+def _unlink(path: str) -> bool:
+    """Borra un archivo. True si ya no existe."""
+    try:
+        Path(path).unlink(missing_ok=True)
+        return True
+    except OSError as e:
+        logger.warning("No se pudo borrar %s: %s", path, e)
+        return False
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff exponencial: base * 2^(intentos-1), con tope."""
+    seconds = settings.purge_retry_base_seconds * (2 ** max(0, attempts - 1))
+    return timedelta(seconds=min(seconds, settings.purge_retry_max_seconds))
+
+
+class DocumentPurgeWorker(BackgroundWorker):
+    """
+    Elimina archivos y filas de los documentos marcados como borrados.
+
+    Args:
+        session_factory: Fábrica de sesiones (AsyncSessionLocal en la aplicación)
+        files_per_second: Límite de borrados de archivo por segundo (0 = sin límite)
+    """
+
+    name = "worker de purga"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        files_per_second: Optional[float] = None,
+    ):
+        super().__init__(
+            batch_size=batch_size or settings.purge_batch_size,
+            poll_interval=settings.purge_interval_seconds if poll_interval is None else poll_interval,
+        )
+        self._session_factory = session_factory
+        rate = settings.purge_files_per_second if files_per_second is None else files_per_second
+        self._file_delay = 1.0 / rate if rate > 0 else 0.0
+
+    async def run_once(self) -> int:
+        """
+        Purga un lote de documentos borrados.
+
+        Returns:
+            Número de documentos purgados
+        """
+        now = datetime.utcnow()
+        async with self._session_factory() as db:
+            stmt = (
+                select(Document.id, Document.purge_attempts)
+                .where(
+                    Document.deleted_at.is_not(None),
+                    or_(Document.purge_next_attempt_at.is_(None), Document.purge_next_attempt_at <= now)
+                )
+                .order_by(Document.deleted_at)
+                .limit(self.batch_size)
+            )
+            attempts_by_doc = dict((await db.execute(stmt)).all())
+            document_ids = list(attempts_by_doc)
+            if not document_ids:
+                return 0
+
+            stmt = select(Version.document_id, Version.file_path).where(Version.document_id.in_(document_ids))
+            rows = (await db.execute(stmt)).all()
+            await db.commit() # No mantener la transacción abierta durante la E/S
+
+            # 1. Archivos, con el ritmo limitado
+            failed = set()
+            for document_id, file_path in rows:
+                if not await run_in_threadpool(_unlink, file_path):
+                    failed.add(document_id)
+                if self._file_delay:
+                    await asyncio.sleep(self._file_delay)
+
+            # 2. Si algún archivo no se pudo borrar, el documento se reintenta más tarde
+            for document_id in failed:
+                attempts = (attempts_by_doc[document_id] or 0) + 1
+                await db.execute(
+                    update(Document)
+                    .where(Document.id == document_id)
+                    .values(purge_attempts=attempts, purge_next_attempt_at=now + retry_delay(attempts))
+                    .execution_options(synchronize_session=False)
+                )
+                logger.warning("Purga del documento %s aplazada (intento %s)", document_id, attempts)
+
+            # 3. Filas de los documentos cuyos archivos ya no existen
+            purged: List[int] = [doc_id for doc_id in document_ids if doc_id not in failed]
+            if purged:
+                await db.execute(
+                    update(Document)
+                    .where(Document.id.in_(purged))
+                    .values(latest_version_id=None)
+                    .execution_options(synchronize_session=False)
+                )
+                for model in (Permission, Version):
+                    await db.execute(
+                        delete(model)
+                        .where(model.document_id.in_(purged))
+                        .execution_options(synchronize_session=False)
+                    )
+                await db.execute(
+                    delete(Document)
+                    .where(Document.id.in_(purged))
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+            logger.info("Purgados %s documentos (%s archivos)", len(purged), len(rows))
+            return len(purged)
+
+
+_worker: Optional[DocumentPurgeWorker] = None
+
+
+def start_purge_worker(session_factory: async_sessionmaker) -> DocumentPurgeWorker:
+    """Arranca el worker del proceso (desde el lifespan de la aplicación)."""
+    global _worker
+    _worker = DocumentPurgeWorker(session_factory)
+    _worker.start()
+    return _worker
+
+
+async def stop_purge_worker() -> None:
+    global _worker
+    if _worker is not None:
+        await _worker.stop()
+        _worker = None
+
+
+def notify_purge() -> None:
+    """Avisa al worker de que hay documentos por purgar."""
+    if _worker is not None:
+        _worker.wake()
@@ -1,34 +1,361 @@
 # app/services/mail_service.py
+"""
+Envío de correos mediante una bandeja de salida persistente (outbox).
 
-from typing import Optional, List
-from fastapi_mail import FastMail, MessageSchema, MessageType
+Los endpoints solo insertan filas en `outbound_emails` (en la misma
+transacción que el cambio que las origina) con enqueue_email. El worker
+MailOutboxWorker, arrancado con la aplicación:
+- reclama en lotes los correos cuyo envío toca,
+- los envía reutilizando un pool de conexiones SMTP abiertas,
+- reintenta los fallos con backoff exponencial y registra el estado final.
 
-from app.core.mail_config import get_mail_config
+Varios procesos pueden ejecutar el worker a la vez: el reclamo es un
+UPDATE condicionado al estado, y un correo reclamado por un proceso que
+muere vuelve a 'pending' cuando vence su plazo (mail_timeout_seconds por
+correo del lote).
+"""
 
+import asyncio
+import logging
+import mimetypes
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, List, Optional, Union
 
-async def send_email_background(
-    recipient: str,
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.background import BackgroundWorker
+from app.core.config import get_settings
+from app.models.outbound_email import OutboundEmail
+
+# aiosmtplib se importa al abrir la primera conexión
+if TYPE_CHECKING:
+    import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class PermanentMailError(Exception):
+    """Error que no se resuelve reintentando (p.ej. el adjunto ya no existe)."""
+
+
+async def enqueue_email(
+    db: AsyncSession,
+    recipients: Union[str, Iterable[str]],
     subject: str,
     body: str,
-    attachments: Optional[List[str]] = None,
-):
+    attachment_path: Optional[Union[str, Path]] = None,
+    attachment_name: Optional[str] = None,
+) -> OutboundEmail:
+    """
+    Añade un correo a la bandeja de salida (no hace commit).
+    Tras el commit, llamar a notify_outbox() para no esperar al siguiente sondeo.
+    """
+    if isinstance(recipients, str):
+        recipients = [recipients]
+    email = OutboundEmail(
+        recipients=list(recipients),
+        subject=subject,
+        body=body,
+        attachment_path=str(attachment_path) if attachment_path else None,
+        attachment_name=attachment_name,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(email)
+    return email
+
+
+def sender_address() -> str:
+    """Remitente: MAIL_FROM o, si no está configurado, la cuenta MAIL_USERNAME."""
+    return settings.mail_from or settings.mail_username
+
+
+def build_message(email: OutboundEmail) -> EmailMessage:
+    """
+    Construye el mensaje MIME (lee el adjunto del disco: llamar en el threadpool).
+
+    Raises:
+        PermanentMailError: Si no hay remitente configurado o el adjunto ya no existe
+    """
+    sender = sender_address()
+    if not sender:
+        raise PermanentMailError("No hay remitente: configure MAIL_FROM o MAIL_USERNAME")
+    message = EmailMessage()
+    message["From"] = formataddr((settings.mail_from_name, sender))
+    # Con varios destinatarios el mensaje se genera una vez y se entrega a
+    # todos en la misma transacción SMTP, sin que vean las demás direcciones
+    if len(email.recipients) == 1:
+        message["To"] = email.recipients[0]
+    else:
+        message["To"] = "undisclosed-recipients:;"
+    message["Subject"] = email.subject
+    message.set_content(email.body, subtype="html" if "<" in email.body else "plain")
+
+    if email.attachment_path:
+        path = Path(email.attachment_path)
+        if not path.exists():
+            raise PermanentMailError(f"El adjunto {path} ya no existe")
+        mime_type, _ = mimetypes.guess_type(email.attachment_name or path.name)
+        maintype, subtype = (mime_type or "application/octet-stream").split("/", 1)
+        message.add_attachment(
+            path.read_bytes(),
+            maintype=maintype,
+            subtype=subtype,
+            filename=email.attachment_name or path.name,
+        )
+    return message
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff exponencial: base * 2^(intentos-1), con tope."""
+    seconds = settings.mail_retry_base_seconds * (2 ** max(0, attempts - 1))
+    return timedelta(seconds=min(seconds, settings.mail_retry_max_seconds))
+
+
+class SMTPPool:
+    """
+    Pool de conexiones SMTP. Las conexiones se abren bajo demanda, se
+    reutilizan entre mensajes y lotes, y se reabren si el servidor las cerró.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        validate_certs: bool = True,
+        timeout: float = 30,
+    ):
+        self.size = max(1, size)
+        self._options = dict(
+            hostname=hostname,
+            port=port,
+            use_tls=use_tls,
+            start_tls=start_tls,
+            validate_certs=validate_certs,
+            timeout=timeout,
+        )
+        self._credentials = (username, password) if username else None
+        self._idle: "asyncio.Queue[Optional[aiosmtplib.SMTP]]" = asyncio.Queue()
+        for _ in range(self.size):
+            self._idle.put_nowait(None)
+
+    @classmethod
+    def from_settings(cls) -> "SMTPPool":
+        return cls(
+            size=settings.mail_pool_size,
+            hostname=settings.mail_server,
+            port=settings.mail_port,
+            username=settings.mail_username if settings.mail_use_credentials else None,
+            password=settings.mail_password,
+            use_tls=settings.mail_ssl_tls,
+            start_tls=settings.mail_starttls,
+            validate_certs=settings.mail_validate_certs,
+            timeout=settings.mail_timeout_seconds,
+        )
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        import aiosmtplib
+
+        smtp = aiosmtplib.SMTP(**self._options)
+        await smtp.connect()
+        if self._credentials:
+            await smtp.login(*self._credentials)
+        return smtp
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator["aiosmtplib.SMTP"]:
+        """Presta una conexión abierta; si falla durante el uso, se descarta."""
+        smtp = await self._idle.get()
+        try:
+            if smtp is None or not smtp.is_connected:
+                smtp = await self._connect()
+            yield smtp
+        except BaseException:
+            if smtp is not None:
+                smtp.close()
+            smtp = None
+            raise
+        finally:
+            self._idle.put_nowait(smtp)
+
+    async def send(self, message: EmailMessage, recipients: Optional[List[str]] = None) -> None:
+        """
+        Envía por una conexión del pool, reconectando una vez si estaba caída.
+        recipients indica el sobre SMTP (por defecto, las cabeceras del mensaje).
+        """
+        import aiosmtplib
+
+        try:
+            async with self.connection() as smtp:
+                await smtp.send_message(message, recipients=recipients)
+        except aiosmtplib.SMTPServerDisconnected:
+            async with self.connection() as smtp:
+                await smtp.send_message(message, recipients=recipients)
+
+    async def close(self) -> None:
+        """Cierra las conexiones inactivas."""
+        import aiosmtplib
+
+        for _ in range(self.size):
+            smtp = await self._idle.get()
+            if smtp is not None and smtp.is_connected:
+                try:
+                    await smtp.quit()
+                except aiosmtplib.SMTPException:
+                    smtp.close()
+        for _ in range(self.size):
+            self._idle.put_nowait(None)
+
+
+class MailOutboxWorker(BackgroundWorker):
     """
-    Envío de correo en background (no debe lanzar exceptions).
+    Envía los correos de la bandeja de salida en segundo plano.
+
+    Args:
+        session_factory: Fábrica de sesiones (AsyncSessionLocal en la aplicación)
+        pool: Pool SMTP; por defecto se construye desde la configuración
     """
-    try:
-        mail_config = get_mail_config()
 
-        message = MessageSchema(
-            subject=subject,
-            recipients=[recipient],
-            body=body,
-            subtype=MessageType.html if "<" in body else MessageType.plain,
-            attachments=attachments or [],
+    name = "worker de correo"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        pool: Optional[SMTPPool] = None,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        super().__init__(
+            batch_size=batch_size or settings.mail_batch_size,
+            poll_interval=settings.mail_poll_interval_seconds if poll_interval is None else poll_interval,
+        )
+        self._session_factory = session_factory
+        self.pool = pool or SMTPPool.from_settings()
+
+    async def run_once(self) -> int:
+        """
+        Procesa un lote de correos pendientes.
+
+        Returns:
+            Número de correos procesados (enviados o fallidos)
+        """
+        async with self._session_factory() as db:
+            emails = await self._claim(db)
+            if not emails:
+                return 0
+
+            outcomes = await asyncio.gather(
+                *(self._send(email) for email in emails)
+            )
+
+            now = datetime.utcnow()
+            for email, (error, permanent) in zip(emails, outcomes):
+                email.attempts += 1
+                if error is None:
+                    email.status = "sent"
+                    email.sent_at = now
+                    email.last_error = None
+                elif permanent or email.attempts >= settings.mail_max_attempts:
+                    email.status = "failed"
+                    email.last_error = error
+                    logger.error("Correo %s descartado tras %s intentos: %s", email.id, email.attempts, error)
+                else:
+                    email.status = "pending"
+                    email.next_attempt_at = now + retry_delay(email.attempts)
+                    email.last_error = error
+            await db.commit()
+            return len(emails)
+
+    async def _claim(self, db: AsyncSession) -> List[OutboundEmail]:
+        now = datetime.utcnow()
+
+        # Devolver a la cola los reclamados por un proceso que no terminó
+        await db.execute(
+            update(OutboundEmail)
+            .where(OutboundEmail.status == "sending", OutboundEmail.next_attempt_at <= now)
+            .values(status="pending")
+            .execution_options(synchronize_session=False)
+        )
+
+        due = (
+            select(OutboundEmail.id)
+            .where(OutboundEmail.status == "pending", OutboundEmail.next_attempt_at <= now)
+            .order_by(OutboundEmail.next_attempt_at)
+            .limit(self.batch_size)
         )
+        ids = (await db.execute(due)).scalars().all()
+        if not ids:
+            await db.commit()
+            return []
+
+        # El UPDATE condicionado al estado evita que dos procesos envíen lo mismo
+        lease = now + timedelta(seconds=settings.mail_timeout_seconds * len(ids))
+        result = await db.execute(
+            update(OutboundEmail)
+            .where(OutboundEmail.id.in_(ids), OutboundEmail.status == "pending")
+            .values(status="sending", next_attempt_at=lease)
+            .returning(OutboundEmail.id)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = result.scalars().all()
+
+        emails = []
+        if claimed:
+            result = await db.execute(select(OutboundEmail).where(OutboundEmail.id.in_(claimed)))
+            emails = list(result.scalars().all())
+        await db.commit()
+        return emails
+
+    async def _send(self, email: OutboundEmail):
+        """Envía un correo. Devuelve (error | None, error_permanente)."""
+        try:
+            message = await run_in_threadpool(build_message, email)
+            await self.pool.send(message, recipients=list(email.recipients))
+            return None, False
+        except PermanentMailError as e:
+            return str(e), True
+        except Exception as e:
+            logger.warning("Fallo enviando correo %s: %s", email.id, e)
+            return f"{type(e).__name__}: {e}", False
+
+    async def stop(self) -> None:
+        await super().stop()
+        await self.pool.close()
+
+
+_worker: Optional[MailOutboxWorker] = None
+
+
+def start_outbox_worker(session_factory: async_sessionmaker) -> MailOutboxWorker:
+    """Arranca el worker del proceso (desde el lifespan de la aplicación)."""
+    global _worker
+    _worker = MailOutboxWorker(session_factory)
+    _worker.start()
+    return _worker
+
+
+async def stop_outbox_worker() -> None:
+    global _worker
+    if _worker is not None:
+        await _worker.stop()
+        _worker = None
 
-        fm = FastMail(mail_config)
-        await fm.send_message(message)
 
-        print(f"✅ Correo enviado a {recipient}")
-    except Exception as e:
-        print(f"❌ Error enviando correo: {str(e)}")
+def notify_outbox() -> None:
+    """Avisa al worker de que hay correos nuevos (no hace nada si no está activo)."""
+    if _worker is not None:
+        _worker.wake()
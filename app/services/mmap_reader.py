@@ -0,0 +1,67 @@
+"""
+Lectura de archivos grandes mediante memoria mapeada (mmap).
+
+El sistema operativo carga las páginas del archivo bajo demanda y puede
+descartarlas cuando hay presión de memoria, por lo que leer un PDF de cientos
+de MB no obliga a tenerlo completo en el heap del proceso.
+"""
+
+import io
+import mmap
+from typing import BinaryIO
+
+
+class MmapReader(io.RawIOBase):
+    """
+    Stream binario de solo lectura sobre un archivo mapeado en memoria.
+    
+    Implementa readinto/seek/tell, que es lo que necesitan los lectores de
+    pyHanko (mmap por sí solo no ofrece readinto).
+    
+    Uso:
+        with open(path, "rb") as f, MmapReader(f) as stream:
+            ...
+    """
+    
+    def __init__(self, fileobj: BinaryIO):
+        super().__init__()
+        self._mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), len(self._view) - self._pos)
+        if size <= 0:
+            return 0
+        buffer[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"whence inválido: {whence}")
+        if pos < 0:
+            raise ValueError("Posición negativa")
+        self._pos = pos
+        return self._pos
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+            self._mmap.close()
+        super().close()
@@ -3,11 +3,15 @@ Servicio para manipulación de PDFs con PyMuPDF.
 Incluye funciones para agregar anotaciones a documentos PDF.
 """
 
-import fitz  # PyMuPDF
 from pathlib import Path
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 import logging
 
+# PyMuPDF se importa en el primer uso: cargarlo retrasa el arranque de
+# procesos que no anotan ningún PDF
+if TYPE_CHECKING:
+    import fitz
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,46 +49,55 @@ class PDFAnnotationService:
         if not input_pdf_path.exists():
             raise FileNotFoundError(f"PDF no encontrado: {input_pdf_path}")
         
+        import fitz  # PyMuPDF
+        
         try:
             # Abrir el documento PDF
             doc = fitz.open(str(input_pdf_path))
             
             logger.info(f"Procesando {len(annotations)} anotaciones en PDF con {doc.page_count} páginas")
             
+            # Agrupar por página para cargar cada página una sola vez
+            by_page = {}
             for annot in annotations:
                 page_num = annot.get('page', 0)
-                x = annot['x']
-                y = annot['y']
-                text = annot['text']
-                annot_type = annot.get('type', 'note')
                 
                 # Validar número de página
                 if page_num < 0 or page_num >= doc.page_count:
                     logger.warning(f"Página {page_num} fuera de rango, usando página 0")
                     page_num = 0
                 
+                by_page.setdefault(page_num, []).append(annot)
+            
+            for page_num in sorted(by_page):
                 page = doc[page_num]
                 
                 # Obtener dimensiones de la página
                 page_rect = page.rect
                 
-                # Validar coordenadas
-                if not (0 <= x <= page_rect.width and 0 <= y <= page_rect.height):
-                    logger.warning(f"Coordenadas ({x}, {y}) fuera de rango de página")
-                    # Ajustar coordenadas si están fuera de rango
-                    x = min(max(0, x), page_rect.width - 50)
-                    y = min(max(0, y), page_rect.height - 20)
-                
-                # Agregar anotación según el tipo
-                if annot_type == 'note':
-                    PDFAnnotationService._add_text_note(page, x, y, text)
-                elif annot_type == 'highlight':
-                    PDFAnnotationService._add_highlight(page, x, y, text)
-                elif annot_type == 'comment':
-                    PDFAnnotationService._add_comment(page, x, y, text)
-                else:
-                    # Por defecto, agregar como nota
-                    PDFAnnotationService._add_text_note(page, x, y, text)
+                for annot in by_page[page_num]:
+                    x = annot['x']
+                    y = annot['y']
+                    text = annot['text']
+                    annot_type = annot.get('type', 'note')
+                    
+                    # Validar coordenadas
+                    if not (0 <= x <= page_rect.width and 0 <= y <= page_rect.height):
+                        logger.warning(f"Coordenadas ({x}, {y}) fuera de rango de página")
+                        # Ajustar coordenadas si están fuera de rango
+                        x = min(max(0, x), page_rect.width - 50)
+                        y = min(max(0, y), page_rect.height - 20)
+                    
+                    # Agregar anotación según el tipo
+                    if annot_type == 'note':
+                        PDFAnnotationService._add_text_note(page, x, y, text)
+                    elif annot_type == 'highlight':
+                        PDFAnnotationService._add_highlight(page, x, y, text)
+                    elif annot_type == 'comment':
+                        PDFAnnotationService._add_comment(page, x, y, text)
+                    else:
+                        # Por defecto, agregar como nota
+                        PDFAnnotationService._add_text_note(page, x, y, text)
             
             # Guardar el documento anotado
             doc.save(str(output_pdf_path))
@@ -98,8 +111,10 @@ class PDFAnnotationService:
             raise ValueError(f"Error al procesar PDF: {str(e)}")
     
     @staticmethod
-    def _add_text_note(page: fitz.Page, x: float, y: float, text: str):
+    def _add_text_note(page: "fitz.Page", x: float, y: float, text: str):
         """Agrega una nota de texto al PDF."""
+        import fitz  # PyMuPDF
+
         # Crear rectángulo para la anotación
         # PyMuPDF usa (x0, y0, x1, y1) donde (x0,y0) es esquina superior izquierda
         rect = fitz.Rect(x, y, x + 150, y + 40)
@@ -117,8 +132,10 @@ class PDFAnnotationService:
         annot.update()
     
     @staticmethod
-    def _add_highlight(page: fitz.Page, x: float, y: float, text: str):
+    def _add_highlight(page: "fitz.Page", x: float, y: float, text: str):
         """Agrega un área de resaltado con texto."""
+        import fitz  # PyMuPDF
+
         # Crear rectángulo para el área a resaltar
         rect = fitz.Rect(x, y, x + 150, y + 20)
         
@@ -129,8 +146,10 @@ class PDFAnnotationService:
         highlight.update()
     
     @staticmethod
-    def _add_comment(page: fitz.Page, x: float, y: float, text: str):
+    def _add_comment(page: "fitz.Page", x: float, y: float, text: str):
         """Agrega un comentario con texto más largo."""
+        import fitz  # PyMuPDF
+
         # Insertar texto directamente en la página
         # Esto es más visible que una anotación
         fontsize = 10
@@ -166,6 +185,8 @@ class PDFAnnotationService:
             if not pdf_path.exists():
                 return False, "Archivo no encontrado"
             
+            import fitz  # PyMuPDF
+            
             doc = fitz.open(str(pdf_path))
             page_count = doc.page_count
             doc.close()
@@ -0,0 +1,87 @@
+"""
+Caché de permisos de usuarios sobre documentos.
+
+Dos niveles:
+- Memoización por solicitud, guardada en `db.info` (el diccionario de la
+  sesión, que vive lo mismo que la solicitud): repetir la comprobación
+  dentro de la misma solicitud no vuelve a consultar nada.
+- Caché de proceso con TTL corto, compartida entre solicitudes.
+
+Se guarda el índice del mejor nivel en PERMISSION_LEVELS (-1 si el permiso
+existe pero su nivel no es válido) o None si el usuario no tiene permiso.
+Quien modifica la tabla `permissions` debe llamar a invalidate_document
+después del commit.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_MEMO_KEY = "permission_memo"
+_MISSING = object()
+
+_permission_cache = TTLCache(
+    maxsize=settings.permission_cache_max_entries,
+    ttl=settings.permission_cache_ttl_seconds,
+)
+
+
+def _memo(db: AsyncSession) -> Dict[Tuple[int, int], Optional[int]]:
+    return db.info.setdefault(_MEMO_KEY, {})
+
+
+def lookup(
+    db: AsyncSession, user_id: int, document_ids: Iterable[int]
+) -> Tuple[Dict[int, Optional[int]], set]:
+    """
+    Busca los niveles en la memoización de la solicitud y en la caché.
+
+    Returns:
+        (niveles conocidos {document_id: índice | None}, ids sin resolver)
+    """
+    memo = _memo(db)
+    known: Dict[int, Optional[int]] = {}
+    missing = set()
+    for document_id in document_ids:
+        key = (user_id, document_id)
+        level = memo.get(key, _MISSING)
+        if level is _MISSING:
+            level = _permission_cache.get(key, _MISSING)
+            if level is not _MISSING:
+                memo[key] = level
+        if level is _MISSING:
+            missing.add(document_id)
+        else:
+            known[document_id] = level
+    return known, missing
+
+
+def remember(db: AsyncSession, user_id: int, levels: Dict[int, Optional[int]]) -> None:
+    """Guarda niveles recién consultados en ambos niveles de caché."""
+    memo = _memo(db)
+    for document_id, level in levels.items():
+        key = (user_id, document_id)
+        memo[key] = level
+        _permission_cache.set(key, level)
+
+
+def invalidate_document(document_id: int, db: Optional[AsyncSession] = None) -> None:
+    """
+    Olvida los permisos de todos los usuarios sobre un documento.
+    Llamar tras compartir, borrar o crear el documento.
+    """
+    _permission_cache.discard_where(lambda key: key[1] == document_id)
+    if db is not None:
+        memo = _memo(db)
+        for key in [key for key in memo if key[1] == document_id]:
+            del memo[key]
+
+
+def clear_permission_cache() -> None:
+    """Vacía la caché de proceso (útil en tests)."""
+    _permission_cache.clear()
@@ -0,0 +1,123 @@
+"""
+Emisión, rotación y revocación de refresh tokens.
+
+El cliente recibe un token opaco aleatorio; en la base de datos solo se
+guarda su SHA-256, así que renovar la sesión cuesta una búsqueda por índice
+en lugar de una verificación Argon2.
+"""
+
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.security import generate_reset_token, hash_reset_token
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+settings = get_settings()
+
+
+class RefreshTokenError(Exception):
+    """Refresh token inválido, expirado, revocado o reutilizado."""
+
+
+async def issue_refresh_token(
+    db: AsyncSession,
+    user: User,
+    family_id: Optional[str] = None
+) -> str:
+    """
+    Crea un refresh token para el usuario (no hace commit).
+
+    Args:
+        family_id: Familia a la que pertenece; None inicia una nueva sesión
+
+    Returns:
+        El token en claro, que solo se entrega al cliente
+    """
+    token = generate_reset_token()
+    db.add(RefreshToken(
+        user_id=user.id,
+        token_hash=hash_reset_token(token),
+        family_id=family_id or secrets.token_hex(16),
+        expires_at=datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days),
+    ))
+    return token
+
+
+async def rotate_refresh_token(db: AsyncSession, token: str) -> Tuple[User, str]:
+    """
+    Consume un refresh token y emite el siguiente de su familia (no hace commit).
+
+    Si el token ya había sido usado (también si otra solicitud lo consume a
+    la vez), se revoca toda la familia: alguien más tiene una copia.
+
+    Raises:
+        RefreshTokenError: Si el token no es válido
+    """
+    now = datetime.utcnow()
+    stmt = (
+        select(RefreshToken, User)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == hash_reset_token(token))
+    )
+    result = await db.execute(stmt)
+    row = result.first()
+    if row is None:
+        raise RefreshTokenError("Refresh token inválido")
+
+    stored, user = row
+    if stored.revoked_at is not None:
+        await revoke_family(db, stored.family_id)
+        await db.commit()
+        raise RefreshTokenError("Refresh token ya utilizado; sesión revocada")
+    if stored.expires_at < now:
+        raise RefreshTokenError("Refresh token expirado")
+    if not user.is_active:
+        raise RefreshTokenError("Usuario inactivo")
+
+    # Consumo atómico: de dos usos simultáneos del mismo token solo uno
+    # cambia la fila; el otro es una reutilización
+    consumed = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if consumed.rowcount == 0:
+        await revoke_family(db, stored.family_id)
+        await db.commit()
+        raise RefreshTokenError("Refresh token ya utilizado; sesión revocada")
+
+    new_token = await issue_refresh_token(db, user, stored.family_id)
+    return user, new_token
+
+
+async def revoke_family(db: AsyncSession, family_id: str) -> None:
+    """Revoca todos los tokens de una sesión (no hace commit)."""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+async def revoke_token(db: AsyncSession, token: str) -> None:
+    """Cierra la sesión del token indicado (no hace commit). No falla si no existe."""
+    stmt = select(RefreshToken.family_id).where(RefreshToken.token_hash == hash_reset_token(token))
+    family_id = (await db.execute(stmt)).scalar_one_or_none()
+    if family_id:
+        await revoke_family(db, family_id)
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: int) -> None:
+    """Revoca todas las sesiones de un usuario (no hace commit)."""
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
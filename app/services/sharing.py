@@ -0,0 +1,56 @@
+"""
+Alta masiva de permisos con un único INSERT ... ON CONFLICT.
+"""
+
+from datetime import datetime
+from typing import Iterable, Set, Tuple
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Permission
+
+_INSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+
+async def upsert_permissions(
+    db: AsyncSession,
+    pairs: Iterable[Tuple[int, int]],
+    permission_level: str,
+) -> Set[Tuple[int, int]]:
+    """
+    Crea o actualiza el permiso de cada par (document_id, user_id) con una
+    sola sentencia, apoyada en la restricción uq_permissions_user_document.
+    Nunca rebaja un permiso 'owner'. No hace commit.
+
+    Returns:
+        Pares efectivamente creados o actualizados (los omitidos son de propietarios)
+    """
+    rows = [
+        {
+            "document_id": document_id,
+            "user_id": user_id,
+            "permission_level": permission_level,
+            "created_at": datetime.utcnow(),
+        }
+        for document_id, user_id in pairs
+    ]
+    if not rows:
+        return set()
+
+    dialect = (await db.connection()).dialect.name
+    try:
+        insert = _INSERTS[dialect]
+    except KeyError:
+        raise NotImplementedError(f"Upsert de permisos no soportado en {dialect}")
+
+    stmt = insert(Permission).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Permission.user_id, Permission.document_id],
+        set_={"permission_level": stmt.excluded.permission_level},
+        where=Permission.permission_level != "owner",
+    ).returning(Permission.document_id, Permission.user_id)
+
+    result = await db.execute(stmt)
+    return {(document_id, user_id) for document_id, user_id in result.all()}
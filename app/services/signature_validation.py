@@ -0,0 +1,254 @@
+"""
+Contexto de validación de firmas reutilizable y caché de resultados.
+
+Las entradas inmutables de la validación (raíces de confianza, certificados
+intermedios, CRLs y OCSP locales) se cargan una sola vez por proceso; el
+ValidationContext se construye en cada validación, porque fija el instante
+de validación al crearse y guarda estado mutable que no debe compartirse
+entre hilos. Los resultados se cachean por el SHA-256 del PDF más la huella
+de la política, de modo que revalidar un documento ya visto es una simple
+consulta a memoria.
+"""
+
+import hashlib
+import logging
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
+
+from asn1crypto import crl as asn1_crl, ocsp as asn1_ocsp, pem, x509 as asn1_x509
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+
+# pyHanko se carga en el primer uso (ver app/api/v1/endpoints/signature.py)
+if TYPE_CHECKING:
+    from pyhanko.sign.validation import ValidationContext
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+_CERT_SUFFIXES = {".pem", ".crt", ".cer", ".der"}
+
+
+@dataclass
+class RevocationData:
+    """Certificados intermedios, CRLs y respuestas OCSP disponibles localmente."""
+    certs: List[asn1_x509.Certificate] = field(default_factory=list)
+    crls: List[asn1_crl.CertificateList] = field(default_factory=list)
+    ocsps: List[asn1_ocsp.OCSPResponse] = field(default_factory=list)
+    fingerprint: bytes = b""
+
+
+def _load_der_objects(data: bytes) -> List[bytes]:
+    """Devuelve los objetos DER de un archivo PEM (uno o varios) o DER."""
+    if pem.detect(data):
+        return [der_bytes for _, _, der_bytes in pem.unarmor(data, multiple=True)]
+    return [data]
+
+_validation_cache = TTLCache(
+    maxsize=settings.validation_cache_max_entries,
+    ttl=settings.validation_cache_ttl_seconds,
+)
+
+
+@lru_cache()
+def get_trust_roots() -> Optional[List[asn1_x509.Certificate]]:
+    """
+    Carga las raíces de confianza configuradas (una sola vez por proceso).
+    
+    Returns:
+        Lista de certificados, o None para usar el almacén del sistema
+    """
+    if not settings.signature_trust_roots_dir:
+        return None
+    
+    roots = []
+    for path in sorted(Path(settings.signature_trust_roots_dir).iterdir()):
+        if path.suffix.lower() not in _CERT_SUFFIXES:
+            continue
+        try:
+            for der_bytes in _load_der_objects(path.read_bytes()):
+                roots.append(asn1_x509.Certificate.load(der_bytes))
+        except Exception as e:
+            logger.warning(f"No se pudo cargar la raíz de confianza {path}: {e}")
+    
+    logger.info(f"{len(roots)} raíces de confianza cargadas de {settings.signature_trust_roots_dir}")
+    return roots
+
+
+@lru_cache()
+def get_revocation_data() -> RevocationData:
+    """
+    Carga la caché local de datos de revocación (una sola vez por proceso).
+    
+    Permite firmar en modo LTV y validar sin acceder a la red: los OCSP/CRL
+    se obtienen de archivos en lugar de consultar a las autoridades.
+    """
+    data = RevocationData()
+    if not settings.revocation_data_dir:
+        return data
+    
+    h = hashlib.sha256()
+    for path in sorted(Path(settings.revocation_data_dir).iterdir()):
+        suffix = path.suffix.lower()
+        try:
+            raw = path.read_bytes()
+            if suffix in _CERT_SUFFIXES:
+                data.certs.extend(asn1_x509.Certificate.load(d) for d in _load_der_objects(raw))
+            elif suffix == ".crl":
+                data.crls.extend(asn1_crl.CertificateList.load(d) for d in _load_der_objects(raw))
+            elif suffix == ".ocsp":
+                data.ocsps.append(asn1_ocsp.OCSPResponse.load(raw))
+            else:
+                continue
+            h.update(hashlib.sha256(raw).digest())
+        except Exception as e:
+            logger.warning(f"No se pudieron cargar datos de revocación de {path}: {e}")
+    
+    data.fingerprint = h.digest()
+    logger.info(
+        f"Datos de revocación locales: {len(data.certs)} certificados, "
+        f"{len(data.crls)} CRLs, {len(data.ocsps)} respuestas OCSP"
+    )
+    return data
+
+
+@lru_cache()
+def policy_fingerprint() -> str:
+    """
+    Huella de la política de validación: raíces de confianza y modo de revocación.
+    Cambiar cualquiera de ellos invalida los resultados cacheados.
+    """
+    h = hashlib.sha256()
+    roots = get_trust_roots()
+    if roots is None:
+        h.update(b"system-trust")
+    else:
+        for fp in sorted(cert.sha256 for cert in roots):
+            h.update(fp)
+    h.update(get_revocation_data().fingerprint)
+    h.update(f"|fetch={settings.signature_allow_fetching}".encode())
+    h.update(f"|revocation={settings.signature_revocation_mode}".encode())
+    return h.hexdigest()
+
+
+def _now() -> datetime:
+    """Instante de validación (separado para poder fijarlo en los tests)."""
+    return datetime.now(timezone.utc)
+
+
+def _trust_roots_arg() -> Optional[List[asn1_x509.Certificate]]:
+    roots = get_trust_roots()
+    return list(roots) if roots is not None else None  # None = almacén del sistema
+
+
+def build_validation_context(moment: Optional[datetime] = None) -> "ValidationContext":
+    """
+    Contexto de validación nuevo para una validación concreta.
+    
+    Args:
+        moment: Instante en que se juzga la validez (por defecto, ahora)
+    """
+    from pyhanko.sign.validation import ValidationContext
+
+    revocation = get_revocation_data()
+    return ValidationContext(
+        trust_roots=_trust_roots_arg(),
+        other_certs=list(revocation.certs),
+        crls=list(revocation.crls),
+        ocsps=list(revocation.ocsps),
+        allow_fetching=settings.signature_allow_fetching,
+        revocation_mode=settings.signature_revocation_mode,
+        moment=moment or _now(),
+    )
+
+
+def build_ltv_signing_context() -> "ValidationContext":
+    """
+    Contexto usado al firmar en modo LTV para reunir la cadena de certificados
+    y los datos de revocación que se incrustan en el DSS del documento.
+    
+    Se construye por firma: la recolección de revocación modifica el
+    contexto y no debe compartirse entre hilos.
+    """
+    from pyhanko.sign.validation import ValidationContext
+
+    revocation = get_revocation_data()
+    return ValidationContext(
+        trust_roots=_trust_roots_arg(),
+        other_certs=list(revocation.certs),
+        crls=list(revocation.crls),
+        ocsps=list(revocation.ocsps),
+        allow_fetching=settings.ltv_allow_fetching,
+        revocation_mode="hard-fail"
+    )
+
+
+def build_dss_validation_context(reader, moment: Optional[datetime] = None) -> Optional["ValidationContext"]:
+    """
+    Contexto de validación a partir del DSS incrustado en el PDF (firmas LTV).
+    
+    Con la cadena y la revocación ya incluidas en el documento, la validación
+    se hace completamente offline.
+    
+    Returns:
+        El contexto, o None si el documento no tiene DSS
+    """
+    from pyhanko.sign.validation.dss import DocumentSecurityStore, NoDSSFoundError
+
+    try:
+        dss = DocumentSecurityStore.read_dss(reader)
+    except NoDSSFoundError:
+        return None
+    
+    revocation = get_revocation_data()
+    return dss.as_validation_context(
+        {
+            "trust_roots": _trust_roots_arg(),
+            "other_certs": list(revocation.certs),
+            "allow_fetching": False,
+            "revocation_mode": settings.signature_revocation_mode,
+            "moment": moment or _now(),
+        },
+        include_revinfo=True
+    )
+
+
+def content_digest(data: bytes) -> str:
+    """SHA-256 hexadecimal del contenido del archivo."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_cached_validation(digest: str) -> Optional[dict]:
+    """Devuelve el resultado cacheado para el PDF con ese hash, si existe."""
+    result = _validation_cache.get((digest, policy_fingerprint()))
+    return dict(result) if result is not None else None
+
+
+def store_validation(
+    digest: str,
+    result: dict,
+    cert_not_after: Optional[datetime] = None
+) -> None:
+    """
+    Cachea un resultado de validación.
+    
+    El tiempo de vida nunca supera la validez del certificado firmante: un
+    resultado "válido" no debe sobrevivir a la expiración del certificado.
+    """
+    ttl = settings.validation_cache_ttl_seconds
+    if cert_not_after is not None:
+        remaining = (cert_not_after - datetime.now(timezone.utc)).total_seconds()
+        ttl = min(ttl, remaining)
+    if ttl <= 0:
+        return
+    _validation_cache.set((digest, policy_fingerprint()), dict(result), ttl=ttl)
+
+
+def clear_validation_cache() -> None:
+    """Descarta todos los resultados cacheados."""
+    _validation_cache.clear()
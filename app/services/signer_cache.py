@@ -0,0 +1,109 @@
+"""
+Caché de firmantes (SimpleSigner) cargados desde certificados PKCS#12.
+
+Descifrar un P12 implica una derivación de clave costosa; al cachear el
+firmante ya cargado, las firmas repetidas con el mismo certificado dejan
+de pagar ese coste. Los certificados se cargan desde bytes, sin pasar por
+archivos temporales en disco.
+"""
+
+import hashlib
+import hmac
+import secrets
+from typing import TYPE_CHECKING, Optional
+
+from asn1crypto import keys as asn1_keys, x509 as asn1_x509
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    pkcs12,
+)
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+
+# pyHanko se carga en el primer uso (ver app/api/v1/endpoints/signature.py)
+if TYPE_CHECKING:
+    from pyhanko.sign import signers
+
+settings = get_settings()
+
+# Secreto por proceso: las claves de la caché no permiten recuperar ni
+# contrastar offline la contraseña del certificado.
+_CACHE_SECRET = secrets.token_bytes(32)
+
+
+_signer_cache = TTLCache(
+    maxsize=settings.signer_cache_max_entries,
+    ttl=settings.signer_cache_ttl_seconds,
+)
+
+
+def signer_cache_key(p12_bytes: bytes, password: Optional[str]) -> str:
+    """
+    Clave de caché: HMAC-SHA256 de los bytes del certificado más la contraseña.
+    """
+    mac = hmac.new(_CACHE_SECRET, digestmod=hashlib.sha256)
+    mac.update(hashlib.sha256(p12_bytes).digest())
+    mac.update(b"\x00")
+    mac.update((password or "").encode())
+    return mac.hexdigest()
+
+
+def load_signer_from_bytes(p12_bytes: bytes, password: Optional[str]) -> "signers.SimpleSigner":
+    """
+    Carga un SimpleSigner directamente desde los bytes de un P12/PFX.
+    
+    Raises:
+        ValueError: Si la contraseña es incorrecta o el archivo está dañado
+    """
+    try:
+        private_key, cert, additional_certs = pkcs12.load_key_and_certificates(
+            p12_bytes,
+            password.encode() if password else None
+        )
+    except Exception as e:
+        raise ValueError(f"Error al cargar certificado (posible contraseña incorrecta): {e}")
+    
+    if private_key is None or cert is None:
+        raise ValueError("El archivo P12 no contiene clave privada y certificado")
+    
+    from pyhanko.sign import signers
+    from pyhanko_certvalidator.registry import SimpleCertificateStore
+    
+    signing_key = asn1_keys.PrivateKeyInfo.load(
+        private_key.private_bytes(Encoding.DER, PrivateFormat.PKCS8, NoEncryption())
+    )
+    signing_cert = asn1_x509.Certificate.load(cert.public_bytes(Encoding.DER))
+    chain = [
+        asn1_x509.Certificate.load(c.public_bytes(Encoding.DER))
+        for c in (additional_certs or [])
+    ]
+    
+    return signers.SimpleSigner(
+        signing_cert=signing_cert,
+        signing_key=signing_key,
+        cert_registry=SimpleCertificateStore.from_certs([signing_cert] + chain),
+    )
+
+
+def get_signer(p12_bytes: bytes, password: Optional[str]) -> "signers.SimpleSigner":
+    """
+    Devuelve el firmante del certificado, cargándolo solo si no está en caché.
+    """
+    # Las claves privadas expiradas no deben quedarse en memoria esperando
+    # a ser consultadas de nuevo
+    _signer_cache.purge_expired()
+    
+    key = signer_cache_key(p12_bytes, password)
+    signer = _signer_cache.get(key)
+    if signer is None:
+        signer = load_signer_from_bytes(p12_bytes, password)
+        _signer_cache.set(key, signer)
+    return signer
+
+
+def clear_signer_cache() -> None:
+    """Descarta todos los firmantes cacheados."""
+    _signer_cache.clear()
@@ -0,0 +1,107 @@
+"""
+Caché de usuarios autenticados.
+
+get_current_user resolvía el usuario con una consulta por solicitud. Aquí
+se cachean los valores de las columnas de los usuarios activos, con clave
+el sujeto del token: ("id", user_id) o, para tokens antiguos cuyo 'sub' es
+el email, ("email", email). En un acierto se reconstruye el User y se
+adjunta a la sesión con merge(load=False), sin ir a la base de datos.
+
+Cualquier UPDATE o DELETE de un usuario hecho por el ORM (desactivación,
+cambio de rol, restablecimiento de contraseña...) invalida su entrada. El
+flush solo anota el usuario en session.info; la entrada se borra después
+del commit. Borrarla en el flush dejaría una ventana hasta el commit en la
+que otra solicitud volvería a cachear los valores antiguos. Las sentencias
+UPDATE masivas no disparan esos eventos: quien las use debe llamar a
+invalidate_user tras el commit. Con varios procesos, el TTL acota el desfase.
+"""
+
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.models.user import User
+from app.schemas.token import TokenData
+
+settings = get_settings()
+
+# Clave de session.info con los usuarios modificados en la transacción
+_DIRTY_KEY = "user_cache_dirty"
+
+_user_cache = TTLCache(
+    maxsize=settings.user_cache_max_entries,
+    ttl=settings.user_cache_ttl_seconds,
+)
+
+
+def _cache_key(token_data: TokenData) -> Hashable:
+    if token_data.user_id is not None:
+        return ("id", token_data.user_id)
+    return ("email", token_data.email)
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    return {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+async def get_active_user(db: AsyncSession, token_data: TokenData) -> Optional[User]:
+    """
+    Devuelve el usuario del token, desde la caché si es posible.
+    Solo se cachean usuarios activos; los inactivos siempre se consultan.
+    """
+    key = _cache_key(token_data)
+    values = _user_cache.get(key)
+    if values is not None:
+        user = User(**values)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    if token_data.user_id is not None:
+        stmt = select(User).where(User.id == token_data.user_id)
+    else:
+        stmt = select(User).where(User.email == token_data.email)
+    result = await db.execute(stmt)
+    user = result.scalar_one_or_none()
+
+    if user is not None and user.is_active:
+        _user_cache.set(key, _snapshot(user))
+    return user
+
+
+def invalidate_user(user_id: int, *emails: Optional[str]) -> None:
+    """Olvida un usuario (por id y por cada email indicado)."""
+    _user_cache.pop(("id", user_id))
+    for email in emails:
+        if email:
+            _user_cache.pop(("email", email))
+
+
+def clear_user_cache() -> None:
+    """Vacía la caché (útil en tests)."""
+    _user_cache.clear()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_changed(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    # Incluye el email anterior si ha cambiado
+    emails = (target.email, *(state.attrs.email.history.deleted or ()))
+    state.session.info.setdefault(_DIRTY_KEY, {}).setdefault(target.id, set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for user_id, emails in session.info.pop(_DIRTY_KEY, {}).items():
+        invalidate_user(user_id, *emails)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction) -> None:
+    # Un savepoint revertido no deshace los cambios de la transacción exterior
+    if previous_transaction.parent is None:
+        session.info.pop(_DIRTY_KEY, None)
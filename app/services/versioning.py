@@ -0,0 +1,88 @@
+"""
+Creación de versiones de documentos.
+
+Cada documento guarda un puntero a su versión actual (latest_version_id) y un
+contador de versiones (version_seq). Crear una versión actualiza solo la fila
+del documento y la de la versión anterior, en lugar de todas las versiones.
+"""
+
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import Document, Version
+
+
+def next_version_number(last_version_number: Optional[str], suffix: str = "") -> str:
+    """
+    Calcula el siguiente número de versión a partir del último.
+    Ej: ("v1.2-signed", "-annotated") -> "v1.3-annotated".
+    """
+    if not last_version_number:
+        return f"v1.0{suffix}"
+    try:
+        v_num = last_version_number.replace('v', '').split('-')[0]
+        parts = v_num.split('.')
+        major = int(parts[0])
+        minor = int(parts[1]) if len(parts) > 1 else 0
+        return f"v{major}.{minor + 1}{suffix}"
+    except (ValueError, IndexError):
+        return f"v1.1{suffix}"
+
+
+async def add_version(
+    db: AsyncSession,
+    document: Document,
+    *,
+    file_path: str,
+    file_size: int,
+    suffix: str = "",
+    mime_type: str = "application/pdf"
+) -> Version:
+    """
+    Crea una nueva versión y la marca como actual. No hace commit.
+    
+    El incremento del contador se hace con un UPDATE ... RETURNING sobre la
+    fila del documento, que la bloquea hasta el commit. El número de versión
+    (next_version_number de la actual más `suffix`) se calcula después, ya
+    con el bloqueo: dos versiones concurrentes del mismo documento se
+    serializan y la segunda parte de la que dejó la primera.
+    """
+    result = await db.execute(
+        update(Document)
+        .where(Document.id == document.id)
+        .values(version_seq=Document.version_seq + 1)
+        .returning(Document.version_seq, Document.latest_version_id)
+        .execution_options(synchronize_session=False)
+    )
+    sequence, previous_latest_id = result.one()
+
+    previous_number = None
+    if previous_latest_id is not None:
+        previous_number = (await db.execute(
+            select(Version.version_number).where(Version.id == previous_latest_id)
+        )).scalar_one_or_none()
+        # Desmarcar solo la versión que era la actual
+        await db.execute(
+            update(Version)
+            .where(Version.id == previous_latest_id)
+            .values(is_latest=False)
+        )
+
+    version = Version(
+        document_id=document.id,
+        sequence=sequence,
+        version_number=next_version_number(previous_number, suffix),
+        file_path=file_path,
+        file_size=file_size,
+        mime_type=mime_type,
+        is_latest=True
+    )
+    db.add(version)
+    await db.flush()  # Para obtener el ID
+
+    document.latest_version_id = version.id
+    set_committed_value(document, "version_seq", sequence)
+    return version
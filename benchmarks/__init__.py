@@ -0,0 +1,3 @@
+"""
+Benchmarks y herramientas de carga (no forman parte de la aplicación).
+"""
@@ -0,0 +1,70 @@
+"""
+Tiempo de importación de la aplicación, por módulo.
+
+Ejecuta `python -X importtime` en un proceso nuevo (sin cachés de módulos)
+y lista los módulos con mayor tiempo acumulado. Las dependencias pesadas
+(pyHanko, PyMuPDF, aiosmtplib) se cargan en el primer uso, así que no
+deberían aparecer al importar app.main.
+
+Uso:
+    python -m benchmarks.bench_import --module app.main --top 25
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Módulos que solo deben cargarse al firmar, validar, anotar o enviar correo
+LAZY_MODULES = ("fitz", "pymupdf", "pyhanko", "pyhanko_certvalidator", "fastapi_mail", "aiosmtplib")
+
+
+def measure_imports(module: str, cwd: Optional[Path] = None) -> Tuple[Dict[str, float], List[str]]:
+    """
+    Importa `module` en un intérprete nuevo.
+
+    Returns:
+        (segundos acumulados por módulo, módulos perezosos que se cargaron)
+    """
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd or ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    cumulative: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        cumulative[name] = max(cumulative.get(name, 0.0), int(cumulative_us) / 1_000_000)
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="Módulo a importar")
+    parser.add_argument("--top", type=int, default=25, help="Módulos a mostrar")
+    args = parser.parse_args()
+
+    cumulative, loaded = measure_imports(args.module)
+    print(f"{args.module}: {cumulative.get(args.module, 0.0):.3f} s\n")
+    print(f"{'acumulado (s)':>14}  módulo")
+    for name, seconds in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"{seconds:>14.3f}  {name}")
+    if loaded:
+        print(f"\nAviso: se cargaron módulos que deberían ser perezosos: {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark de memoria: pico de RSS de cada etapa de los pipelines de PDF
+según el tamaño del documento.
+
+Cada medición se ejecuta en un proceso nuevo, de modo que el RSS máximo
+corresponde solo a esa etapa. Se informa también del pico de tracemalloc
+(memoria asignada desde Python); la diferencia con el RSS es, sobre todo,
+memoria nativa de MuPDF y de las librerías criptográficas.
+
+Sirve para dimensionar los contenedores: el RSS pico de la etapa más cara
+por el número de workers que la ejecutan a la vez.
+
+Uso:
+    python -m benchmarks.bench_memory --sizes-mb 1 10 50 --stages annotate sign
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.bench_signing import _max_rss_mb
+
+PASSWORD = "benchmark"
+STAGES = ("persist", "annotate", "sign", "validate")
+
+
+def _run_stage(stage: str, source: str, work_dir: str, p12_bytes: bytes, queue) -> None:
+    # Importar antes de medir: el coste de los módulos no es de la etapa
+    from app.api.v1.endpoints import signature
+    from app.services.pdf_annotation import PDFAnnotationService
+
+    source_path = Path(source)
+    output = Path(work_dir) / f"{stage}_output.pdf"
+    signed = Path(work_dir) / "signed.pdf"
+
+    if stage == "validate":
+        # Se valida un documento firmado (la firma se prepara fuera de la medición)
+        if not signed.exists():
+            signature._sign_pdf_task(source, str(signed), p12_bytes, PASSWORD)
+    signer = signature.get_signer(p12_bytes, PASSWORD) if stage == "sign" else None
+
+    baseline = _max_rss_mb()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    if stage == "persist":
+        # Lo que hace upload_file: el PDF completo en memoria y copia a disco
+        content = source_path.read_bytes()
+        output.write_bytes(content)
+    elif stage == "annotate":
+        PDFAnnotationService.add_annotations(
+            input_pdf_path=source_path,
+            output_pdf_path=output,
+            annotations=[{"x": 100, "y": 100, "text": "Benchmark", "type": "note", "page": 0}],
+        )
+    elif stage == "sign":
+        signature._write_signed_pdf(source, str(output), signer)
+    elif stage == "validate":
+        signature._validate_signature_task((signed.read_bytes(), 0, None))
+
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put({
+        "seconds": elapsed,
+        "baseline_mb": baseline,
+        "peak_mb": _max_rss_mb(),
+        "traced_peak_mb": traced_peak / (1024 * 1024),
+    })
+
+
+def run(sizes_mb, stages) -> None:
+    from benchmarks.fixtures import make_pdf, make_self_signed_p12
+
+    ctx = multiprocessing.get_context("spawn")
+    p12_bytes = make_self_signed_p12(PASSWORD)
+
+    print(
+        f"{'tamaño (MB)':>12}{'etapa':>10}{'tiempo (s)':>12}{'RSS base (MB)':>16}"
+        f"{'RSS pico (MB)':>16}{'Δ RSS (MB)':>12}{'tracemalloc (MB)':>18}"
+    )
+    for size_mb in sizes_mb:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = make_pdf(Path(tmp) / "source.pdf", size_mb)
+            actual_mb = source.stat().st_size / (1024 * 1024)
+            for stage in stages:
+                queue = ctx.Queue()
+                proc = ctx.Process(target=_run_stage, args=(stage, str(source), tmp, p12_bytes, queue))
+                proc.start()
+                proc.join()
+                if proc.exitcode != 0:
+                    print(f"{actual_mb:>12.1f}{stage:>10}  falló (exit code {proc.exitcode})")
+                    continue
+                r = queue.get()
+                print(
+                    f"{actual_mb:>12.1f}{stage:>10}{r['seconds']:>12.2f}{r['baseline_mb']:>16.1f}"
+                    f"{r['peak_mb']:>16.1f}{r['peak_mb'] - r['baseline_mb']:>12.1f}{r['traced_peak_mb']:>18.1f}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 10, 50], help="Tamaños de PDF a probar")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES), help="Etapas a medir")
+    args = parser.parse_args()
+    run(args.sizes_mb, args.stages)
+
+
+if __name__ == "__main__":
+    main()
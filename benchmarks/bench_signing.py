@@ -0,0 +1,81 @@
+"""
+Benchmark de firma: ruta estándar vs. ruta para archivos grandes (mmap +
+escritura directa a disco).
+
+Cada medición se ejecuta en un proceso nuevo para que el pico de memoria
+(RSS máximo) de una no contamine a la otra.
+
+Uso:
+    python -m benchmarks.bench_signing --size-mb 300 --runs 3
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PASSWORD = "benchmark"
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _sign_once(mode: str, source: str, output: str, p12_bytes: bytes, queue) -> None:
+    from app.api.v1.endpoints.signature import _write_signed_pdf
+    from app.services.signer_cache import load_signer_from_bytes
+
+    signer = load_signer_from_bytes(p12_bytes, PASSWORD)
+    baseline = _max_rss_mb()
+    start = time.perf_counter()
+    _write_signed_pdf(source, output, signer, large_file=(mode == "large"))
+    elapsed = time.perf_counter() - start
+    queue.put({"mode": mode, "seconds": elapsed, "baseline_mb": baseline, "peak_mb": _max_rss_mb()})
+
+
+def run(size_mb: float, runs: int) -> None:
+    from benchmarks.fixtures import make_pdf, make_self_signed_p12
+
+    ctx = multiprocessing.get_context("spawn")
+    p12_bytes = make_self_signed_p12(PASSWORD)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        source = make_pdf(tmp_dir / "source.pdf", size_mb)
+        actual_mb = source.stat().st_size / (1024 * 1024)
+        print(f"PDF de prueba: {actual_mb:.1f} MB, {runs} ejecución(es) por modo\n")
+        print(f"{'modo':<10}{'tiempo (s)':>12}{'RSS base (MB)':>16}{'RSS pico (MB)':>16}")
+
+        for mode in ("standard", "large"):
+            for i in range(runs):
+                queue = ctx.Queue()
+                output = tmp_dir / f"signed_{mode}_{i}.pdf"
+                proc = ctx.Process(
+                    target=_sign_once,
+                    args=(mode, str(source), str(output), p12_bytes, queue),
+                )
+                proc.start()
+                proc.join()
+                if proc.exitcode != 0:
+                    print(f"{mode:<10} falló (exit code {proc.exitcode})")
+                    continue
+                r = queue.get()
+                print(f"{r['mode']:<10}{r['seconds']:>12.2f}{r['baseline_mb']:>16.1f}{r['peak_mb']:>16.1f}")
+                output.unlink(missing_ok=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=100, help="Tamaño del PDF generado")
+    parser.add_argument("--runs", type=int, default=1, help="Ejecuciones por modo")
+    args = parser.parse_args()
+    run(args.size_mb, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Generadores de datos de prueba para benchmarks: certificados P12 autofirmados
+y PDFs sintéticos de tamaño configurable.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+
+def make_self_signed_p12(password: str = "benchmark", common_name: str = "Benchmark Signer") -> bytes:
+    """
+    Genera un certificado autofirmado con su clave en formato PKCS#12.
+    """
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives.serialization import pkcs12
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=365))
+        .add_extension(
+            x509.KeyUsage(
+                digital_signature=True, content_commitment=True, key_encipherment=False,
+                data_encipherment=False, key_agreement=False, key_cert_sign=False,
+                crl_sign=False, encipher_only=False, decipher_only=False
+            ),
+            critical=True,
+        )
+        .sign(key, hashes.SHA256())
+    )
+    return pkcs12.serialize_key_and_certificates(
+        name=common_name.encode(),
+        key=key,
+        cert=cert,
+        cas=None,
+        encryption_algorithm=serialization.BestAvailableEncryption(password.encode()),
+    )
+
+
+def make_pdf(path: Path, size_mb: float, page_side: int = 1024) -> Path:
+    """
+    Genera un PDF de aproximadamente size_mb megabytes.
+    
+    Cada página lleva una imagen de ruido aleatorio (incompresible), como un
+    escaneo, para que el tamaño del archivo sea el pedido.
+    """
+    import fitz  # PyMuPDF
+
+    page_bytes = page_side * page_side * 3
+    pages = max(1, int(size_mb * 1024 * 1024 / page_bytes))
+
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        pix = fitz.Pixmap(fitz.csRGB, page_side, page_side, os.urandom(page_bytes), False)
+        page.insert_image(page.rect, pixmap=pix)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def make_docx(path: Path, paragraphs: int = 20) -> Path:
+    """
+    Genera un .docx mínimo (solo texto) para probar la conversión a PDF.
+    """
+    import zipfile
+    from xml.sax.saxutils import escape
+
+    body = "".join(
+        f"<w:p><w:r><w:t>{escape(f'Párrafo {i} de prueba de carga.')}</w:t></w:r></w:p>"
+        for i in range(paragraphs)
+    )
+    files = {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            "</Types>"
+        ),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="word/document.xml"/>'
+            "</Relationships>"
+        ),
+        "word/document.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f"<w:body>{body}</w:body></w:document>"
+        ),
+    }
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return path
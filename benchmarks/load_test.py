@@ -0,0 +1,331 @@
+"""
+Prueba de carga de la API con httpx asíncrono.
+
+1. Registra usuarios sintéticos y sube a cada uno un corpus de PDFs generados.
+2. Durante --duration segundos lanza solicitudes a --rate por segundo (carga
+   en bucle abierto: las llegadas no esperan a que terminen las anteriores),
+   eligiendo la operación según los pesos de --mix.
+3. Informa, por operación, de solicitudes, errores, rendimiento y percentiles
+   de latencia. La latencia se mide desde la llegada programada, incluida la
+   espera por un hueco de --concurrency.
+
+Sin --base-url la aplicación se ejecuta en el mismo proceso (ASGITransport)
+sobre una base de datos SQLite y un directorio de subidas temporales; con
+--base-url se ataca un servidor en marcha.
+
+Uso:
+    python -m benchmarks.load_test --users 10 --rate 20 --duration 60
+    python -m benchmarks.load_test --base-url http://localhost:8000 \\
+        --mix my_documents=5,download=3,upload=1,sign=1
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import tempfile
+import time
+import uuid
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+PASSWORD = "loadtest123"
+P12_PASSWORD = "benchmark"
+
+DEFAULT_MIX = {
+    "my_documents": 5,
+    "download": 4,
+    "upload": 2,
+    "annotate": 2,
+    "sign": 1,
+    "validate": 1,
+    "convert": 1,
+}
+
+
+@dataclass
+class SyntheticUser:
+    headers: Dict[str, str]
+    document_ids: List[int] = field(default_factory=list)
+    version_ids: List[int] = field(default_factory=list)
+
+
+@dataclass
+class OperationStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, seconds: float, status: str, ok: bool) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil q (0-100) por el método del rango más cercano."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Operación desconocida: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, corpus: List[Path], docx: Path, p12: bytes):
+        self.client = client
+        self.corpus = corpus
+        self.docx = docx
+        self.p12 = p12
+        self.users: List[SyntheticUser] = []
+        self.stats: Dict[str, OperationStats] = {}
+
+    # --- Preparación ---
+
+    async def create_user(self, index: int) -> SyntheticUser:
+        email = f"load-{uuid.uuid4().hex[:8]}-{index}@example.com"
+        response = await self.client.post(
+            "/api/v1/auth/register", json={"email": email, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        response = await self.client.post(
+            "/api/v1/auth/login", json={"email": email, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        user = SyntheticUser(headers={"Authorization": f"Bearer {response.json()['access_token']}"})
+        self.users.append(user)
+        return user
+
+    async def setup(self, users: int, documents_per_user: int) -> None:
+        created = await asyncio.gather(*(self.create_user(i) for i in range(users)))
+        uploads = [self.upload(user) for user in created for _ in range(documents_per_user)]
+        results = await asyncio.gather(*uploads, return_exceptions=True)
+        failed = sum(1 for r in results if isinstance(r, Exception))
+        if failed:
+            print(f"Aviso: fallaron {failed} de {len(uploads)} subidas del corpus")
+
+    # --- Operaciones ---
+
+    async def upload(self, user: SyntheticUser) -> httpx.Response:
+        path = random.choice(self.corpus)
+        files = {"file": (path.name, path.read_bytes(), "application/pdf")}
+        response = await self.client.post("/api/v1/files/upload", files=files, headers=user.headers)
+        response.raise_for_status()
+        document = response.json()
+        user.document_ids.append(document["id"])
+        if document.get("latest_version"):
+            user.version_ids.append(document["latest_version"]["id"])
+        return response
+
+    async def my_documents(self, user: SyntheticUser) -> httpx.Response:
+        return await self.client.get("/api/v1/files/my-documents", params={"limit": 50}, headers=user.headers)
+
+    async def download(self, user: SyntheticUser) -> Optional[httpx.Response]:
+        if not user.version_ids:
+            return None
+        version_id = random.choice(user.version_ids)
+        return await self.client.get(f"/api/v1/files/download/{version_id}", headers=user.headers)
+
+    async def annotate(self, user: SyntheticUser) -> Optional[httpx.Response]:
+        if not user.version_ids:
+            return None
+        body = {
+            "file_id": random.choice(user.version_ids),
+            "annotations": [
+                {"x": random.uniform(50, 400), "y": random.uniform(50, 700), "text": "Prueba de carga"}
+            ],
+        }
+        response = await self.client.post("/api/v1/annotations/annotate", json=body, headers=user.headers)
+        if response.status_code == 200 and response.json().get("annotated_version_id"):
+            user.version_ids.append(response.json()["annotated_version_id"])
+        return response
+
+    async def sign(self, user: SyntheticUser) -> Optional[httpx.Response]:
+        if not user.document_ids:
+            return None
+        data = {"document_id": str(random.choice(user.document_ids)), "password": P12_PASSWORD}
+        files = {"p12_file": ("signer.p12", self.p12, "application/x-pkcs12")}
+        response = await self.client.post("/documents/sign", data=data, files=files, headers=user.headers)
+        if response.status_code == 200:
+            user.version_ids.append(response.json()["id"])
+        return response
+
+    async def validate(self, user: SyntheticUser) -> httpx.Response:
+        path = random.choice(self.corpus)
+        files = {"file": (path.name, path.read_bytes(), "application/pdf")}
+        return await self.client.post("/documents/validate", files=files)
+
+    async def convert(self, user: SyntheticUser) -> httpx.Response:
+        mime = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        files = {"file": (self.docx.name, self.docx.read_bytes(), mime)}
+        return await self.client.post("/convert", files=files)
+
+    # --- Ejecución ---
+
+    async def run_operation(self, name: str, arrival: Optional[float] = None) -> None:
+        """
+        Ejecuta una operación y registra su latencia desde `arrival` (el
+        instante de llegada programado), no desde que obtuvo un hueco: así
+        las esperas por --concurrency cuentan como latencia y no se produce
+        omisión coordinada.
+        """
+        user = random.choice(self.users)
+        start = arrival if arrival is not None else time.perf_counter()
+        try:
+            response = await getattr(self, name)(user)
+        except httpx.HTTPStatusError as e:
+            response = e.response
+        except Exception as e:
+            stats = self.stats.setdefault(name, OperationStats())
+            stats.record(time.perf_counter() - start, type(e).__name__, ok=False)
+            return
+        if response is None:
+            return  # Sin datos aún para esta operación (p.ej. nada que descargar)
+        stats = self.stats.setdefault(name, OperationStats())
+        stats.record(time.perf_counter() - start, str(response.status_code), ok=response.status_code < 400)
+
+    async def run(self, mix: Dict[str, float], rate: float, duration: float, concurrency: int) -> float:
+        names = [name for name, weight in mix.items() if weight > 0]
+        weights = [mix[name] for name in names]
+        slots = asyncio.Semaphore(concurrency)
+        tasks = set()
+
+        async def limited(name: str, arrival: float) -> None:
+            async with slots:
+                await self.run_operation(name, arrival)
+
+        start = time.perf_counter()
+        arrival = start
+        while True:
+            # Llegadas de Poisson a la tasa pedida, sobre un calendario fijo:
+            # si el bucle se retrasa, las llegadas no se desplazan
+            arrival += random.expovariate(rate)
+            if arrival - start >= duration:
+                break
+            await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+            task = asyncio.create_task(limited(random.choices(names, weights)[0], arrival))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        rows = {}
+        for name, stats in sorted(self.stats.items()):
+            count = len(stats.latencies)
+            rows[name] = {
+                "requests": count,
+                "errors": stats.errors,
+                "error_rate": stats.errors / count if count else 0.0,
+                "throughput_rps": count / elapsed if elapsed else 0.0,
+                "p50_ms": percentile(stats.latencies, 50) * 1000,
+                "p90_ms": percentile(stats.latencies, 90) * 1000,
+                "p99_ms": percentile(stats.latencies, 99) * 1000,
+                "max_ms": max(stats.latencies, default=0.0) * 1000,
+                "statuses": stats.statuses,
+            }
+        return rows
+
+
+def print_report(rows: Dict[str, dict], elapsed: float) -> None:
+    print(f"\nDuración: {elapsed:.1f} s\n")
+    print(
+        f"{'operación':<14}{'solic.':>8}{'err %':>8}{'req/s':>9}"
+        f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'máx ms':>10}"
+    )
+    for name, r in rows.items():
+        print(
+            f"{name:<14}{r['requests']:>8}{r['error_rate'] * 100:>8.1f}{r['throughput_rps']:>9.2f}"
+            f"{r['p50_ms']:>10.1f}{r['p90_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}"
+        )
+    total = sum(r["requests"] for r in rows.values())
+    errors = sum(r["errors"] for r in rows.values())
+    print(f"\nTotal: {total} solicitudes, {errors} errores, {total / elapsed if elapsed else 0:.2f} req/s")
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    from benchmarks.fixtures import make_docx, make_pdf, make_self_signed_p12
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        corpus = [
+            make_pdf(tmp_dir / f"corpus_{i}.pdf", args.size_kb / 1024, page_side=256)
+            for i in range(args.corpus_files)
+        ]
+        docx = make_docx(tmp_dir / "corpus.docx")
+        p12 = make_self_signed_p12(P12_PASSWORD)
+
+        async with AsyncExitStack() as stack:
+            if args.base_url:
+                transport = None
+                base_url = args.base_url
+            else:
+                # La configuración se lee al importar la aplicación
+                os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_dir / 'load.db'}")
+                os.environ.setdefault("UPLOAD_DIR", str(tmp_dir / "uploads"))
+                os.environ.setdefault("DB_CREATE_ALL", "true")
+                from app.main import app
+
+                await stack.enter_async_context(app.router.lifespan_context(app))
+                transport = httpx.ASGITransport(app=app)
+                base_url = "http://loadtest"
+
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(base_url=base_url, transport=transport, timeout=args.timeout)
+            )
+            test = LoadTest(client, corpus, docx, p12)
+
+            start = time.perf_counter()
+            await test.setup(args.users, args.documents)
+            print(f"Preparación: {args.users} usuarios, {args.documents} documentos por usuario "
+                  f"en {time.perf_counter() - start:.1f} s")
+
+            elapsed = await test.run(args.mix, args.rate, args.duration, args.concurrency)
+            rows = test.report(elapsed)
+            print_report(rows, elapsed)
+            if args.json:
+                Path(args.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Servidor a probar (por defecto, la aplicación en proceso)")
+    parser.add_argument("--users", type=int, default=5, help="Usuarios sintéticos")
+    parser.add_argument("--documents", type=int, default=3, help="Documentos subidos por usuario antes de la carga")
+    parser.add_argument("--corpus-files", type=int, default=3, help="PDFs distintos en el corpus generado")
+    parser.add_argument("--size-kb", type=float, default=200, help="Tamaño aproximado de cada PDF")
+    parser.add_argument("--rate", type=float, default=10, help="Solicitudes por segundo (total)")
+    parser.add_argument("--duration", type=float, default=30, help="Segundos de carga")
+    parser.add_argument("--concurrency", type=int, default=50, help="Máximo de solicitudes en vuelo")
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout por solicitud (s)")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=DEFAULT_MIX,
+        help="Pesos por operación, p.ej. my_documents=5,download=3; las no indicadas "
+             f"no se ejecutan (operaciones: {', '.join(DEFAULT_MIX)})",
+    )
+    parser.add_argument("--json", help="Guardar el informe en este archivo JSON")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
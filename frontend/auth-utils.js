@@ -5,6 +5,7 @@
 const AUTH_CONFIG = {
     API_URL: window.APP_CONFIG ? window.APP_CONFIG.API_BASE_URL : 'http://localhost:8000',
     TOKEN_KEY: 'eva-access-token',
+    REFRESH_TOKEN_KEY: 'eva-refresh-token',
     USER_KEY: 'eva-user-data',
     USE_SIMULATION: false
 };
@@ -19,6 +20,34 @@ function getToken() {
     return localStorage.getItem(AUTH_CONFIG.TOKEN_KEY);
 }
 
+// Guardar refresh token (rota en cada renovación)
+function saveRefreshToken(token) {
+    if (token) localStorage.setItem(AUTH_CONFIG.REFRESH_TOKEN_KEY, token);
+}
+
+// Renovar el access token con el refresh token (sin pedir la contraseña)
+async function refreshAccessToken() {
+    const refreshToken = localStorage.getItem(AUTH_CONFIG.REFRESH_TOKEN_KEY);
+    if (!refreshToken) return false;
+
+    try {
+        const response = await fetch(`${AUTH_CONFIG.API_URL}/api/v1/auth/refresh`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ refresh_token: refreshToken })
+        });
+        if (!response.ok) return false;
+
+        const data = await response.json();
+        saveToken(data.access_token);
+        saveRefreshToken(data.refresh_token);
+        return true;
+    } catch (error) {
+        console.error('❌ Error al renovar la sesión:', error);
+        return false;
+    }
+}
+
 /**
  * Decodifica un JWT y verifica si ha expirado
  * @param {string} token - Token JWT
@@ -84,6 +113,7 @@ function isAuthenticated() {
 // Limpiar datos de autenticación (logout)
 function clearAuth() {
     localStorage.removeItem(AUTH_CONFIG.TOKEN_KEY);
+    localStorage.removeItem(AUTH_CONFIG.REFRESH_TOKEN_KEY);
     localStorage.removeItem(AUTH_CONFIG.USER_KEY);
 }
 
@@ -121,8 +151,20 @@ function logout() {
 
 // Función para limpiar datos de autenticación
 function clearAuthData() {
+    // Cerrar la sesión en el servidor (revoca el refresh token)
+    const refreshToken = localStorage.getItem(AUTH_CONFIG.REFRESH_TOKEN_KEY);
+    if (refreshToken) {
+        fetch(`${AUTH_CONFIG.API_URL}/api/v1/auth/logout`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ refresh_token: refreshToken }),
+            keepalive: true
+        }).catch(() => {});
+    }
+
     // Limpiar localStorage
     localStorage.removeItem(AUTH_CONFIG.TOKEN_KEY);
+    localStorage.removeItem(AUTH_CONFIG.REFRESH_TOKEN_KEY);
     localStorage.removeItem(AUTH_CONFIG.USER_KEY);
     localStorage.removeItem('authToken');
     localStorage.removeItem('userSession');
@@ -162,10 +204,10 @@ function initializeAuth() {
         }
 
         // Iniciar verificador de sesión cada 30 segundos
-        setInterval(() => {
+        setInterval(async () => {
             if (isTokenExpired(getToken())) {
                 console.log('⏰ Expiración detectada por el timer');
-                logout();
+                if (!(await refreshAccessToken())) logout();
             }
         }, 30000);
     }
@@ -195,6 +237,7 @@ async function loginUser(email, password) {
 
         const data = await response.json();
         saveToken(data.access_token);
+        saveRefreshToken(data.refresh_token);
 
         // Obtener datos reales del usuario
         try {
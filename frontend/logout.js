@@ -56,6 +56,7 @@ document.addEventListener('DOMContentLoaded', function() {
             // También limpiar datos específicos de la aplicación
             const appDataKeys = [
                 'eva-access-token',
+                'eva-refresh-token',
                 'eva-user-data',
                 'conversionHistory',
                 'authToken',
@@ -90,10 +90,8 @@ document.addEventListener('DOMContentLoaded', function () {
 
                 console.log('👋 Iniciando proceso de logout...');
 
-                // Paso 1: Limpiar inmediatamente los datos principales
-                localStorage.removeItem('eva-access-token');
-                localStorage.removeItem('eva-user-data');
-                sessionStorage.clear();
+                // Paso 1: Revocar el refresh token y limpiar inmediatamente los datos principales
+                clearAuthData();
 
                 // Paso 2: Cerrar el dropdown
                 dropdownMenu.classList.remove('show');
@@ -53,6 +53,77 @@ async def drop_db():
         print("✅ Tablas eliminadas")
 
 
+def _alembic_config():
+    """
+    Configuración de Alembic (alembic.ini junto a este script).
+    """
+    from pathlib import Path
+    from alembic.config import Config
+
+    return Config(str(Path(__file__).resolve().parent / "alembic.ini"))
+
+
+async def _needs_baseline_stamp() -> bool:
+    """
+    True si la BD ya tiene tablas (creadas con create_all) pero no tiene
+    historial de migraciones.
+    """
+    from sqlalchemy import inspect
+
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+    await engine.dispose()
+    return "users" in tables and "alembic_version" not in tables
+
+
+def migrate(revision: str = "head"):
+    """
+    Aplica las migraciones pendientes.
+    Las bases de datos creadas antes de las migraciones se marcan primero
+    con el esquema inicial (0001) para no recrear sus tablas.
+    """
+    from alembic import command
+
+    config = _alembic_config()
+    if asyncio.run(_needs_baseline_stamp()):
+        print("📌 Base de datos existente sin historial: marcando esquema inicial (0001)")
+        command.stamp(config, "0001")
+
+    print(f"🔄 Aplicando migraciones hasta '{revision}'...")
+    command.upgrade(config, revision)
+    print("✅ Migraciones aplicadas")
+
+
+def make_migration(message: str):
+    """
+    Genera una nueva migración comparando los modelos con la BD actual.
+    """
+    from alembic import command
+
+    command.revision(_alembic_config(), message=message, autogenerate=True)
+
+
+async def check_indexes() -> bool:
+    """
+    Muestra el plan (EXPLAIN) de las consultas frecuentes y comprueba
+    que usan índices.
+    """
+    from app.db.query_plans import explain_hot_queries
+
+    async with engine.connect() as conn:
+        report = await explain_hot_queries(conn)
+
+    all_ok = True
+    for name, entry in report.items():
+        mark = "✅" if entry["uses_index"] else "❌"
+        all_ok = all_ok and entry["uses_index"]
+        print(f"\n{mark} {name}")
+        print(f"   {entry['plan']}")
+        if entry["sorts"]:
+            print("   ⚠️  ordena las filas en memoria")
+    return all_ok
+
+
 async def create_admin_user(email: str, password: str):
     """
     Crea un usuario administrador.
@@ -133,6 +204,22 @@ async def list_users():
         print("-" * 60)
 
 
+def calibrate_argon2(target_ms: float):
+    """
+    Mide Argon2 en esta máquina y propone parámetros para el tiempo objetivo.
+    Los hashes existentes se actualizan solos en el siguiente login.
+    """
+    from app.core.security import calibrate_argon2 as calibrate
+    
+    print(f"⏱️  Calibrando Argon2 para ~{target_ms:.0f} ms por hash...")
+    params = calibrate(target_ms)
+    print(f"   Medido: {params['measured_ms']} ms")
+    print("\nAñade a tu .env:")
+    print(f"ARGON2_TIME_COST={params['time_cost']}")
+    print(f"ARGON2_MEMORY_COST={params['memory_cost']}")
+    print(f"ARGON2_PARALLELISM={params['parallelism']}")
+
+
 def main():
     """
     Función principal para procesar comandos.
@@ -148,8 +235,14 @@ def main():
         print("  create-admin      → Crear usuario admin")
         print("  create-user       → Crear usuario normal")
         print("  list-users        → Listar usuarios")
+        print("  migrate [rev]     → Aplicar migraciones (por defecto hasta 'head')")
+        print("  makemigrations    → Generar migración a partir de los modelos")
+        print("  check-indexes     → Verificar con EXPLAIN que las consultas usan índices")
+        print("  calibrate-argon2 [ms] → Proponer parámetros de Argon2 (por defecto 250 ms)")
         print("\nEjemplos:")
         print("  python manage.py init")
+        print("  python manage.py migrate")
+        print("  python manage.py makemigrations \"agregar columna X\"")
         print("  python manage.py create-admin admin@example.com micontraseña")
         print("  python manage.py create-user usuario@example.com micontraseña")
         return
@@ -182,6 +275,23 @@ def main():
         elif command == "list-users":
             asyncio.run(list_users())
         
+        elif command == "migrate":
+            migrate(sys.argv[2] if len(sys.argv) > 2 else "head")
+        
+        elif command == "makemigrations":
+            if len(sys.argv) < 3:
+                print("❌ Uso: python manage.py makemigrations \"<descripción>\"")
+                return
+            make_migration(sys.argv[2])
+        
+        elif command == "check-indexes":
+            if not asyncio.run(check_indexes()):
+                print("\n❌ Hay consultas frecuentes que recorren tablas completas")
+                sys.exit(1)
+        
+        elif command == "calibrate-argon2":
+            calibrate_argon2(float(sys.argv[2]) if len(sys.argv) > 2 else 250.0)
+        
         else:
             print(f"❌ Comando desconocido: {command}")
             print("Use 'python manage.py' sin argumentos para ver la ayuda")
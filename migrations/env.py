@@ -0,0 +1,58 @@
+"""
+Entorno de Alembic para migraciones asíncronas.
+Usa el mismo engine (y ajustes por backend) que la aplicación.
+"""
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import create_engine_from_url
+import app.models  # noqa: F401  (registra los modelos en Base.metadata)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+settings = get_settings()
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Genera el SQL de las migraciones sin conectarse a la base de datos."""
+    context.configure(
+        url=settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection) -> None:
+    # render_as_batch: SQLite necesita recrear la tabla para alterar constraints
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    connectable = create_engine_from_url(settings.database_url)
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,73 @@
+"""Índices para las consultas frecuentes y permiso único por (usuario, documento)
+
+- permissions: restricción única (user_id, document_id), que sirve las
+  búsquedas de verify_document_access y las del listado por usuario, más un
+  índice (document_id, user_id) para las consultas por documento.
+- versions: índice (document_id, created_at) para obtener la última versión.
+
+Antes de crear la restricción única se eliminan los permisos duplicados,
+conservando el de mayor nivel.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    names = {ix["name"] for ix in inspector.get_indexes(table)}
+    names |= {uc["name"] for uc in inspector.get_unique_constraints(table)}
+    return names
+
+
+def upgrade() -> None:
+    # 1. Eliminar permisos duplicados (se conserva el de mayor nivel)
+    op.execute(
+        """
+        DELETE FROM permissions
+        WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id
+                FROM permissions p
+                WHERE (CASE permission_level
+                           WHEN 'owner' THEN 3 WHEN 'editor' THEN 2 WHEN 'viewer' THEN 1 ELSE 0
+                       END) = (
+                    SELECT MAX(CASE p2.permission_level
+                                   WHEN 'owner' THEN 3 WHEN 'editor' THEN 2 WHEN 'viewer' THEN 1 ELSE 0
+                               END)
+                    FROM permissions p2
+                    WHERE p2.user_id = p.user_id AND p2.document_id = p.document_id
+                )
+                GROUP BY user_id, document_id
+            ) AS keep
+        )
+        """
+    )
+
+    existing = _indexes("permissions")
+    if "uq_permissions_user_document" not in existing:
+        with op.batch_alter_table("permissions") as batch:
+            batch.create_unique_constraint(
+                "uq_permissions_user_document", ["user_id", "document_id"]
+            )
+    if "ix_permissions_document_user" not in existing:
+        op.create_index("ix_permissions_document_user", "permissions", ["document_id", "user_id"])
+
+    if "ix_versions_document_created" not in _indexes("versions"):
+        op.create_index("ix_versions_document_created", "versions", ["document_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_versions_document_created", table_name="versions")
+    op.drop_index("ix_permissions_document_user", table_name="permissions")
+    with op.batch_alter_table("permissions") as batch:
+        batch.drop_constraint("uq_permissions_user_document", type_="unique")
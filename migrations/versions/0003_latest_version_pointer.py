@@ -0,0 +1,108 @@
+"""Puntero a la versión actual y secuencia de versiones por documento
+
+- documents.latest_version_id: versión actual (evita cargar todas las versiones)
+- documents.version_seq: contador de versiones del documento
+- versions.sequence: número de orden de la versión dentro del documento
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all al arrancar la aplicación puede haber creado ya el esquema actual
+    inspector = sa.inspect(op.get_bind())
+    version_columns = {col["name"] for col in inspector.get_columns("versions")}
+    document_columns = {col["name"] for col in inspector.get_columns("documents")}
+    has_latest_fk = any(
+        fk["constrained_columns"] == ["latest_version_id"]
+        for fk in inspector.get_foreign_keys("documents")
+    )
+    has_sequence_unique = any(
+        set(uq["column_names"]) == {"document_id", "sequence"}
+        for uq in inspector.get_unique_constraints("versions")
+    )
+    backfill = "sequence" not in version_columns or not {"latest_version_id", "version_seq"} <= document_columns
+
+    if "sequence" not in version_columns:
+        with op.batch_alter_table("versions") as batch:
+            batch.add_column(sa.Column("sequence", sa.Integer(), nullable=True))
+
+    with op.batch_alter_table("documents") as batch:
+        if "latest_version_id" not in document_columns:
+            batch.add_column(sa.Column("latest_version_id", sa.Integer(), nullable=True))
+        if "version_seq" not in document_columns:
+            batch.add_column(sa.Column("version_seq", sa.Integer(), nullable=False, server_default="0"))
+        if not has_latest_fk:
+            batch.create_foreign_key(
+                "fk_documents_latest_version_id", "versions",
+                ["latest_version_id"], ["id"], ondelete="SET NULL"
+            )
+
+    if backfill:
+        _backfill()
+
+    if not has_sequence_unique:
+        with op.batch_alter_table("versions") as batch:
+            batch.create_unique_constraint(
+                "uq_versions_document_sequence", ["document_id", "sequence"]
+            )
+
+
+def _backfill() -> None:
+    # Numerar las versiones existentes por orden de creación
+    op.execute(
+        """
+        UPDATE versions SET sequence = (
+            SELECT COUNT(*) FROM versions v2
+            WHERE v2.document_id = versions.document_id
+              AND (v2.created_at < versions.created_at
+                   OR (v2.created_at = versions.created_at AND v2.id <= versions.id))
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE documents SET version_seq = (
+            SELECT COALESCE(MAX(v.sequence), 0) FROM versions v WHERE v.document_id = documents.id
+        )
+        """
+    )
+    # La actual es la marcada como latest; si no hay, la más reciente
+    op.execute(
+        """
+        UPDATE documents SET latest_version_id = (
+            SELECT v.id FROM versions v
+            WHERE v.document_id = documents.id
+            ORDER BY v.is_latest DESC, v.created_at DESC, v.id DESC
+            LIMIT 1
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE versions SET is_latest = (
+            id IN (SELECT latest_version_id FROM documents WHERE latest_version_id IS NOT NULL)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("versions") as batch:
+        batch.drop_constraint("uq_versions_document_sequence", type_="unique")
+    with op.batch_alter_table("documents") as batch:
+        batch.drop_constraint("fk_documents_latest_version_id", type_="foreignkey")
+        batch.drop_column("version_seq")
+        batch.drop_column("latest_version_id")
+    with op.batch_alter_table("versions") as batch:
+        batch.drop_column("sequence")
@@ -0,0 +1,39 @@
+"""Índice del listado paginado de documentos
+
+El listado por cursor recorre permissions(user_id, document_id) en orden
+descendente y corta por document_id dentro del propio índice. Ese índice es
+el de la restricción única uq_permissions_user_document; se crea aquí si
+falta (bases creadas con create_all antes de 0002 y marcadas con stamp).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def _indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    names = {ix["name"] for ix in inspector.get_indexes(table)}
+    names |= {uc["name"] for uc in inspector.get_unique_constraints(table)}
+    return names
+
+
+def upgrade() -> None:
+    if "uq_permissions_user_document" not in _indexes("permissions"):
+        with op.batch_alter_table("permissions") as batch:
+            batch.create_unique_constraint(
+                "uq_permissions_user_document", ["user_id", "document_id"]
+            )
+
+
+def downgrade() -> None:
+    # La restricción pertenece a 0002, que es quien la elimina
+    pass
@@ -0,0 +1,44 @@
+"""Bandeja de salida de correos (outbox)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all al arrancar la aplicación puede haberla creado ya
+    if sa.inspect(op.get_bind()).has_table("outbound_emails"):
+        return
+
+    op.create_table(
+        "outbound_emails",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("recipients", sa.JSON(), nullable=False),
+        sa.Column("subject", sa.String(255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("attachment_path", sa.String(500), nullable=True),
+        sa.Column("attachment_name", sa.String(255), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_outbound_emails_id", "outbound_emails", ["id"])
+    op.create_index(
+        "ix_outbound_emails_status_next_attempt", "outbound_emails", ["status", "next_attempt_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("outbound_emails")
@@ -0,0 +1,31 @@
+"""Borrado lógico de documentos (documents.deleted_at)
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {col["name"] for col in inspector.get_columns("documents")}
+    indexes = {ix["name"] for ix in inspector.get_indexes("documents")}
+    if "deleted_at" not in columns:
+        with op.batch_alter_table("documents") as batch:
+            batch.add_column(sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    if "ix_documents_deleted_at" not in indexes:
+        op.create_index("ix_documents_deleted_at", "documents", ["deleted_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_documents_deleted_at", table_name="documents")
+    with op.batch_alter_table("documents") as batch:
+        batch.drop_column("deleted_at")
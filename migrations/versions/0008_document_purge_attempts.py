@@ -0,0 +1,30 @@
+"""Reintentos de la purga de documentos (documents.purge_attempts, purge_next_attempt_at)
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {col["name"] for col in inspector.get_columns("documents")}
+    with op.batch_alter_table("documents") as batch:
+        if "purge_attempts" not in columns:
+            batch.add_column(sa.Column("purge_attempts", sa.Integer(), nullable=False, server_default="0"))
+        if "purge_next_attempt_at" not in columns:
+            batch.add_column(sa.Column("purge_next_attempt_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("documents") as batch:
+        batch.drop_column("purge_next_attempt_at")
+        batch.drop_column("purge_attempts")
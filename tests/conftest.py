@@ -0,0 +1,43 @@
+"""
+Fixtures compartidas por los tests que llaman a la API con una BD en memoria.
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.db.session import get_db
+from app.main import app
+from app.services.permission_cache import clear_permission_cache
+from app.services.signer_cache import clear_signer_cache
+from app.services.user_cache import clear_user_cache
+
+
+def _clear_caches() -> None:
+    # Las cachés de proceso no deben arrastrar filas de la BD de otro test
+    clear_permission_cache()
+    clear_user_cache()
+    clear_signer_cache()
+
+
+@pytest.fixture
+async def session_factory():
+    """
+    BD SQLite en memoria con todas las tablas, conectada a la aplicación
+    a través de get_db.
+    """
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    _clear_caches()
+    yield factory
+    app.dependency_overrides.pop(get_db, None)
+    _clear_caches()
+    await engine.dispose()
@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sess
 from app.main import app
 from app.db.base import Base
 from app.db.session import get_db
+from app.db.instrumentation import assert_max_queries
 
 
 # Configuración de BD de test (en memoria)
@@ -131,5 +132,146 @@ async def test_login(client):
     assert response.json()["token_type"] == "bearer"
 
 
+@pytest.mark.asyncio
+async def test_me_with_id_and_legacy_email_subject(client):
+    """El token lleva el id en 'sub'; los tokens antiguos con el email siguen valiendo."""
+    from app.core.security import create_access_token, decode_token_payload
+    from app.services.user_cache import clear_user_cache
+    
+    clear_user_cache()
+    register = await client.post(
+        "/api/v1/auth/register",
+        json={"email": "cache@example.com", "password": "testpass123"}
+    )
+    user_id = register.json()["id"]
+    login = await client.post(
+        "/api/v1/auth/login",
+        json={"email": "cache@example.com", "password": "testpass123"}
+    )
+    token = login.json()["access_token"]
+    assert decode_token_payload(token)["sub"] == str(user_id)
+    
+    # Dos veces: la segunda sale de la caché y no consulta la base de datos
+    for budget in (1, 0):
+        with assert_max_queries(budget):
+            response = await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["email"] == "cache@example.com"
+    
+    legacy = create_access_token(subject="cache@example.com")
+    response = await client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {legacy}"})
+    assert response.status_code == 200
+    clear_user_cache()
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_rotation_and_reuse(client):
+    """El refresh token rota; reutilizar uno ya usado revoca la sesión."""
+    await client.post(
+        "/api/v1/auth/register",
+        json={"email": "refresh@example.com", "password": "testpass123"}
+    )
+    login = await client.post(
+        "/api/v1/auth/login",
+        json={"email": "refresh@example.com", "password": "testpass123"}
+    )
+    first = login.json()["refresh_token"]
+    assert first
+    
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == 200
+    second = response.json()["refresh_token"]
+    assert second != first
+    assert "access_token" in response.json()
+    
+    # Reutilizar el primero revoca también el segundo
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": first})
+    assert response.status_code == 401
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": second})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_profile_header_only_for_admins(client, tmp_path, monkeypatch):
+    """X-Profile perfila la solicitud si la envía un administrador."""
+    from app.core.config import get_settings
+    
+    monkeypatch.setattr(get_settings(), "profile_dir", str(tmp_path))
+    tokens = {}
+    for email, role in (("admin@example.com", "admin"), ("plain@example.com", "user")):
+        await client.post(
+            "/api/v1/auth/register",
+            json={"email": email, "password": "testpass123", "role": role}
+        )
+        login = await client.post(
+            "/api/v1/auth/login",
+            json={"email": email, "password": "testpass123"}
+        )
+        tokens[role] = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    
+    response = await client.get("/health", headers={**tokens["user"], "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    
+    response = await client.get("/health", headers={**tokens["admin"], "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    
+    response = await client.get(f"/api/v1/admin/profiles/{profile_id}", headers=tokens["admin"])
+    assert response.status_code == 200
+    assert response.text.startswith("# GET /health")
+    response = await client.get(f"/api/v1/admin/profiles/{profile_id}", headers=tokens["user"])
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_document_endpoints_query_budgets(client, tmp_path, monkeypatch):
+    """Presupuesto de consultas SQL de la subida, el listado y la descarga."""
+    from app.api.v1.endpoints import files
+    from app.core.converters import ConverterStrategy
+    
+    class PassThroughConverter(ConverterStrategy):
+        # Sin LibreOffice: el PDF subido ya es el resultado de la conversión
+        async def convert(self, source_path, target_dir):
+            return source_path
+    
+    monkeypatch.setattr(files, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(files.ConverterFactory, "get_converter", staticmethod(PassThroughConverter))
+    
+    await client.post(
+        "/api/v1/auth/register",
+        json={"email": "budget@example.com", "password": "testpass123"}
+    )
+    login = await client.post(
+        "/api/v1/auth/login",
+        json={"email": "budget@example.com", "password": "testpass123"}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    # Con el usuario ya en caché, la autenticación no consulta la base de datos
+    await client.get("/api/v1/auth/me", headers=headers)
+    
+    # INSERT documento, UPDATE del contador, INSERT versión, UPDATE del
+    # puntero, INSERT permiso y refresh del documento
+    with assert_max_queries(6):
+        response = await client.post(
+            "/api/v1/files/upload",
+            files={"file": ("informe.pdf", b"%PDF-1.4\n%%EOF\n", "application/pdf")},
+            headers=headers
+        )
+    # Devuelve el PDF (FileResponse), así que el código es 200 y no el del decorador
+    assert response.status_code == 200
+    version_id = response.headers["X-Version-ID"]
+    
+    # Una sola consulta sin importar el número de documentos
+    with assert_max_queries(1):
+        response = await client.get("/api/v1/files/my-documents", headers=headers)
+    assert len(response.json()) == 1
+    
+    # Versión, su documento (selectinload) y el permiso
+    with assert_max_queries(3):
+        response = await client.get(f"/api/v1/files/download/{version_id}", headers=headers)
+    assert response.status_code == 200
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
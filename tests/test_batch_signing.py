@@ -0,0 +1,58 @@
+"""
+Tests de la firma por lotes: resultados por documento y registro de errores.
+"""
+
+import logging
+
+import pytest
+from httpx import AsyncClient
+
+from app.api.v1.endpoints import signature
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Document, Permission, User
+from app.services.versioning import add_version
+from benchmarks.fixtures import make_pdf, make_self_signed_p12
+
+PASSWORD = "benchmark"
+
+
+@pytest.mark.asyncio
+async def test_one_bad_document_does_not_fail_the_batch(session_factory, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(signature, "UPLOAD_DIR", tmp_path)
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"esto no es un PDF")
+
+    async with session_factory() as db:
+        user = User(email="firmante@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        document_ids = []
+        for name, path in (("bueno.pdf", make_pdf(tmp_path / "bueno.pdf", 0.05, page_side=64)), ("roto.pdf", broken)):
+            document = Document(name=name, user_id=user.id)
+            db.add(document)
+            await db.flush()
+            await add_version(db, document, file_path=str(path), file_size=path.stat().st_size)
+            db.add(Permission(user_id=user.id, document_id=document.id, permission_level="owner"))
+            document_ids.append(document.id)
+        await db.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token(subject=user.id)}"}
+    with caplog.at_level(logging.ERROR, logger=signature.__name__):
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post(
+                "/documents/sign/batch",
+                data={"document_ids": [str(i) for i in document_ids], "password": PASSWORD},
+                files={"p12_file": ("cert.p12", make_self_signed_p12(PASSWORD), "application/x-pkcs12")},
+                headers=headers,
+            )
+
+    assert response.status_code == 200
+    good, bad = response.json()["results"]
+    assert good["success"] and good["version"]["version_number"] == "v1.1-signed"
+    assert not bad["success"]
+
+    # El fallo queda en el log con su traza, no en stdout
+    (record,) = [r for r in caplog.records if r.name == signature.__name__]
+    assert str(document_ids[1]) in record.getMessage()
+    assert record.exc_info is not None
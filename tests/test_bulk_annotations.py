@@ -0,0 +1,65 @@
+"""
+Tests de la anotación masiva: varios trabajos sobre el mismo documento.
+"""
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.api.v1.endpoints import annotations
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Document, Permission, User, Version
+from app.services.versioning import add_version
+from benchmarks.fixtures import make_pdf
+
+
+def _job(version_id: int, text: str) -> dict:
+    return {"file_id": version_id, "annotations": [{"x": 50, "y": 50, "text": text, "type": "note", "page": 0}]}
+
+
+@pytest.mark.asyncio
+async def test_jobs_on_the_same_document_are_chained(session_factory, tmp_path, monkeypatch):
+    import fitz
+
+    monkeypatch.setattr(annotations, "UPLOAD_DIR", tmp_path)
+    async with session_factory() as db:
+        user = User(email="editor@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        document = Document(name="contrato.pdf", user_id=user.id)
+        db.add(document)
+        await db.flush()
+        first = await add_version(
+            db, document, file_path=str(make_pdf(tmp_path / "v1.pdf", 0.05, page_side=64)), file_size=1
+        )
+        second = await add_version(
+            db, document, file_path=str(make_pdf(tmp_path / "v2.pdf", 0.05, page_side=64)), file_size=1
+        )
+        db.add(Permission(user_id=user.id, document_id=document.id, permission_level="owner"))
+        await db.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token(subject=user.id)}"}
+    jobs = [_job(second.id, "Primera"), _job(second.id, "Segunda"), _job(first.id, "Otra versión")]
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/v1/annotations/annotate/bulk", json={"jobs": jobs}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    chained, last, rejected = body["results"]
+    assert not rejected["success"]
+
+    async with session_factory() as db:
+        versions = {
+            v.id: v for v in (await db.execute(select(Version).where(Version.document_id == document.id))).scalars()
+        }
+        document = await db.get(Document, document.id)
+
+    assert versions[chained["annotated_version_id"]].version_number == "v1.2-annotated"
+    assert versions[last["annotated_version_id"]].version_number == "v1.3-annotated"
+    assert document.latest_version_id == last["annotated_version_id"]
+
+    # La última versión conserva las anotaciones del trabajo anterior
+    with fitz.open(versions[last["annotated_version_id"]].file_path) as pdf:
+        texts = [annot.info["content"] for annot in pdf[0].annots()]
+    assert texts == ["Primera", "Segunda"]
@@ -0,0 +1,53 @@
+"""
+Tests de la caché en memoria con TTL.
+"""
+
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_get_and_set():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", "default") == "default"
+
+
+def test_entries_expire():
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_per_entry_ttl_and_purge():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+    assert cache.purge_expired() == 1
+    assert len(cache) == 1
+    assert cache.get("long") == 2
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" pasa a ser la menos usada
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_discard_where():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set((1, 10), "owner")
+    cache.set((2, 10), "viewer")
+    cache.set((1, 11), "editor")
+    assert cache.discard_where(lambda key: key[1] == 10) == 2
+    assert cache.get((1, 11)) == "editor"
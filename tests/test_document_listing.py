@@ -0,0 +1,16 @@
+"""
+Pruebas del cursor del listado paginado de documentos.
+"""
+
+import pytest
+
+from app.services.document_listing import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+
+def test_invalid_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor("no-es-un-cursor")
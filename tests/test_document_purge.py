@@ -0,0 +1,94 @@
+"""
+Tests de la purga en segundo plano de documentos con borrado lógico.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import Document, Permission, User, Version
+from app.services import document_purge
+from app.services.document_purge import DocumentPurgeWorker
+
+
+@pytest.mark.asyncio
+async def test_purge_removes_files_and_rows_of_deleted_documents(tmp_path):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    files = []
+    async with session_factory() as db:
+        user = User(email="owner@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        for name, deleted_at in (("borrado.pdf", datetime.utcnow()), ("vivo.pdf", None)):
+            document = Document(name=name, user_id=user.id, deleted_at=deleted_at)
+            db.add(document)
+            await db.flush()
+            path = tmp_path / name
+            path.write_bytes(b"%PDF-1.4")
+            files.append(path)
+            db.add(Version(document_id=document.id, version_number="v1.0", file_path=str(path), file_size=8))
+            db.add(Permission(user_id=user.id, document_id=document.id, permission_level="owner"))
+        await db.commit()
+
+    worker = DocumentPurgeWorker(session_factory, files_per_second=0)
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+
+    deleted_file, live_file = files
+    assert not deleted_file.exists()
+    assert live_file.exists()
+    async with session_factory() as db:
+        names = (await db.execute(select(Document.name))).scalars().all()
+        assert names == ["vivo.pdf"]
+        assert (await db.execute(select(func.count(Version.id)))).scalar() == 1
+        assert (await db.execute(select(func.count(Permission.id)))).scalar() == 1
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failing_document_backs_off_without_blocking_the_rest(tmp_path, monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    stuck = tmp_path / "bloqueado.pdf"
+    async with session_factory() as db:
+        user = User(email="owner@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        # El documento que falla es el más antiguo: siempre sería el primero del lote
+        for name, minutes_ago in (("bloqueado.pdf", 10), ("normal.pdf", 5)):
+            document = Document(
+                name=name, user_id=user.id, deleted_at=datetime.utcnow() - timedelta(minutes=minutes_ago)
+            )
+            db.add(document)
+            await db.flush()
+            db.add(Version(document_id=document.id, version_number="v1.0", file_path=str(tmp_path / name), file_size=8))
+        await db.commit()
+
+    monkeypatch.setattr(document_purge, "_unlink", lambda path: path != str(stuck))
+    worker = DocumentPurgeWorker(session_factory, batch_size=1, files_per_second=0)
+
+    assert await worker.run_once() == 0
+    async with session_factory() as db:
+        (document,) = (await db.execute(select(Document).where(Document.name == "bloqueado.pdf"))).scalars()
+        assert document.purge_attempts == 1
+        assert document.purge_next_attempt_at > datetime.utcnow()
+
+    # En espera de reintento, el siguiente ciclo purga el otro documento
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+    async with session_factory() as db:
+        names = (await db.execute(select(Document.name))).scalars().all()
+        assert names == ["bloqueado.pdf"]
+
+    await engine.dispose()
@@ -0,0 +1,50 @@
+"""
+Tests de la visibilidad de los documentos con borrado lógico: dejan de ser
+accesibles en cuanto se borran, antes de que la purga elimine las filas.
+"""
+
+from datetime import timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.security import create_access_token, create_download_token
+from app.main import app
+from app.models import Document, Permission, User, Version
+
+
+@pytest.mark.asyncio
+async def test_deleted_document_is_hidden_before_purge(session_factory, tmp_path):
+    path = tmp_path / "contrato.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    async with session_factory() as db:
+        user = User(email="owner@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        document = Document(name="contrato.pdf", user_id=user.id)
+        db.add(document)
+        await db.flush()
+        version = Version(document_id=document.id, version_number="v1.0", file_path=str(path), file_size=8)
+        db.add(version)
+        db.add(Permission(user_id=user.id, document_id=document.id, permission_level="owner"))
+        await db.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token(subject=user.id)}"}
+    link = f"/api/v1/files/shared/{create_download_token(version.id, timedelta(hours=1))}"
+    download = f"/api/v1/files/download/{version.id}"
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        # Antes de borrar: visible (y el permiso queda en caché)
+        assert (await client.get(download, headers=headers)).status_code == 200
+        assert (await client.get(link)).status_code == 200
+        listing = await client.get("/api/v1/files/my-documents", headers=headers)
+        assert [doc["id"] for doc in listing.json()] == [document.id]
+
+        response = await client.delete(f"/api/v1/files/{document.id}", headers=headers)
+        assert response.status_code == 204
+
+        # Después: sin acceso, fuera del listado y el enlace compartido da 404
+        assert (await client.get(download, headers=headers)).status_code == 403
+        assert (await client.get(link)).status_code == 404
+        listing = await client.get("/api/v1/files/my-documents", headers=headers)
+        assert listing.json() == []
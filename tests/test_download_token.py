@@ -0,0 +1,21 @@
+"""
+Tests de los tokens de los enlaces de descarga enviados por correo.
+"""
+
+from datetime import timedelta
+
+from app.core.security import create_access_token, create_download_token, decode_download_token
+
+
+def test_download_token_round_trip():
+    token = create_download_token(42, timedelta(hours=1))
+    assert decode_download_token(token) == 42
+
+
+def test_expired_download_token_is_rejected():
+    token = create_download_token(42, timedelta(seconds=-1))
+    assert decode_download_token(token) is None
+
+
+def test_access_token_is_not_a_download_token():
+    assert decode_download_token(create_access_token(subject=42)) is None
@@ -0,0 +1,22 @@
+"""
+Presupuesto de tiempo de importación de la aplicación.
+
+El presupuesto por defecto deja margen para máquinas de CI lentas; se puede
+ajustar con IMPORT_TIME_BUDGET_SECONDS.
+"""
+
+import os
+
+from benchmarks.bench_import import measure_imports
+
+BUDGET_SECONDS = float(os.environ.get("IMPORT_TIME_BUDGET_SECONDS", "3.0"))
+
+
+def test_app_import_within_budget_and_without_heavy_dependencies(tmp_path):
+    # En un directorio temporal: app.main crea temp_files/ y uploads/ al importarse
+    cumulative, loaded = measure_imports("app.main", cwd=tmp_path)
+
+    assert loaded == [], f"Dependencias cargadas al arrancar: {loaded}"
+    slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:10]
+    report = "\n".join(f"{seconds:.3f} s  {name}" for name, seconds in slowest)
+    assert cumulative["app.main"] <= BUDGET_SECONDS, f"Importar app.main es demasiado lento:\n{report}"
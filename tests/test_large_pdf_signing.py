@@ -0,0 +1,102 @@
+"""
+Tests de la firma de PDFs grandes: lectura por mmap y digest por bloques.
+"""
+
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives.serialization import Encoding, pkcs12
+from httpx import AsyncClient
+
+from app.api.v1.endpoints import signature
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Document, Permission, User, Version
+from app.services import signature_validation
+from app.services.signer_cache import load_signer_from_bytes
+from app.services.versioning import add_version
+from benchmarks.fixtures import make_pdf, make_self_signed_p12
+
+PASSWORD = "benchmark"
+
+
+@pytest.fixture
+def p12_bytes(tmp_path, monkeypatch):
+    """Certificado autofirmado configurado como raíz de confianza."""
+    p12 = make_self_signed_p12(PASSWORD)
+    _, cert, _ = pkcs12.load_key_and_certificates(p12, PASSWORD.encode())
+    roots_dir = tmp_path / "roots"
+    roots_dir.mkdir()
+    (roots_dir / "root.pem").write_bytes(cert.public_bytes(Encoding.PEM))
+    monkeypatch.setattr(signature.settings, "signature_trust_roots_dir", str(roots_dir))
+    signature_validation.get_trust_roots.cache_clear()
+    yield p12
+    signature_validation.get_trust_roots.cache_clear()
+
+
+@pytest.mark.asyncio
+async def test_large_pdf_is_signed_through_mmap(session_factory, p12_bytes, tmp_path, monkeypatch):
+    monkeypatch.setattr(signature, "UPLOAD_DIR", tmp_path)
+    # Cualquier archivo cuenta como grande, y el digest se calcula en muchos bloques
+    monkeypatch.setattr(signature.settings, "large_pdf_threshold_mb", 0)
+    monkeypatch.setattr(signature.settings, "signing_chunk_size", 4096)
+
+    large_calls = []
+    write_large = signature._write_signed_large_pdf
+
+    def spy(*args, **kwargs):
+        large_calls.append(args[0])
+        return write_large(*args, **kwargs)
+
+    monkeypatch.setattr(signature, "_write_signed_large_pdf", spy)
+
+    source = make_pdf(tmp_path / "grande.pdf", 0.2, page_side=128)
+    async with session_factory() as db:
+        user = User(email="firmante@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        document = Document(name="grande.pdf", user_id=user.id)
+        db.add(document)
+        await db.flush()
+        await add_version(db, document, file_path=str(source), file_size=source.stat().st_size)
+        db.add(Permission(user_id=user.id, document_id=document.id, permission_level="owner"))
+        await db.commit()
+
+    headers = {"Authorization": f"Bearer {create_access_token(subject=user.id)}"}
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post(
+            "/documents/sign",
+            data={"document_id": str(document.id), "password": PASSWORD},
+            files={"p12_file": ("cert.p12", p12_bytes, "application/x-pkcs12")},
+            headers=headers,
+        )
+
+    assert response.status_code == 200
+    assert large_calls == [str(source)]
+    async with session_factory() as db:
+        version = await db.get(Version, response.json()["id"])
+    large_signed = Path(version.file_path).read_bytes()
+
+    # La misma firma por la ruta en memoria
+    in_memory = tmp_path / "en_memoria.pdf"
+    signature._write_signed_pdf(
+        str(source), str(in_memory), load_signer_from_bytes(p12_bytes, PASSWORD), large_file=False
+    )
+    memory_signed = in_memory.read_bytes()
+
+    # Ambas son una actualización incremental del mismo original...
+    original = source.read_bytes()
+    assert large_signed.startswith(original) and memory_signed.startswith(original)
+
+    # ...y validan igual (salvo la hora de la firma)
+    def summary(result):
+        return [
+            {key: sig[key] for key in ("field_name", "is_valid", "trusted", "coverage", "signer_name")}
+            for sig in result["signatures"]
+        ]
+
+    large_result = await signature._validate_pdf(large_signed)
+    memory_result = await signature._validate_pdf(memory_signed)
+    assert large_result["is_valid"] and large_result["trusted"]
+    assert summary(large_result) == summary(memory_result)
+    assert summary(large_result)[0]["coverage"] == "ENTIRE_FILE"
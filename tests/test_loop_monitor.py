@@ -0,0 +1,33 @@
+"""
+Tests del monitor de retraso del event loop.
+"""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.core.loop_monitor import LoopLagMonitor
+from app.core.metrics import metrics
+
+
+def _blocking_step():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_lag_is_measured_and_blocking_stack_logged(caplog):
+    monitor = LoopLagMonitor(interval=0.02, block_threshold=0.1, capture_stacks=True)
+    caplog.set_level(logging.WARNING, logger="app.core.loop_monitor")
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        _blocking_step()  # Bloquea el loop
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    lag = metrics.snapshot()["app_event_loop_lag"][()]
+    assert lag["max"] >= 0.2
+    assert any("_blocking_step" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,160 @@
+"""
+Tests de la firma LTV: los datos de revocación se incrustan en el DSS y la
+validación posterior se hace sin red.
+"""
+
+import socket
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import get_settings
+from app.services import signature_validation
+from benchmarks.fixtures import make_pdf
+
+PASSWORD = "benchmark"
+CRL_URL = "http://crl.example.invalid/ca.crl"
+
+
+def _clear_policy_caches() -> None:
+    signature_validation.get_trust_roots.cache_clear()
+    signature_validation.get_revocation_data.cache_clear()
+    signature_validation.policy_fingerprint.cache_clear()
+
+
+@pytest.fixture
+def no_network(monkeypatch):
+    """Cualquier intento de abrir una conexión falla."""
+    def refuse(*args, **kwargs):
+        raise OSError("red deshabilitada en este test")
+
+    monkeypatch.setattr(socket.socket, "connect", refuse)
+    monkeypatch.setattr(socket, "create_connection", refuse)
+
+
+@pytest.fixture
+def test_ca(tmp_path, monkeypatch):
+    """
+    CA de pruebas configurada como raíz de confianza, con su CRL en el
+    almacén local de revocación. Devuelve el P12 de un firmante emitido por
+    ella, cuyo certificado apunta a la CRL.
+    """
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives.serialization import pkcs12
+    from cryptography.x509.oid import NameOID
+
+    def key_usage(**enabled):
+        flags = dict.fromkeys(
+            ("digital_signature", "content_commitment", "key_encipherment", "data_encipherment",
+             "key_agreement", "key_cert_sign", "crl_sign", "encipher_only", "decipher_only"),
+            False,
+        )
+        flags.update(enabled)
+        return x509.KeyUsage(**flags)
+
+    now = datetime.now(timezone.utc)
+    ca_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    ca_name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "CA de pruebas")])
+    ca_aki = x509.AuthorityKeyIdentifier.from_issuer_public_key(ca_key.public_key())
+    ca_cert = (
+        x509.CertificateBuilder()
+        .subject_name(ca_name)
+        .issuer_name(ca_name)
+        .public_key(ca_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=365))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .add_extension(key_usage(key_cert_sign=True, crl_sign=True), critical=True)
+        .add_extension(x509.SubjectKeyIdentifier.from_public_key(ca_key.public_key()), critical=False)
+        .sign(ca_key, hashes.SHA256())
+    )
+
+    signer_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    signer_cert = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "Firmante LTV")]))
+        .issuer_name(ca_name)
+        .public_key(signer_key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=180))
+        .add_extension(key_usage(digital_signature=True, content_commitment=True), critical=True)
+        .add_extension(ca_aki, critical=False)
+        .add_extension(
+            x509.CRLDistributionPoints([
+                x509.DistributionPoint(
+                    full_name=[x509.UniformResourceIdentifier(CRL_URL)],
+                    relative_name=None, reasons=None, crl_issuer=None,
+                )
+            ]),
+            critical=False,
+        )
+        .sign(ca_key, hashes.SHA256())
+    )
+
+    crl = (
+        x509.CertificateRevocationListBuilder()
+        .issuer_name(ca_name)
+        .last_update(now - timedelta(hours=1))
+        .next_update(now + timedelta(days=7))
+        .add_extension(x509.CRLNumber(1), critical=False)
+        .add_extension(ca_aki, critical=False)
+        .sign(ca_key, hashes.SHA256())
+    )
+
+    roots_dir = tmp_path / "roots"
+    roots_dir.mkdir()
+    (roots_dir / "ca.pem").write_bytes(ca_cert.public_bytes(serialization.Encoding.PEM))
+    revocation_dir = tmp_path / "revocation"
+    revocation_dir.mkdir()
+    (revocation_dir / "ca.crl").write_bytes(crl.public_bytes(serialization.Encoding.DER))
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "signature_trust_roots_dir", str(roots_dir))
+    monkeypatch.setattr(settings, "revocation_data_dir", str(revocation_dir))
+    # Sin revocación comprobable la firma no se da por buena
+    monkeypatch.setattr(settings, "signature_revocation_mode", "hard-fail")
+    monkeypatch.setattr(settings, "ltv_allow_fetching", False)
+    monkeypatch.setattr(settings, "signature_allow_fetching", False)
+    _clear_policy_caches()
+
+    yield pkcs12.serialize_key_and_certificates(
+        name=b"Firmante LTV",
+        key=signer_key,
+        cert=signer_cert,
+        cas=[ca_cert],
+        encryption_algorithm=serialization.BestAvailableEncryption(PASSWORD.encode()),
+    )
+    _clear_policy_caches()
+
+
+@pytest.mark.asyncio
+async def test_ltv_signature_validates_offline_from_its_dss(test_ca, no_network, tmp_path, monkeypatch):
+    from pyhanko.pdf_utils.reader import PdfFileReader
+    from pyhanko.sign.validation.dss import DocumentSecurityStore
+
+    from app.api.v1.endpoints.signature import _validate_pdf, _write_signed_pdf
+    from app.services.signer_cache import load_signer_from_bytes
+
+    source = make_pdf(tmp_path / "source.pdf", 0.05, page_side=64)
+    output = tmp_path / "signed.pdf"
+    _write_signed_pdf(str(source), str(output), load_signer_from_bytes(test_ca, PASSWORD), ltv=True)
+    pdf_bytes = output.read_bytes()
+
+    with open(output, "rb") as f:
+        dss = DocumentSecurityStore.read_dss(PdfFileReader(f, strict=False))
+        assert dss.crls, "la CRL de la CA no se incrustó en el DSS"
+
+    # Sin almacén local: la revocación solo puede salir del propio documento
+    monkeypatch.setattr(get_settings(), "revocation_data_dir", None)
+    _clear_policy_caches()
+
+    result = await _validate_pdf(pdf_bytes)
+
+    (sig,) = result["signatures"]
+    assert sig["ltv"] is True
+    assert sig["is_valid"] and sig["trusted"], sig["details"]
+    assert result["trusted"]
@@ -0,0 +1,157 @@
+"""
+Tests de la bandeja de salida de correos contra un servidor SMTP local (aiosmtpd).
+"""
+
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import OutboundEmail
+from app.services import mail_service
+from app.services.mail_service import MailOutboxWorker, SMTPPool, build_message, enqueue_email
+
+
+class _CollectingHandler:
+    """Guarda los mensajes recibidos y las sesiones SMTP usadas."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(autouse=True)
+def mail_sender(monkeypatch):
+    # Sin remitente configurado los correos fallan de forma permanente
+    monkeypatch.setattr(mail_service.settings, "mail_from", "noreply@example.com")
+    monkeypatch.setattr(mail_service.settings, "mail_username", "")
+
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def smtp_server():
+    handler = _CollectingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+async def _enqueue(session_factory, count: int):
+    async with session_factory() as db:
+        for i in range(count):
+            await enqueue_email(db, f"user{i}@example.com", f"Asunto {i}", "Cuerpo")
+        await db.commit()
+
+
+async def _statuses(session_factory):
+    async with session_factory() as db:
+        result = await db.execute(select(OutboundEmail).order_by(OutboundEmail.id))
+        return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_batch_is_sent_over_one_pooled_connection(session_factory, smtp_server):
+    controller, handler = smtp_server
+    await _enqueue(session_factory, 5)
+
+    pool = SMTPPool(size=1, hostname=controller.hostname, port=controller.port)
+    worker = MailOutboxWorker(session_factory, pool=pool, batch_size=10)
+    assert await worker.run_once() == 5
+    await pool.close()
+
+    assert len(handler.messages) == 5
+    assert len(handler.sessions) == 1
+    assert all(email.status == "sent" and email.attempts == 1 for email in await _statuses(session_factory))
+
+
+@pytest.mark.asyncio
+async def test_failures_are_retried_with_backoff(session_factory):
+    await _enqueue(session_factory, 1)
+
+    # Nadie escucha en este puerto
+    pool = SMTPPool(size=1, hostname="127.0.0.1", port=_free_port(), timeout=2)
+    worker = MailOutboxWorker(session_factory, pool=pool)
+    assert await worker.run_once() == 1
+
+    (email,) = await _statuses(session_factory)
+    assert email.status == "pending"
+    assert email.attempts == 1
+    assert email.last_error
+    assert email.next_attempt_at > email.created_at
+
+    # Aún no toca reintentar
+    assert await worker.run_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_missing_attachment_fails_permanently(session_factory, smtp_server, tmp_path):
+    controller, handler = smtp_server
+    async with session_factory() as db:
+        await enqueue_email(
+            db, "user@example.com", "Adjunto", "Cuerpo",
+            attachment_path=tmp_path / "no-existe.pdf", attachment_name="doc.pdf"
+        )
+        await db.commit()
+
+    pool = SMTPPool(size=1, hostname=controller.hostname, port=controller.port)
+    worker = MailOutboxWorker(session_factory, pool=pool)
+    await worker.run_once()
+    await pool.close()
+
+    (email,) = await _statuses(session_factory)
+    assert email.status == "failed"
+    assert handler.messages == []
+
+
+@pytest.mark.asyncio
+async def test_multiple_recipients_share_one_message(session_factory, smtp_server):
+    controller, handler = smtp_server
+    recipients = ["a@example.com", "b@example.com", "c@example.com"]
+    async with session_factory() as db:
+        await enqueue_email(db, recipients, "Documento", "<p>Hola</p>")
+        await db.commit()
+
+    pool = SMTPPool(size=1, hostname=controller.hostname, port=controller.port)
+    worker = MailOutboxWorker(session_factory, pool=pool)
+    await worker.run_once()
+    await pool.close()
+
+    (envelope,) = handler.messages
+    assert sorted(envelope.rcpt_tos) == recipients
+    assert b"undisclosed-recipients" in envelope.content
+
+
+def test_sender_falls_back_to_username(monkeypatch):
+    email = OutboundEmail(recipients=["user@example.com"], subject="Asunto", body="Cuerpo")
+    assert "noreply@example.com" in build_message(email)["From"]
+
+    monkeypatch.setattr(mail_service.settings, "mail_from", "")
+    monkeypatch.setattr(mail_service.settings, "mail_username", "cuenta@example.com")
+    assert "cuenta@example.com" in build_message(email)["From"]
+
+    monkeypatch.setattr(mail_service.settings, "mail_username", "")
+    with pytest.raises(mail_service.PermanentMailError):
+        build_message(email)
@@ -0,0 +1,61 @@
+"""
+Tests del perfilado de memoria con tracemalloc.
+"""
+
+import tracemalloc
+
+import pytest
+
+from app.core import memory_profiling
+from app.core.memory_profiling import memory_report, memory_stage, reset_memory_report, track_memory
+
+
+@pytest.fixture
+def tracing():
+    reset_memory_report()
+    tracemalloc.start()
+    yield
+    memory_profiling.stop_memory_profiling()
+    reset_memory_report()
+
+
+def test_noop_when_not_tracing():
+    with track_memory("stage", "nada") as window:
+        assert window is None
+
+
+def test_peak_per_window_survives_inner_reset(tracing):
+    mb = 1024 * 1024
+    with track_memory("endpoint", "POST /upload"):
+        data = bytearray(8 * mb)
+        del data
+        # Una ventana posterior reinicia el pico global: la exterior no lo pierde
+        with memory_stage("sign"):
+            small = bytearray(mb)
+            del small
+
+    entries = {e["name"]: e for e in memory_report()["entries"]}
+    assert entries["POST /upload"]["max_peak_bytes"] >= 8 * mb
+    assert 0.9 * mb <= entries["sign"]["max_peak_bytes"] < 8 * mb
+    assert entries["sign"]["kind"] == "stage"
+    assert entries["sign"]["count"] == 1
+
+
+def test_top_sites_only_for_stages_and_off_the_caller(tracing, monkeypatch):
+    monkeypatch.setattr(memory_profiling.settings, "memory_profile_top_sites", 5)
+    monkeypatch.setattr(memory_profiling.settings, "memory_profile_endpoint_top_sites", 0)
+
+    with track_memory("endpoint", "GET /my-documents") as window:
+        assert window.snapshot is None
+    with memory_stage("annotate") as window:
+        assert window.snapshot is not None
+        retained = [bytearray(1024 * 1024) for _ in range(4)]
+
+    # Los snapshots se comparan en su propio hilo: esperar a que termine
+    memory_profiling._executor().submit(lambda: None).result()
+    entries = {e["name"]: e for e in memory_report()["entries"]}
+    assert entries["GET /my-documents"]["top_sites"] == []
+    sites = entries["annotate"]["top_sites"]
+    assert sites and sites[0]["size_bytes"] >= 4 * 1024 * 1024
+    assert "test_memory_profiling.py" in sites[0]["site"]
+    del retained
@@ -0,0 +1,49 @@
+"""
+Tests del registro de métricas y del contador de consultas SQL.
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.metrics import MetricsRegistry
+from app.db.instrumentation import assert_max_queries, count_queries
+
+
+def test_render_prometheus():
+    registry = MetricsRegistry()
+    registry.describe("app_requests_total", "Solicitudes")
+    registry.inc("app_requests_total", {"route": "/health"})
+    registry.inc("app_requests_total", {"route": "/health"})
+    registry.observe("app_request_seconds", 0.5, {"route": "/health"})
+    registry.observe("app_request_seconds", 1.5, {"route": "/health"})
+    registry.set_gauge("app_loop_lag_seconds", 0.01)
+
+    output = registry.render_prometheus()
+    assert "# HELP app_requests_total Solicitudes" in output
+    assert 'app_requests_total{route="/health"} 2.0' in output
+    assert 'app_request_seconds_count{route="/health"} 2' in output
+    assert 'app_request_seconds_sum{route="/health"} 2.0' in output
+    assert '# TYPE app_request_seconds_max_value gauge' in output
+    assert 'app_request_seconds_max_value{route="/health"} 1.5' in output
+    assert 'app_request_seconds_max{' not in output
+    assert "app_loop_lag_seconds 0.01" in output
+
+
+@pytest.mark.asyncio
+async def test_count_queries_nested_and_budget():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.connect() as conn:
+        with count_queries() as outer:
+            await conn.execute(text("SELECT 1"))
+            with count_queries() as inner:
+                await conn.execute(text("SELECT 2"))
+        await conn.execute(text("SELECT 3"))  # Fuera de cualquier colector
+        assert (outer.count, inner.count) == (2, 1)
+        assert outer.seconds >= inner.seconds >= 0
+
+        with pytest.raises(AssertionError):
+            with assert_max_queries(1):
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+    await engine.dispose()
@@ -0,0 +1,27 @@
+"""
+Tests del lector de archivos mapeados en memoria.
+"""
+
+import io
+
+from app.services.mmap_reader import MmapReader
+
+
+def test_read_seek_and_readinto(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"%PDF-1.7 contenido de prueba %%EOF")
+
+    with open(path, "rb") as f, MmapReader(f) as stream:
+        assert stream.read(8) == b"%PDF-1.7"
+        assert stream.tell() == 8
+
+        stream.seek(-5, io.SEEK_END)
+        assert stream.read() == b"%%EOF"
+
+        stream.seek(0)
+        buffer = bytearray(4)
+        assert stream.readinto(buffer) == 4
+        assert bytes(buffer) == b"%PDF"
+
+        stream.seek(1000)
+        assert stream.read(10) == b""
@@ -0,0 +1,63 @@
+"""
+Tests del hash de contraseñas en el executor dedicado.
+"""
+
+import asyncio
+
+import pytest
+from passlib.hash import argon2
+
+from app.core.security import (
+    calibrate_argon2,
+    hash_password_async,
+    shutdown_password_executor,
+    verify_and_update_password,
+)
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_async():
+    hashed = await hash_password_async("secreto123")
+    assert await verify_and_update_password("secreto123", hashed) == (True, None)
+    assert await verify_and_update_password("otra", hashed) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_outdated_parameters_are_rehashed():
+    weak = argon2.using(time_cost=1, memory_cost=1024, parallelism=1).hash("secreto123")
+    ok, new_hash = await verify_and_update_password("secreto123", weak)
+    assert ok
+    assert new_hash is not None and new_hash != weak
+
+
+@pytest.mark.asyncio
+async def test_lower_time_cost_is_rehashed(monkeypatch):
+    from app.core import security
+
+    monkeypatch.setattr(security.settings, "argon2_time_cost", 3)
+    monkeypatch.setattr(security.settings, "argon2_memory_cost", 1024)
+    monkeypatch.setattr(security.settings, "argon2_parallelism", 1)
+    monkeypatch.setattr(security, "pwd_context", security._build_pwd_context())
+
+    # Solo cambia time_cost (como tras subirlo con calibrate-argon2)
+    weak = argon2.using(time_cost=2, memory_cost=1024, parallelism=1).hash("secreto123")
+    ok, new_hash = await verify_and_update_password("secreto123", weak)
+    assert ok
+    assert new_hash is not None and argon2.from_string(new_hash).rounds == 3
+
+    assert await verify_and_update_password("secreto123", new_hash) == (True, None)
+
+
+def test_executor_survives_shutdown_and_new_loops():
+    # Como varios arranques y paradas de la aplicación en el mismo proceso
+    for _ in range(2):
+        hashed = asyncio.run(hash_password_async("secreto123"))
+        shutdown_password_executor()
+        assert asyncio.run(verify_and_update_password("secreto123", hashed)) == (True, None)
+        shutdown_password_executor()
+
+
+def test_calibrate_returns_parameters():
+    params = calibrate_argon2(1, memory_cost=1024, parallelism=1, samples=1)
+    assert params["time_cost"] >= 1
+    assert 8 <= params["memory_cost"] <= 1024
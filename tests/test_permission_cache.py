@@ -0,0 +1,39 @@
+"""
+Tests de la caché de permisos (memoización por solicitud + caché de proceso).
+"""
+
+from types import SimpleNamespace
+
+from app.services import permission_cache
+
+
+def _session():
+    # Basta con el diccionario `info` de la sesión
+    return SimpleNamespace(info={})
+
+
+def setup_function():
+    permission_cache.clear_permission_cache()
+
+
+def test_lookup_reports_missing_then_hits():
+    db = _session()
+    known, missing = permission_cache.lookup(db, 1, [10, 11])
+    assert known == {} and missing == {10, 11}
+
+    permission_cache.remember(db, 1, {10: 2, 11: None})
+    known, missing = permission_cache.lookup(_session(), 1, [10, 11])
+    assert known == {10: 2, 11: None} and missing == set()
+
+
+def test_invalidate_document_clears_process_cache_and_memo():
+    db = _session()
+    permission_cache.remember(db, 1, {10: 2, 20: 0})
+    permission_cache.remember(db, 2, {10: 0})
+
+    permission_cache.invalidate_document(10, db)
+
+    known, missing = permission_cache.lookup(db, 1, [10, 20])
+    assert known == {20: 0} and missing == {10}
+    _, missing = permission_cache.lookup(_session(), 2, [10])
+    assert missing == {10}
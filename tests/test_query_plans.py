@@ -0,0 +1,25 @@
+"""
+Verifica con EXPLAIN que las consultas frecuentes usan índices.
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.base import Base
+from app.db.query_plans import explain_hot_queries
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_use_indexes():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        report = await explain_hot_queries(conn)
+    await engine.dispose()
+
+    for name, entry in report.items():
+        assert entry["uses_index"], f"{name} recorre la tabla completa:\n{entry['plan']}"
+        assert not entry["sorts"], f"{name} ordena en memoria:\n{entry['plan']}"
+
+    # El cursor se resuelve dentro de la búsqueda en el índice de permisos
+    assert "(user_id=? AND document_id<?)" in report["my_documents_page"]["plan"]
@@ -0,0 +1,47 @@
+"""
+Tests de la rotación de refresh tokens.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import RefreshToken, User
+from app.services.refresh_tokens import RefreshTokenError, issue_refresh_token, rotate_refresh_token
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rotation_consumes_the_token_once(tmp_path):
+    # BD en archivo: cada sesión usa su propia conexión
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tokens.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        user = User(email="refresh@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        token = await issue_refresh_token(db, user)
+        await db.commit()
+
+    async def refresh():
+        async with session_factory() as db:
+            _, new_token = await rotate_refresh_token(db, token)
+            await db.commit()
+            return new_token
+
+    results = await asyncio.gather(refresh(), refresh(), return_exceptions=True)
+    assert sum(isinstance(r, str) for r in results) == 1
+    assert sum(isinstance(r, RefreshTokenError) for r in results) == 1
+
+    # La reutilización revoca toda la familia, también el token recién emitido
+    async with session_factory() as db:
+        tokens = (await db.execute(select(RefreshToken))).scalars().all()
+    assert len(tokens) == 2
+    assert all(t.revoked_at is not None for t in tokens)
+
+    await engine.dispose()
@@ -0,0 +1,47 @@
+"""
+Tests del alta masiva de permisos (INSERT ... ON CONFLICT).
+"""
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import Document, Permission, User
+from app.services.sharing import upsert_permissions
+
+
+@pytest.mark.asyncio
+async def test_upsert_creates_updates_and_keeps_owners():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        users = [User(email=f"u{i}@example.com", password_hash="x") for i in range(3)]
+        db.add_all(users)
+        await db.flush()
+        document = Document(name="doc.pdf", user_id=users[0].id)
+        db.add(document)
+        await db.flush()
+        db.add_all([
+            Permission(user_id=users[0].id, document_id=document.id, permission_level="owner"),
+            Permission(user_id=users[1].id, document_id=document.id, permission_level="viewer"),
+        ])
+        await db.commit()
+
+        applied = await upsert_permissions(
+            db, [(document.id, user.id) for user in users], "editor"
+        )
+        await db.commit()
+
+        assert applied == {(document.id, users[1].id), (document.id, users[2].id)}
+        result = await db.execute(
+            select(Permission.user_id, Permission.permission_level)
+            .where(Permission.document_id == document.id)
+        )
+        levels = dict(result.all())
+        assert levels == {users[0].id: "owner", users[1].id: "editor", users[2].id: "editor"}
+
+    await engine.dispose()
@@ -0,0 +1,142 @@
+"""
+Tests de la validación de firmas: contexto por validación, instante actual
+y validación de varias firmas y documentos.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import pytest
+from cryptography.hazmat.primitives.serialization import Encoding, pkcs12
+
+from app.core.config import get_settings
+from app.services import signature_validation
+from benchmarks.fixtures import make_pdf, make_self_signed_p12
+
+PASSWORD = "benchmark"
+
+
+@pytest.fixture
+def trusted_signer(tmp_path, monkeypatch):
+    """Firmante con un certificado autofirmado configurado como raíz de confianza."""
+    from app.services.signer_cache import load_signer_from_bytes
+
+    p12_bytes = make_self_signed_p12(PASSWORD)
+    _, cert, _ = pkcs12.load_key_and_certificates(p12_bytes, PASSWORD.encode())
+    roots_dir = tmp_path / "roots"
+    roots_dir.mkdir()
+    (roots_dir / "root.pem").write_bytes(cert.public_bytes(Encoding.PEM))
+    monkeypatch.setattr(get_settings(), "signature_trust_roots_dir", str(roots_dir))
+    signature_validation.get_trust_roots.cache_clear()
+    yield load_signer_from_bytes(p12_bytes, PASSWORD), cert
+    signature_validation.get_trust_roots.cache_clear()
+
+
+@pytest.fixture
+def signed_pdf(tmp_path, trusted_signer):
+    """PDF con una firma de confianza."""
+    from app.api.v1.endpoints.signature import _write_signed_pdf
+
+    signer, cert = trusted_signer
+    source = make_pdf(tmp_path / "source.pdf", 0.1, page_side=128)
+    output = tmp_path / "signed.pdf"
+    _write_signed_pdf(str(source), str(output), signer)
+    return output.read_bytes(), cert.not_valid_after.replace(tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def double_signed_pdf(signed_pdf, trusted_signer):
+    """El PDF de signed_pdf con una segunda firma incremental."""
+    from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
+    from pyhanko.sign import signers
+
+    signer, _ = trusted_signer
+    writer = IncrementalPdfFileWriter(BytesIO(signed_pdf[0]), strict=False)
+    output = BytesIO()
+    signers.sign_pdf(writer, signers.PdfSignatureMetadata(field_name="Signature2"), signer=signer, output=output)
+    return output.getvalue()
+
+
+def test_each_validation_gets_a_new_context():
+    first = signature_validation.build_validation_context()
+    second = signature_validation.build_validation_context()
+    assert first is not second
+
+
+def test_validation_uses_the_current_clock(signed_pdf, monkeypatch):
+    from app.api.v1.endpoints.signature import _validate_signature_task
+
+    pdf_bytes, not_after = signed_pdf
+
+    result = _validate_signature_task((pdf_bytes, 0, None))
+    assert result["trusted"] and result["is_valid"]
+
+    # El reloj avanza más allá de la expiración: la misma firma deja de ser válida
+    monkeypatch.setattr(signature_validation, "_now", lambda: not_after + timedelta(days=1))
+    result = _validate_signature_task((pdf_bytes, 0, None))
+    assert not result["is_valid"]
+
+    # Y vuelve a serlo con el reloj real (nada quedó fijado del primer uso)
+    monkeypatch.setattr(signature_validation, "_now", lambda: datetime.now(timezone.utc))
+    assert _validate_signature_task((pdf_bytes, 0, None))["is_valid"]
+
+
+@pytest.mark.asyncio
+async def test_each_signature_is_parsed_once(double_signed_pdf, monkeypatch):
+    from pyhanko.pdf_utils import reader
+
+    from app.api.v1.endpoints.signature import _validate_pdf
+
+    parses = []
+
+    class CountingReader(reader.PdfFileReader):
+        def __init__(self, *args, **kwargs):
+            parses.append(1)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(reader, "PdfFileReader", CountingReader)
+    result = await _validate_pdf(double_signed_pdf)
+
+    assert [s["field_name"] for s in result["signatures"]] == ["Signature1", "Signature2"]
+    assert result["is_valid"] and result["trusted"]
+    # Un lector por firma; el número de firmas sale del lector de la primera
+    assert len(parses) == 2
+
+
+@pytest.mark.asyncio
+async def test_signatures_of_one_document_overlap(double_signed_pdf, monkeypatch):
+    from app.api.v1.endpoints import signature
+
+    spans = {}
+    validate = signature._validate_signature
+
+    def slow_validate(reader, sig, index):
+        start = time.monotonic()
+        time.sleep(0.3)
+        result = validate(reader, sig, index)
+        spans[index] = (start, time.monotonic())
+        return result
+
+    monkeypatch.setattr(signature, "_validate_signature", slow_validate)
+    monkeypatch.setattr(signature.settings, "pdf_max_workers", 2)
+    result = await signature._validate_pdf(double_signed_pdf)
+
+    assert result["signature_count"] == 2 and result["is_valid"]
+    (first_start, first_end), (second_start, second_end) = spans[0], spans[1]
+    assert second_start < first_end and first_start < second_end
+
+
+@pytest.mark.asyncio
+async def test_documents_are_validated_in_parallel(signed_pdf, double_signed_pdf):
+    from app.api.v1.endpoints.signature import _validate_pdf
+
+    single, _ = signed_pdf
+    results = await asyncio.gather(
+        _validate_pdf(single), _validate_pdf(double_signed_pdf), _validate_pdf(single)
+    )
+
+    assert [r["signature_count"] for r in results] == [1, 2, 1]
+    assert all(r["is_valid"] and r["trusted"] for r in results)
+    assert all(r["_cache"]["cacheable"] for r in results)
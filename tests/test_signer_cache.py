@@ -0,0 +1,65 @@
+"""
+Tests de la caché de firmantes PKCS#12 (app.services.signer_cache).
+"""
+
+import time
+
+import pytest
+
+from app.core.cache import TTLCache
+from app.services import signer_cache
+from benchmarks.fixtures import make_self_signed_p12
+
+PASSWORD = "benchmark"
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Cuenta las cargas reales de certificados, con una caché vacía."""
+    calls = []
+    load = signer_cache.load_signer_from_bytes
+
+    def counting_load(p12_bytes, password):
+        calls.append(password)
+        return load(p12_bytes, password)
+
+    monkeypatch.setattr(signer_cache, "load_signer_from_bytes", counting_load)
+    monkeypatch.setattr(signer_cache, "_signer_cache", TTLCache(maxsize=4, ttl=60))
+    return calls
+
+
+def test_repeated_signer_is_a_cache_hit(loads):
+    p12_bytes = make_self_signed_p12(PASSWORD)
+
+    first = signer_cache.get_signer(p12_bytes, PASSWORD)
+    second = signer_cache.get_signer(p12_bytes, PASSWORD)
+
+    assert second is first
+    assert loads == [PASSWORD]
+
+
+def test_wrong_password_misses_the_cache(loads):
+    p12_bytes = make_self_signed_p12(PASSWORD)
+    signer_cache.get_signer(p12_bytes, PASSWORD)
+
+    # La clave es un HMAC de certificado y contraseña: otra contraseña no
+    # encuentra el firmante cacheado y tiene que descifrar el P12 (y falla)
+    assert signer_cache.signer_cache_key(p12_bytes, "otra") != signer_cache.signer_cache_key(p12_bytes, PASSWORD)
+    with pytest.raises(ValueError):
+        signer_cache.get_signer(p12_bytes, "otra")
+
+    assert loads == [PASSWORD, "otra"]
+    assert len(signer_cache._signer_cache) == 1
+
+
+def test_expired_signers_are_purged(loads, monkeypatch):
+    monkeypatch.setattr(signer_cache, "_signer_cache", TTLCache(maxsize=4, ttl=0.01))
+    p12_bytes = make_self_signed_p12(PASSWORD)
+    signer_cache.get_signer(p12_bytes, PASSWORD)
+
+    time.sleep(0.02)
+    assert signer_cache._signer_cache.purge_expired() == 1
+    assert len(signer_cache._signer_cache) == 0
+
+    signer_cache.get_signer(p12_bytes, PASSWORD)
+    assert loads == [PASSWORD, PASSWORD]
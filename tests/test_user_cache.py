@@ -0,0 +1,48 @@
+"""
+Tests de la invalidación de la caché de usuarios.
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import User
+from app.schemas.token import TokenData
+from app.services import user_cache
+
+
+@pytest.mark.asyncio
+async def test_user_is_invalidated_after_commit_not_at_flush():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    user_cache.clear_user_cache()
+
+    async with session_factory() as db:
+        user = User(email="cache@example.com", password_hash="x")
+        db.add(user)
+        await db.commit()
+    key = ("id", user.id)
+
+    async with session_factory() as db:
+        await user_cache.get_active_user(db, TokenData(user_id=user.id))
+    assert user_cache._user_cache.get(key) is not None
+
+    async with session_factory() as db:
+        user = await db.get(User, user.id)
+        user.is_active = False
+        await db.flush()
+        # Aún sin commit: otra solicitud leería los valores confirmados
+        assert user_cache._user_cache.get(key) is not None
+        await db.rollback()
+    assert user_cache._user_cache.get(key) is not None
+
+    async with session_factory() as db:
+        user = await db.get(User, user.id)
+        user.is_active = False
+        await db.commit()
+    assert user_cache._user_cache.get(key) is None
+
+    user_cache.clear_user_cache()
+    await engine.dispose()
@@ -0,0 +1,54 @@
+"""
+Tests de la creación de versiones (app.services.versioning).
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import Document, User, Version
+from app.services.versioning import add_version
+
+
+@pytest.mark.asyncio
+async def test_concurrent_versions_get_distinct_numbers(tmp_path):
+    # BD en archivo: cada sesión usa su propia conexión y el bloqueo es real
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'versions.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        user = User(email="owner@example.com", password_hash="x")
+        db.add(user)
+        await db.flush()
+        document = Document(name="contrato.pdf", user_id=user.id)
+        db.add(document)
+        await db.flush()
+        await add_version(db, document, file_path="v1.pdf", file_size=8)
+        await db.commit()
+        document_id = document.id
+
+    async def annotate(file_path: str) -> None:
+        async with session_factory() as db:
+            document = await db.get(Document, document_id)
+            await add_version(db, document, file_path=file_path, file_size=8, suffix="-annotated")
+            await db.commit()
+
+    await asyncio.gather(annotate("a.pdf"), annotate("b.pdf"))
+
+    async with session_factory() as db:
+        versions = (await db.execute(
+            select(Version).where(Version.document_id == document_id).order_by(Version.sequence)
+        )).scalars().all()
+        document = await db.get(Document, document_id)
+
+    assert [v.version_number for v in versions] == ["v1.0", "v1.1-annotated", "v1.2-annotated"]
+    assert [v.sequence for v in versions] == [1, 2, 3]
+    assert [v.is_latest for v in versions] == [False, False, True]
+    assert document.latest_version_id == versions[-1].id
+
+    await engine.dispose()